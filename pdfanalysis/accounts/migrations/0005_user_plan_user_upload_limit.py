@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_delete_dailyusage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="plan",
+            field=models.CharField(
+                choices=[("free", "Free"), ("pro", "Pro")],
+                default="free",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="upload_limit",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
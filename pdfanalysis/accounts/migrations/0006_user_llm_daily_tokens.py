@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_user_plan_user_upload_limit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="llm_daily_tokens",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,16 @@
 from django.contrib.auth.models import AbstractUser
+from django.db import models
 
 
 # Create your models here.
 class User(AbstractUser):
-    pass
+    PLAN_CHOICES = (
+        ("free", "Free"),
+        ("pro", "Pro"),
+    )
+
+    plan = models.CharField(max_length=20, choices=PLAN_CHOICES, default="free")
+    # Overrides the plan's upload quota when set.
+    upload_limit = models.PositiveIntegerField(null=True, blank=True)
+    # Overrides the plan's daily LLM token ceiling when set.
+    llm_daily_tokens = models.PositiveIntegerField(null=True, blank=True)
@@ -0,0 +1,203 @@
+"""
+Cache-backed event channel and live progress for analysis jobs.
+
+Every job gets a monotonically increasing sequence counter and one cache entry
+per event. Publishers (the view that creates the job and the Celery task) bump
+the counter and store the event; subscribers remember the last sequence they
+have seen and only receive newer entries, so nobody polls the database.
+
+Live progress lives next to the channel. ``AnalysisJob.progress`` only keeps
+the coarse value persisted at start, milestones and the terminal state.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_JOB_STATUSES = ("READY", "FAILED")
+
+
+# Cache clients are thread-safe, so reads need not queue behind ORM work on the
+# thread-sensitive executor that Django's own ``aget_many`` would use.
+@sync_to_async(thread_sensitive=False)
+def _aget_many(keys):
+    return cache.get_many(keys)
+
+
+def _seq_key(job_id: int) -> str:
+    return f"analysis:job:{job_id}:seq"
+
+
+def _event_key(job_id: int, seq: int) -> str:
+    return f"analysis:job:{job_id}:event:{seq}"
+
+
+def _progress_key(job_id: int) -> str:
+    return f"analysis:job:{job_id}:progress"
+
+
+def publish_job_event(job_id: int, event: str, data: dict) -> int | None:
+    """
+    Append an event to the job channel and return its sequence number.
+
+    A broken cache must never fail the analysis itself, so errors are logged
+    and swallowed; subscribers simply miss that event.
+    """
+    ttl = settings.ANALYSIS_EVENT_TTL
+    seq_key = _seq_key(job_id)
+    try:
+        cache.add(seq_key, 0, ttl)
+        seq = cache.incr(seq_key)
+        cache.set(_event_key(job_id, seq), {"event": event, "data": data}, ttl)
+    except Exception:
+        logger.warning("Could not publish %s event for job %s", event, job_id)
+        return None
+    return seq
+
+
+def job_result(job, analysis) -> dict:
+    """Payload of the terminal ``result`` event; ``analysis`` may be ``None``."""
+    ready = job.status == "READY" and analysis is not None
+    return {
+        "status": job.status,
+        "error": job.error,
+        "finished_at": job.finished_at,
+        "analysis_text": analysis.analysis_text if ready else None,
+        "analysis_json": analysis.analysis_json if ready else None,
+    }
+
+
+def publish_job_progress(job_id: int, progress: int):
+    try:
+        cache.set(_progress_key(job_id), progress, settings.ANALYSIS_EVENT_TTL)
+    except Exception:
+        logger.warning("Could not store progress for job %s", job_id)
+    publish_job_event(job_id, "progress", {"progress": progress})
+
+
+def get_job_progress(job_id: int, default: int | None = None) -> int | None:
+    """Live progress of a running job; ``default`` when the cache has none."""
+    try:
+        return cache.get(_progress_key(job_id), default)
+    except Exception:
+        return default
+
+
+async def aget_job_progress(job_id: int, default: int | None = None) -> int | None:
+    try:
+        return await sync_to_async(cache.get, thread_sensitive=False)(
+            _progress_key(job_id), default
+        )
+    except Exception:
+        return default
+
+
+def publish_job_finished(job, analysis=None):
+    try:
+        cache.set(_progress_key(job.id), job.progress, settings.ANALYSIS_EVENT_TTL)
+    except Exception:
+        logger.warning("Could not store progress for job %s", job.id)
+    publish_job_event(job.id, "status", {"status": job.status, "progress": 100})
+    publish_job_event(job.id, "result", job_result(job, analysis))
+
+
+def _collect(job_id: int, last_seq: int, latest: int, found: dict):
+    events = []
+    for seq in range(last_seq + 1, latest + 1):
+        item = found.get(_event_key(job_id, seq))
+        if item is None:
+            # Jobs have a single writer, so a hole followed by newer events
+            # means the entry expired; a hole at the tail is a write in flight.
+            newer = range(seq + 1, latest + 1)
+            if any(_event_key(job_id, s) in found for s in newer):
+                last_seq = seq
+                continue
+            break
+        events.append((seq, item["event"], item["data"]))
+        last_seq = seq
+
+    return events, last_seq
+
+
+class JobEventHub:
+    """
+    Fans channel events out to the SSE subscribers of this process.
+
+    A single poller reads the sequence counters of every watched job with one
+    ``get_many`` and the new events with a second one, so the cache load per
+    tick stays constant no matter how many clients are connected. Each job
+    cursor trails the slowest subscriber; subscribers drop what they have
+    already seen by sequence number.
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self._cursors = {}
+        self._task = None
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: int, last_seq: int):
+        queue = asyncio.Queue()
+        self._queues.setdefault(job_id, set()).add(queue)
+        self._cursors[job_id] = min(self._cursors.get(job_id, last_seq), last_seq)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+        try:
+            yield queue
+        finally:
+            subscribers = self._queues.get(job_id, set())
+            subscribers.discard(queue)
+            if not subscribers:
+                self._queues.pop(job_id, None)
+                self._cursors.pop(job_id, None)
+
+    async def _poll(self):
+        while self._queues:
+            try:
+                await self._tick()
+            except Exception:
+                logger.warning("Analysis event poll failed", exc_info=True)
+            await asyncio.sleep(settings.ANALYSIS_STREAM_POLL_INTERVAL)
+
+    async def _tick(self):
+        # Subscribers that join while we await are served by the next tick,
+        # which re-reads from the cursor they lowered.
+        targets = {job_id: set(queues) for job_id, queues in self._queues.items()}
+        cursors = {job_id: self._cursors[job_id] for job_id in targets}
+
+        latest = await _aget_many([_seq_key(job_id) for job_id in targets])
+        pending = {}
+        for job_id, cursor in cursors.items():
+            top = latest.get(_seq_key(job_id)) or 0
+            if top > cursor:
+                pending[job_id] = top
+        if not pending:
+            return
+
+        keys = [
+            _event_key(job_id, seq)
+            for job_id, top in pending.items()
+            for seq in range(cursors[job_id] + 1, top + 1)
+        ]
+        found = await _aget_many(keys)
+
+        for job_id, top in pending.items():
+            events, new_cursor = _collect(job_id, cursors[job_id], top, found)
+            if self._cursors.get(job_id) == cursors[job_id]:
+                self._cursors[job_id] = new_cursor
+            for queue in targets[job_id]:
+                for item in events:
+                    queue.put_nowait(item)
+
+
+job_event_hub = JobEventHub()
+
+
+def latest_job_seq(job_id: int) -> int:
+    return cache.get(_seq_key(job_id)) or 0
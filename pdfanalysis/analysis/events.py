@@ -0,0 +1,118 @@
+"""
+Append-only analysis event history behind the event log.
+
+Writers build unsaved ``AnalysisEvent`` rows with ``job_event`` and hand them
+to the code that saves the job state, which inserts them with one
+``bulk_create`` inside the same transaction. ``StageTimer`` measures the
+stages of a run so their durations travel with the events.
+"""
+
+import time
+
+from django.db import transaction
+
+from analysis.models import AnalysisEvent, AnalysisEventArchive
+from documents.response_cache import bump_user_version
+
+ARCHIVE_FIELDS = (
+    "id",
+    "owner_id",
+    "document_id",
+    "job_id",
+    "job_type",
+    "event",
+    "stage",
+    "detail",
+    "duration_ms",
+    "ts",
+)
+
+
+def job_event(job, doc, stage, *, duration_ms=None, detail=None) -> AnalysisEvent:
+    return AnalysisEvent(
+        owner_id=doc.owner_id,
+        document_id=doc.id,
+        job_id=job.id,
+        job_type=job.job_type,
+        event=job.status,
+        stage=stage,
+        detail=(detail or f"{job.job_type} job {job.status}")[:255],
+        duration_ms=duration_ms,
+    )
+
+
+class StageTimer:
+    """
+    Wall-clock milliseconds of consecutive stages of one run.
+
+    Other measurements of the run (bytes downloaded, pages, LLM calls) are
+    recorded alongside, and ``stats`` collects everything for
+    ``AnalysisJob.stats``.
+    """
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.stages = []
+        self.metrics = {}
+        self.llm_calls = []
+
+    def lap(self, stage: str) -> int:
+        now = time.perf_counter()
+        duration_ms = int((now - self._last) * 1000)
+        self.stages.append((stage, duration_ms))
+        self._last = now
+        return duration_ms
+
+    def total_ms(self) -> int:
+        return int((time.perf_counter() - self.started) * 1000)
+
+    def record(self, **metrics):
+        self.metrics.update(metrics)
+
+    def stats(self) -> dict:
+        """``{"<stage>_ms": ..., **metrics, "total_ms": ..., "llm_calls": [...]}``"""
+        stats = {f"{stage}_ms": duration_ms for stage, duration_ms in self.stages}
+        stats.update(self.metrics)
+        stats["total_ms"] = self.total_ms()
+        stats["llm_calls"] = list(self.llm_calls)
+        return stats
+
+    def events(self, job, doc):
+        """One event per finished stage, in order."""
+        return [
+            job_event(
+                job,
+                doc,
+                stage,
+                duration_ms=duration_ms,
+                detail=f"{job.job_type} job {stage} ({duration_ms} ms)",
+            )
+            for stage, duration_ms in self.stages
+        ]
+
+
+def archive_events_before(cutoff, batch_size=5000) -> int:
+    """
+    Move events older than ``cutoff`` to the archive table, oldest first.
+
+    Each batch is copied and deleted in its own transaction, so the job can
+    be interrupted and resumed and never holds long locks.
+    """
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                AnalysisEvent.objects.filter(ts__lt=cutoff)
+                .order_by("id")
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return archived
+            AnalysisEventArchive.objects.bulk_create(
+                [AnalysisEventArchive(**row) for row in rows],
+                ignore_conflicts=True,
+            )
+            AnalysisEvent.objects.filter(id__in=[row["id"] for row in rows]).delete()
+            for owner_id in {row["owner_id"] for row in rows}:
+                bump_user_version(owner_id)
+        archived += len(rows)
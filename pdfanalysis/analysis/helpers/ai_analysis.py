@@ -1,8 +1,13 @@
-import json
 import os
+import time
 
+from django.conf import settings
 from openai import OpenAI
 
+from analysis.helpers.tokens import context_tokens, fit_to_tokens, message_tokens
+from config.metrics import external_call
+from config.renderers import loads
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 JSON_SCHEMA = {
@@ -69,7 +74,67 @@ JSON_SCHEMA = {
 }
 
 
-def analyze_document_with_openai(full_text: str) -> tuple[str, dict]:
+def record_call(calls, name, model, started, resp, input_tokens=None):
+    """Append the latency and token usage of an LLM call to ``calls``."""
+    if calls is None:
+        return
+    usage = getattr(resp, "usage", None)
+    calls.append(
+        {
+            "name": name,
+            "model": model,
+            "latency_ms": int((time.perf_counter() - started) * 1000),
+            "input_tokens": input_tokens,
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+        }
+    )
+
+
+def complete_json(
+    client, name, model, system, full_text, temperature, calls=None, budget=None
+):
+    """
+    One JSON chat completion within the token limits of the ``name`` call.
+
+    The document is trimmed to what ``LLM_INPUT_TOKENS[name]`` (and the
+    model's context window) leaves after the system prompt. With a
+    ``budget`` the call's upper bound is reserved before it is made.
+    """
+    max_tokens = settings.LLM_OUTPUT_TOKENS[name]
+    limit = min(settings.LLM_INPUT_TOKENS[name], context_tokens(model) - max_tokens)
+    messages = [
+        {"role": "system", "content": system.strip()},
+        {"role": "user", "content": ""},
+    ]
+    available = limit - message_tokens(messages, model)
+    messages[1]["content"], _ = fit_to_tokens(full_text, model, available)
+    input_tokens = message_tokens(messages, model)
+
+    reserved = budget.reserve(input_tokens + max_tokens) if budget else 0
+    started = time.perf_counter()
+    try:
+        with external_call("openai", name):
+            resp = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+    except Exception:
+        if budget:
+            budget.release(reserved)
+        raise
+    if budget:
+        budget.settle(reserved, model, getattr(resp, "usage", None))
+    record_call(calls, name, model, started, resp, input_tokens=input_tokens)
+    return resp
+
+
+def analyze_document_with_openai(
+    full_text: str, calls=None, budget=None
+) -> tuple[str, dict]:
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
@@ -103,19 +168,12 @@ def analyze_document_with_openai(full_text: str) -> tuple[str, dict]:
       - Adapt your extraction to the actual document type. Do not force CV fields onto non-CV documents.
       """
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system.strip()},
-            {"role": "user", "content": full_text[:120000]},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.2,
-        max_tokens=2000,
+    resp = complete_json(
+        client, "analysis", model, system, full_text, 0.2, calls, budget
     )
 
     raw = (resp.choices[0].message.content or "").strip()
-    parsed = json.loads(raw)
+    parsed = loads(raw)
 
     # garanti
     if "suggestions" not in parsed or not isinstance(parsed.get("suggestions"), list):
@@ -124,7 +182,9 @@ def analyze_document_with_openai(full_text: str) -> tuple[str, dict]:
     return raw, parsed
 
 
-def generate_suggestions_en(full_text: str) -> tuple[str, dict]:
+def generate_suggestions_en(
+    full_text: str, calls=None, budget=None
+) -> tuple[str, dict]:
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
@@ -157,19 +217,12 @@ def generate_suggestions_en(full_text: str) -> tuple[str, dict]:
     }
     """
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system.strip()},
-            {"role": "user", "content": full_text[:80000]},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.3,
-        max_tokens=1200,
+    resp = complete_json(
+        client, "suggestions", model, system, full_text, 0.3, calls, budget
     )
 
     raw = (resp.choices[0].message.content or "").strip()
-    parsed = json.loads(raw)
+    parsed = loads(raw)
 
     if "suggestions" not in parsed or not isinstance(parsed.get("suggestions"), list):
         parsed["suggestions"] = []
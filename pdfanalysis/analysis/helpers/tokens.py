@@ -0,0 +1,115 @@
+"""
+Token counting and trimming for the LLM prompts.
+
+Input limits are in tokens of the model's own tokenizer (``tiktoken``), not
+characters: the same character budget is several times more tokens for
+Turkish or CJK text than for English. ``fit_to_tokens`` trims a text to an
+exact token count, backing up to the last sentence end so the model does not
+read a cut-off sentence.
+
+When ``tiktoken`` or its BPE file (downloaded on first use, see
+``TIKTOKEN_CACHE_DIR``) is unavailable, tokens are estimated as one per
+``FALLBACK_BYTES_PER_TOKEN`` bytes of UTF-8, which over-counts for most text.
+"""
+
+import logging
+import re
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is in requirements.txt
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+DEFAULT_CONTEXT_TOKENS = 128_000
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4.1-mini": 1_047_576,
+}
+FALLBACK_BYTES_PER_TOKEN = 3
+# Tokens a chat message adds around its content.
+MESSAGE_OVERHEAD_TOKENS = 4
+# A sentence end is only used when it keeps at least this share of the text.
+MIN_SENTENCE_KEEP = 0.8
+
+SENTENCE_END_RE = re.compile(r"[.!?…。！？](?=\s|$)|\n\s*\n")
+
+
+class ByteEstimate:
+    """Stand-in for a ``tiktoken`` encoding: tokens are runs of UTF-8 bytes."""
+
+    name = "bytes"
+
+    def encode_ordinary(self, text):
+        data = text.encode()
+        return [
+            data[i : i + FALLBACK_BYTES_PER_TOKEN]
+            for i in range(0, len(data), FALLBACK_BYTES_PER_TOKEN)
+        ]
+
+    def decode_bytes(self, tokens):
+        return b"".join(tokens)
+
+
+@lru_cache(maxsize=8)
+def encoding_for(model):
+    """The tokenizer of ``model`` (``o200k_base`` when unknown)."""
+    if tiktoken is None:  # pragma: no cover
+        return ByteEstimate()
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        logger.warning("tiktoken encoding unavailable, estimating tokens")
+        return ByteEstimate()
+
+
+def context_tokens(model) -> int:
+    return MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+
+
+def count_tokens(text, model) -> int:
+    return len(encoding_for(model).encode_ordinary(text))
+
+
+def message_tokens(messages, model) -> int:
+    """Prompt tokens of chat ``messages``, as the API counts them."""
+    return sum(
+        count_tokens(m["content"], model) + MESSAGE_OVERHEAD_TOKENS for m in messages
+    )
+
+
+def _sentence_end(text):
+    start = int(len(text) * MIN_SENTENCE_KEEP)
+    end = None
+    for match in SENTENCE_END_RE.finditer(text, start):
+        end = match.end()
+    return end
+
+
+def fit_to_tokens(text, model, limit) -> tuple[str, int]:
+    """``(text, tokens)`` with ``text`` cut to at most ``limit`` tokens."""
+    encoding = encoding_for(model)
+    tokens = encoding.encode_ordinary(text)
+    if len(tokens) <= limit:
+        return text, len(tokens)
+    limit = max(0, limit)
+    text = encoding.decode_bytes(tokens[:limit]).decode(errors="ignore")
+    end = _sentence_end(text)
+    if end:
+        text = text[:end]
+    tokens = encoding.encode_ordinary(text)
+    # A prefix can tokenize into more tokens than the token prefix it was
+    # decoded from; shave until it fits.
+    while len(tokens) > limit:
+        keep = limit - (len(tokens) - limit)
+        text = encoding.decode_bytes(tokens[: max(0, keep)]).decode(errors="ignore")
+        tokens = encoding.encode_ordinary(text)
+    return text, len(tokens)
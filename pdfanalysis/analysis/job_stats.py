@@ -0,0 +1,63 @@
+"""
+Percentiles of the per-stage measurements in ``AnalysisJob.stats``.
+
+``stage_report`` summarizes the stats of many jobs: every numeric key
+(``download_ms``, ``download_bytes``, ``extract_ms_per_page``, ...) across
+the jobs that have it, and the LLM calls grouped by name with their latency
+and token counts.
+"""
+
+LLM_METRICS = ("latency_ms", "input_tokens", "prompt_tokens", "completion_tokens")
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def _is_number(value):
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def stage_report(rows) -> dict:
+    """``{"jobs", "stages": {metric: summary}, "llm": {name: {...}}}`` of ``rows``."""
+    stages = {}
+    llm = {}
+    jobs = 0
+    for stats in rows:
+        if not stats:
+            continue
+        jobs += 1
+        for key, value in stats.items():
+            if _is_number(value):
+                stages.setdefault(key, []).append(value)
+        for call in stats.get("llm_calls") or ():
+            metrics = llm.setdefault(call.get("name") or "unknown", {})
+            for key in LLM_METRICS:
+                if _is_number(call.get(key)):
+                    metrics.setdefault(key, []).append(call[key])
+
+    llm_report = {}
+    for name, metrics in sorted(llm.items()):
+        llm_report[name] = {key: summarize(v) for key, v in metrics.items()}
+        llm_report[name]["total_tokens"] = sum(
+            sum(metrics.get(key, ())) for key in ("prompt_tokens", "completion_tokens")
+        )
+    return {
+        "jobs": jobs,
+        "stages": {key: summarize(v) for key, v in sorted(stages.items())},
+        "llm": llm_report,
+    }
@@ -0,0 +1,101 @@
+"""
+Enqueueing full analysis jobs, for one document or many at once.
+
+The work per request is constant in the number of documents: one query locks
+the caller's documents, one finds those already queued or running, jobs and
+their ``queued`` events are inserted with ``bulk_create``, the documents are
+moved to ``PROCESSING`` with a single ``UPDATE`` and the Celery messages are
+published as one group over a shared broker connection.
+"""
+
+from celery import group
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from analysis.channels import publish_job_event
+from analysis.events import job_event
+from analysis.models import AnalysisEvent, AnalysisJob
+from analysis.tasks import run_full_analysis
+from documents.models import Document
+from documents.response_cache import bump_user_version
+from documents.stats import documents_status_changed
+
+ACTIVE_JOB_STATUSES = ("PENDING", "PROCESSING")
+
+QUEUED = "queued"
+NOT_FOUND = "not_found"
+ALREADY_RUNNING = "already_running"
+
+
+def enqueue_full_analyses(owner, document_ids):
+    """
+    Create a FULL job for each live document of ``owner`` in ``document_ids``.
+
+    Returns ``{document_id: (outcome, job)}`` in request order, ``job`` being
+    ``None`` unless the outcome is ``QUEUED``. Call ``dispatch_full_analyses``
+    with the queued jobs once the transaction has committed.
+    """
+    document_ids = list(dict.fromkeys(document_ids))
+
+    with transaction.atomic():
+        docs = {
+            doc.id: doc
+            for doc in Document.objects.select_for_update()
+            .filter(id__in=document_ids, owner=owner, is_deleted=False)
+            .only("id", "owner_id", "status")
+        }
+        running = set(
+            AnalysisJob.objects.filter(
+                document_id__in=docs,
+                job_type="FULL",
+                status__in=ACTIVE_JOB_STATUSES,
+            ).values_list("document_id", flat=True)
+        )
+        to_queue = [doc for doc_id, doc in docs.items() if doc_id not in running]
+
+        jobs = AnalysisJob.objects.bulk_create(
+            AnalysisJob(document=doc, job_type="FULL", status="PENDING", progress=0)
+            for doc in to_queue
+        )
+        if jobs:
+            Document.objects.filter(id__in=[doc.id for doc in to_queue]).update(
+                status="PROCESSING",
+                latest_job_id=Case(
+                    *[When(id=job.document_id, then=Value(job.id)) for job in jobs],
+                    output_field=IntegerField(),
+                ),
+                latest_job_status="PENDING",
+                latest_job_progress=0,
+                updated_at=timezone.now(),
+            )
+            documents_status_changed(
+                owner.pk, [doc.status for doc in to_queue], "PROCESSING"
+            )
+            AnalysisEvent.objects.bulk_create(
+                job_event(job, doc, "queued") for job, doc in zip(jobs, to_queue)
+            )
+            bump_user_version(owner.pk)
+
+    queued = {job.document_id: job for job in jobs}
+    results = {}
+    for doc_id in document_ids:
+        if doc_id in queued:
+            results[doc_id] = (QUEUED, queued[doc_id])
+        elif doc_id in running:
+            results[doc_id] = (ALREADY_RUNNING, None)
+        else:
+            results[doc_id] = (NOT_FOUND, None)
+    return results
+
+
+def dispatch_full_analyses(jobs):
+    """Publish the channel's first event and the Celery message of each job."""
+    for job in jobs:
+        publish_job_event(
+            job.id, "status", {"status": job.status, "progress": job.progress}
+        )
+    if len(jobs) == 1:
+        run_full_analysis.delay(jobs[0].id)
+    elif jobs:
+        group(run_full_analysis.s(job.id) for job in jobs).apply_async()
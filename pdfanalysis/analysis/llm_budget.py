@@ -0,0 +1,103 @@
+"""
+Daily LLM token ceilings and spend accounting, kept on ``LLMUsage``.
+
+Before a call ``reserve`` adds its upper bound (the prompt's tokens plus
+``max_tokens``) to the day's ``reserved_tokens`` with a single conditional
+``UPDATE``, which matches no row once spent plus reserved tokens would pass
+the ceiling; concurrent jobs of one user therefore cannot overshoot it
+together. ``settle`` swaps the reservation for the usage the response
+reports and adds its cost, ``release`` gives it back when the call failed.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.lookups import LessThanOrEqual
+from django.utils import timezone
+
+from analysis.models import LLMUsage
+
+MILLION = Decimal(1_000_000)
+
+
+class TokenBudgetExceededError(Exception):
+    pass
+
+
+def daily_token_limit_for(user) -> int:
+    if user.llm_daily_tokens is not None:
+        return user.llm_daily_tokens
+    plans = settings.LLM_DAILY_TOKENS_PLANS
+    return plans.get(user.plan, plans["free"])
+
+
+def call_cost(model, prompt_tokens, completion_tokens) -> Decimal:
+    """USD cost of a call at ``LLM_PRICES``; zero for an unpriced model."""
+    prices = settings.LLM_PRICES.get(model)
+    if prices is None:
+        return Decimal(0)
+    prompt_price, completion_price = (Decimal(str(p)) for p in prices)
+    cost = prompt_tokens * prompt_price + completion_tokens * completion_price
+    return (cost / MILLION).quantize(Decimal("0.000001"))
+
+
+class TokenBudget:
+    def __init__(self, user):
+        self.user = user
+        self.limit = daily_token_limit_for(user)
+        self.day = timezone.now().date()
+        self.used = 0
+
+    def _usage(self):
+        return LLMUsage.objects.filter(owner=self.user, day=self.day)
+
+    def check(self):
+        """Refresh ``used`` (spent and reserved tokens of the day)."""
+        row = self._usage().values(
+            "prompt_tokens", "completion_tokens", "reserved_tokens"
+        )
+        self.used = sum(next(iter(row), {}).values())
+        return self
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def reserve(self, tokens: int):
+        """Hold ``tokens`` for a call; raises ``TokenBudgetExceededError`` if over."""
+        LLMUsage.objects.get_or_create(owner=self.user, day=self.day)
+        spent = F("prompt_tokens") + F("completion_tokens") + F("reserved_tokens")
+        reserved = (
+            self._usage()
+            .filter(LessThanOrEqual(spent, self.limit - tokens))
+            .update(reserved_tokens=F("reserved_tokens") + tokens)
+        )
+        if not reserved:
+            self.check()
+            raise TokenBudgetExceededError(
+                f"Daily LLM token limit reached ({self.used}/{self.limit}); "
+                f"the call needs up to {tokens} tokens."
+            )
+        return tokens
+
+    def settle(self, reserved: int, model, usage):
+        """Replace the reservation with the tokens ``usage`` reports."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        self._usage().update(
+            reserved_tokens=F("reserved_tokens") - reserved,
+            prompt_tokens=F("prompt_tokens") + prompt_tokens,
+            completion_tokens=F("completion_tokens") + completion_tokens,
+            calls=F("calls") + 1,
+            cost_usd=F("cost_usd") + call_cost(model, prompt_tokens, completion_tokens),
+        )
+
+    def release(self, reserved: int):
+        self._usage().update(reserved_tokens=F("reserved_tokens") - reserved)
+
+    def headers(self) -> dict:
+        return {
+            "X-LLM-Tokens-Limit": str(self.limit),
+            "X-LLM-Tokens-Remaining": str(self.remaining),
+        }
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analysis.events import archive_events_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Move analysis events older than the retention period to the archive "
+        "table in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.ANALYSIS_EVENT_RETENTION_DAYS,
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, older_than_days, batch_size, **options):
+        cutoff = timezone.now() - timedelta(days=older_than_days)
+        archived = archive_events_before(cutoff, batch_size=batch_size)
+        self.stdout.write(f"{archived} events archived (older than {cutoff:%Y-%m-%d}).")
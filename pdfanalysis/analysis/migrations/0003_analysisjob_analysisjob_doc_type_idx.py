@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analysis", "0002_analysisjob_analysisjob_created_idx"),
+        ("documents", "0007_document_document_live_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="analysisjob",
+            index=models.Index(
+                fields=["document", "job_type", "-id"], name="analysisjob_doc_type_idx"
+            ),
+        ),
+    ]
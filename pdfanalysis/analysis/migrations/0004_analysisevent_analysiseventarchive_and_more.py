@@ -0,0 +1,109 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analysis", "0003_analysisjob_analysisjob_doc_type_idx"),
+        ("documents", "0008_documentstats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalysisEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "job_type",
+                    models.CharField(
+                        choices=[("PREVIEW", "Preview"), ("FULL", "Full")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "event",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSING", "Processing"),
+                            ("READY", "Ready"),
+                            ("FAILED", "Failed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("stage", models.CharField(max_length=30)),
+                ("detail", models.CharField(blank=True, max_length=255)),
+                ("duration_ms", models.PositiveIntegerField(blank=True, null=True)),
+                ("ts", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AnalysisEventArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("owner_id", models.BigIntegerField()),
+                ("document_id", models.BigIntegerField()),
+                ("job_id", models.BigIntegerField()),
+                ("job_type", models.CharField(max_length=10)),
+                ("event", models.CharField(max_length=20)),
+                ("stage", models.CharField(max_length=30)),
+                ("detail", models.CharField(blank=True, max_length=255)),
+                ("duration_ms", models.PositiveIntegerField(blank=True, null=True)),
+                ("ts", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="analysisjob",
+            name="analysisjob_created_idx",
+        ),
+        migrations.AddField(
+            model_name="analysisevent",
+            name="document",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="analysis_events",
+                to="documents.document",
+            ),
+        ),
+        migrations.AddField(
+            model_name="analysisevent",
+            name="job",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="events",
+                to="analysis.analysisjob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="analysisevent",
+            name="owner",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="analysis_events",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="analysisevent",
+            index=models.Index(
+                fields=["owner", "-ts", "-id"], name="analysisevent_owner_ts_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def backfill_events(apps, schema_editor):
+    """One event per existing job, as the event log used to show them."""
+    AnalysisJob = apps.get_model("analysis", "AnalysisJob")
+    AnalysisEvent = apps.get_model("analysis", "AnalysisEvent")
+
+    last_id = 0
+    while True:
+        jobs = list(
+            AnalysisJob.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values(
+                "id",
+                "document_id",
+                "document__owner_id",
+                "job_type",
+                "status",
+                "created_at",
+            )[:BATCH_SIZE]
+        )
+        if not jobs:
+            break
+        last_id = jobs[-1]["id"]
+        AnalysisEvent.objects.bulk_create(
+            AnalysisEvent(
+                owner_id=job["document__owner_id"],
+                document_id=job["document_id"],
+                job_id=job["id"],
+                job_type=job["job_type"],
+                event=job["status"],
+                stage="backfill",
+                detail=f"{job['job_type']} job {job['status']}",
+                ts=job["created_at"],
+            )
+            for job in jobs
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analysis", "0004_analysisevent_analysiseventarchive_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analysis", "0005_backfill_analysis_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisjob",
+            name="stats",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
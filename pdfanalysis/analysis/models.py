@@ -1,5 +1,9 @@
+from decimal import Decimal
+
 from django.db import models
+from django.utils import timezone
 
+from accounts.models import User
 from documents.models import Document
 
 ANALYSIS_JOB_STATUS_CHOICES = (
@@ -34,5 +38,95 @@ class AnalysisJob(models.Model):
 
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # Per-stage timings and resource use of the run (``StageTimer.stats``).
+    stats = models.JSONField(default=dict, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Latest job of a type for a document, and the queued/running check.
+            models.Index(
+                fields=["document", "job_type", "-id"], name="analysisjob_doc_type_idx"
+            ),
+        ]
+
+
+class AnalysisEvent(models.Model):
+    """
+    Append-only history of analysis job transitions and stage timings.
+
+    Rows are only ever inserted, in bulk, in the same transaction as the job
+    state they describe; the event log reads them per owner, newest first.
+    Old rows are moved to ``AnalysisEventArchive``.
+    """
+
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="analysis_events", db_index=False
+    )
+    document = models.ForeignKey(
+        Document, on_delete=models.CASCADE, related_name="analysis_events"
+    )
+    job = models.ForeignKey(
+        AnalysisJob, on_delete=models.CASCADE, related_name="events"
+    )
+    job_type = models.CharField(max_length=10, choices=JOB_TYPE_CHOICES)
+    # Job status when the event was recorded.
+    event = models.CharField(max_length=20, choices=ANALYSIS_JOB_STATUS_CHOICES)
+    stage = models.CharField(max_length=30)
+    detail = models.CharField(max_length=255, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    ts = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Event log keyset pagination, newest first.
+            models.Index(
+                fields=["owner", "-ts", "-id"], name="analysisevent_owner_ts_idx"
+            ),
+        ]
+
+
+class AnalysisEventArchive(models.Model):
+    """Events past the retention period; plain ids, no foreign keys."""
+
+    id = models.BigIntegerField(primary_key=True)
+    owner_id = models.BigIntegerField()
+    document_id = models.BigIntegerField()
+    job_id = models.BigIntegerField()
+    job_type = models.CharField(max_length=10)
+    event = models.CharField(max_length=20)
+    stage = models.CharField(max_length=30)
+    detail = models.CharField(max_length=255, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    ts = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+class LLMUsage(models.Model):
+    """
+    LLM token spend of one user on one UTC day.
+
+    A call first reserves its upper bound (prompt tokens plus ``max_tokens``)
+    in ``reserved_tokens``, which only succeeds while the day's total stays
+    under the user's ceiling; the usage the API reports then replaces the
+    reservation. See ``analysis.llm_budget``.
+    """
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="llm_usage")
+    day = models.DateField()
+    calls = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    reserved_tokens = models.PositiveBigIntegerField(default=0)
+    cost_usd = models.DecimalField(
+        max_digits=12, decimal_places=6, default=Decimal("0")
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "day"], name="llmusage_owner_day_uniq"
+            ),
+        ]
@@ -1,5 +1,14 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
+from analysis.channels import TERMINAL_JOB_STATUSES
+from analysis.models import JOB_TYPE_CHOICES
+
+BULK_ANALYSIS_MAX_DOCUMENTS = 500
+LLM_USAGE_MAX_DAYS = 366
+
 
 class QARequestSerializer(serializers.Serializer):
     question = serializers.CharField(max_length=1000)
@@ -15,3 +24,42 @@ class QAResponseSerializer(serializers.Serializer):
     status = serializers.IntegerField()
     answer = serializers.CharField()
     sources = QASourceSerializer(many=True)
+
+
+class BulkAnalysisRequestSerializer(serializers.Serializer):
+    document_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_ANALYSIS_MAX_DOCUMENTS,
+    )
+
+
+class StageStatsQuerySerializer(serializers.Serializer):
+    """Range of finished jobs for the stage report; the last day by default."""
+
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    job_type = serializers.ChoiceField(choices=JOB_TYPE_CHOICES, default="FULL")
+    status = serializers.ChoiceField(choices=TERMINAL_JOB_STATUSES, required=False)
+
+    def validate(self, attrs):
+        until = attrs.setdefault("until", timezone.now())
+        since = attrs.setdefault("since", until - timedelta(days=1))
+        if since >= until:
+            raise serializers.ValidationError({"since": ["must be before until."]})
+        return attrs
+
+
+class LLMUsageQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(
+        min_value=1, max_value=LLM_USAGE_MAX_DAYS, default=30
+    )
+
+
+class LLMUsageDaySerializer(serializers.Serializer):
+    day = serializers.DateField()
+    calls = serializers.IntegerField()
+    prompt_tokens = serializers.IntegerField()
+    completion_tokens = serializers.IntegerField()
+    total_tokens = serializers.IntegerField()
+    cost_usd = serializers.DecimalField(max_digits=12, decimal_places=6)
@@ -6,6 +6,8 @@ from urllib.parse import quote
 
 import pdfplumber
 
+from config.metrics import external_call
+
 
 def download_pdf_bytes_from_supabase(file_path: str) -> bytes:
     supabase_url = os.getenv("SUPABASE_URL", "").rstrip("/")
@@ -28,7 +30,10 @@ def download_pdf_bytes_from_supabase(file_path: str) -> bytes:
     )
 
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
+        with (
+            external_call("storage", "download"),
+            urllib.request.urlopen(req, timeout=30) as resp,
+        ):
             return resp.read()
     except urllib.error.HTTPError as e:
         body = e.read().decode("utf-8", errors="ignore")
@@ -1,18 +1,34 @@
+import logging
 import re
+from datetime import timedelta
 
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
+from analysis.channels import (
+    publish_job_event,
+    publish_job_finished,
+    publish_job_progress,
+)
+from analysis.events import StageTimer, archive_events_before, job_event
 from analysis.helpers.ai_analysis import (
     analyze_document_with_openai,
     generate_suggestions_en,
 )
-from analysis.models import AnalysisJob
+from analysis.llm_budget import TokenBudget, TokenBudgetExceededError
+from analysis.models import AnalysisEvent, AnalysisJob
 from analysis.services import (
     download_pdf_bytes_from_supabase,
     extract_full_text_pages,
 )
-from documents.models import DocumentChunk
+from documents.models import DocumentAnalysis, DocumentChunk
+from documents.response_cache import bump_user_version
+from documents.stats import document_status_changed
+from documents.storage import verify_blob
+
+logger = logging.getLogger(__name__)
 
 
 def sanitize_text(s: str) -> str:
@@ -33,60 +49,141 @@ def deep_sanitize(obj):
     return obj
 
 
+def save_job_state(
+    job,
+    doc,
+    job_fields,
+    doc_fields=(),
+    previous_status=None,
+    events=(),
+    analysis=None,
+):
+    """
+    Save the job and mirror it onto the document snapshot atomically.
+
+    Pass ``previous_status`` when ``doc.status`` changed, so the owner's
+    overview counters follow, the transition's ``events`` to append them to
+    the event log, and ``analysis`` (field values) to make it the document's
+    current analysis, all in the same transaction. Returns the
+    ``DocumentAnalysis`` when one was written.
+    """
+    doc.set_latest_job(job)
+    with transaction.atomic():
+        job.save(update_fields=job_fields)
+        doc.save(update_fields=[*doc_fields, *doc.LATEST_JOB_FIELDS, "updated_at"])
+        if analysis is not None:
+            analysis = DocumentAnalysis.objects.replace(doc, job.id, **analysis)
+        if previous_status is not None:
+            document_status_changed(doc, previous_status)
+        if events:
+            AnalysisEvent.objects.bulk_create(events)
+        bump_user_version(doc.owner_id)
+    return analysis
+
+
+# Live progress goes to the cache on every chunk; the job row is only updated
+# when progress crosses one of these steps.
+PROGRESS_MILESTONE_STEP = 25
+
+
+def report_progress(job, doc, progress: int):
+    publish_job_progress(job.id, progress)
+    if progress // PROGRESS_MILESTONE_STEP > job.progress // PROGRESS_MILESTONE_STEP:
+        job.progress = progress
+        save_job_state(job, doc, ["progress"])
+
+
+def store_chunks(job, doc, pages) -> int:
+    """
+    Replace the chunks of ``doc`` with ``pages`` two at a time, reporting
+    progress up to 95%. Returns the number of chunks stored.
+    """
+    DocumentChunk.objects.filter(document=doc).delete()
+
+    chunk_index = 0
+    total = len(pages)
+
+    for i in range(0, total, 2):
+        page_start = i + 1
+        page_end = min(i + 2, total)
+
+        text = "\n\n".join([t for t in pages[i:page_end] if t]).strip()
+        text = sanitize_text(text)
+        if text:
+            DocumentChunk.objects.create(
+                document=doc,
+                chunk_index=chunk_index,
+                page_start=page_start,
+                page_end=page_end,
+                text=text,
+            )
+            chunk_index += 1
+
+        report_progress(job, doc, min(95, int((page_end / max(1, total)) * 95)))
+
+    return chunk_index
+
+
 @shared_task(bind=True)
 def run_full_analysis(self, job_id: int):
     enable_suggestions = True
-    job = AnalysisJob.objects.select_related("document").get(id=job_id)
+    job = AnalysisJob.objects.select_related("document__owner").get(id=job_id)
     doc = job.document
+    timer = StageTimer()
+    budget = TokenBudget(doc.owner)
 
     try:
         job.status = "PROCESSING"
         job.started_at = timezone.now()
         job.progress = 0
         job.error = ""
-        job.save(update_fields=["status", "started_at", "progress", "error"])
+        queued_ms = int((job.started_at - job.created_at).total_seconds() * 1000)
+        timer.record(queue_ms=max(0, queued_ms))
+        save_job_state(
+            job,
+            doc,
+            ["status", "started_at", "progress", "error"],
+            events=[job_event(job, doc, "started", duration_ms=max(0, queued_ms))],
+        )
+        publish_job_event(job.id, "status", {"status": job.status, "progress": 0})
 
         pdf_bytes = download_pdf_bytes_from_supabase(doc.file_path)
+        verify_blob(doc.file_path, doc.checksum, pdf_bytes)
+        timer.lap("download")
+        timer.record(download_bytes=len(pdf_bytes))
         page_count, pages = extract_full_text_pages(pdf_bytes, max_pages=50)
+        extract_ms = timer.lap("extract")
+        timer.record(
+            pages=len(pages),
+            extract_ms_per_page=round(extract_ms / max(1, len(pages)), 1),
+        )
 
-        DocumentChunk.objects.filter(document=doc).delete()
-
-        chunk_index = 0
-        total = len(pages)
-
-        for i in range(0, total, 2):
-            page_start = i + 1
-            page_end = min(i + 2, total)
-
-            text = "\n\n".join([t for t in pages[i:page_end] if t]).strip()
-            text = sanitize_text(text)
-            if text:
-                DocumentChunk.objects.create(
-                    document=doc,
-                    chunk_index=chunk_index,
-                    page_start=page_start,
-                    page_end=page_end,
-                    text=text,
-                )
-                chunk_index += 1
-
-            job.progress = min(95, int((page_end / max(1, total)) * 95))
-            job.save(update_fields=["progress"])
-
-        job.progress = 99
-        job.save(update_fields=["progress"])
+        chunk_count = store_chunks(job, doc, pages)
+        timer.lap("chunk")
+        timer.record(chunks=chunk_count)
+        publish_job_progress(job.id, 99)
 
         full_text = "\n\n".join([t for t in pages if t]).strip()
         full_text = sanitize_text(full_text)
 
-        raw, analysis = analyze_document_with_openai(full_text)
+        raw, analysis = analyze_document_with_openai(
+            full_text, calls=timer.llm_calls, budget=budget
+        )
         raw = sanitize_text(raw)
         analysis = deep_sanitize(analysis)
+        timer.lap("analyze")
 
         analysis.pop("suggestions", None)
 
         if enable_suggestions:
-            raw_retry, analysis_retry = generate_suggestions_en(full_text)
+            try:
+                raw_retry, analysis_retry = generate_suggestions_en(
+                    full_text, calls=timer.llm_calls, budget=budget
+                )
+            except TokenBudgetExceededError as e:
+                # The analysis is already paid for; keep it without suggestions.
+                logger.info("suggestions skipped for job %s: %s", job.id, e)
+                analysis_retry = {}
             analysis_retry = deep_sanitize(analysis_retry) or {}
             retry_sugs = analysis_retry.get("suggestions", [])
             if isinstance(retry_sugs, list) and len(retry_sugs) > 0:
@@ -95,35 +192,73 @@ def run_full_analysis(self, job_id: int):
                 analysis["suggestions"] = []
         else:
             analysis["suggestions"] = []
+        timer.lap("suggestions")
 
-        doc.ai_raw = raw
-        doc.analysis_json = analysis
-        doc.analysis_text = analysis.get("summary", "")
         # ---- AI ANALYSIS (BİTTİ) ----
 
         doc.page_count = page_count
+        previous_status = doc.status
         doc.status = "READY"
-        doc.save(
-            update_fields=[
-                "page_count",
-                "status",
-                "ai_raw",
-                "analysis_json",
-                "analysis_text",
-            ]
-        )
+        doc.chunk_count = chunk_count
 
+        events = timer.events(job, doc)
         job.status = "READY"
         job.progress = 100
         job.finished_at = timezone.now()
-        job.save(update_fields=["status", "progress", "finished_at"])
+        job.stats = timer.stats()
+        current = save_job_state(
+            job,
+            doc,
+            ["status", "progress", "finished_at", "stats"],
+            ["page_count", "status", "chunk_count"],
+            previous_status=previous_status,
+            events=[
+                *events,
+                job_event(job, doc, "finished", duration_ms=timer.total_ms()),
+            ],
+            analysis={
+                "ai_raw": raw,
+                "analysis_json": analysis,
+                "analysis_text": analysis.get("summary", ""),
+            },
+        )
+        publish_job_finished(job, current)
 
     except Exception as e:
+        previous_status = doc.status
         doc.status = "FAILED"
-        doc.save(update_fields=["status"])
+        doc.chunk_count = DocumentChunk.objects.filter(document=doc).count()
 
+        events = timer.events(job, doc)
         job.status = "FAILED"
         job.progress = 100
         job.finished_at = timezone.now()
         job.error = str(e)
-        job.save(update_fields=["status", "progress", "finished_at", "error"])
+        job.stats = timer.stats()
+        save_job_state(
+            job,
+            doc,
+            ["status", "progress", "finished_at", "error", "stats"],
+            ["status", "chunk_count"],
+            previous_status=previous_status,
+            events=[
+                *events,
+                job_event(
+                    job,
+                    doc,
+                    "failed",
+                    duration_ms=timer.total_ms(),
+                    detail=f"{job.job_type} job FAILED: {e}",
+                ),
+            ],
+        )
+        publish_job_finished(job)
+
+
+@shared_task
+def archive_analysis_events():
+    cutoff = timezone.now() - timedelta(days=settings.ANALYSIS_EVENT_RETENTION_DAYS)
+    archived = archive_events_before(cutoff)
+    if archived:
+        logger.info("Archived %s analysis events older than %s", archived, cutoff)
+    return {"archived": archived}
@@ -1,13 +1,41 @@
-from unittest.mock import patch
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 import pytest
+import tiktoken
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from analysis.models import AnalysisJob
-from documents.models import Document
+from analysis.channels import (
+    get_job_progress,
+    publish_job_event,
+    publish_job_progress,
+)
+from analysis.events import archive_events_before, job_event
+from analysis.helpers import tokens
+from analysis.helpers.ai_analysis import complete_json, record_call
+from analysis.llm_budget import TokenBudget, TokenBudgetExceededError
+from analysis.models import (
+    AnalysisEvent,
+    AnalysisEventArchive,
+    AnalysisJob,
+    LLMUsage,
+)
+from analysis.tasks import run_full_analysis
+from documents.models import Document, DocumentAnalysis, DocumentStats
 
 User = get_user_model()
 
@@ -37,7 +65,7 @@ class TestDocumentFullAnalysis:
 
         url = reverse("analysis-full", kwargs={"id": doc.id})
 
-        with patch("analysis.views.run_full_analysis.delay") as mock_task:
+        with patch("analysis.jobs.run_full_analysis.delay") as mock_task:
             response = api_client.post(url)
 
             assert response.status_code == status.HTTP_201_CREATED
@@ -46,6 +74,10 @@ class TestDocumentFullAnalysis:
             assert job is not None
             assert job.status == "PENDING"
 
+            doc.refresh_from_db()
+            assert doc.latest_job_id == job.id
+            assert doc.latest_job_status == "PENDING"
+
             mock_task.assert_called_once_with(job.id)
 
     def test_create_full_analysis_conflict(self, api_client, test_user):
@@ -67,3 +99,988 @@ class TestDocumentFullAnalysis:
         response = api_client.post(url)
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def _read_stream(response):
+    return b"".join(response).decode()
+
+
+@pytest.mark.django_db
+class TestDocumentFullAnalysisStream:
+    def _auth(self, user):
+        token = RefreshToken.for_user(user).access_token
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_stream_unauthenticated(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        url = reverse("analysis-full-stream", kwargs={"id": doc.id})
+
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_stream_isolation(self, api_client, test_user):
+        other = User.objects.create_user(username="other", password="pass12345")
+        doc = Document.objects.create(owner=other, title="Secret", file_size=1024)
+        AnalysisJob.objects.create(document=doc, job_type="FULL", status="PENDING")
+        url = reverse("analysis-full-stream", kwargs={"id": doc.id})
+
+        response = api_client.get(url, **self._auth(test_user))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_stream_finished_job_sends_snapshot_and_result(self, api_client, test_user):
+        doc = Document.objects.create(
+            owner=test_user, title="Done", file_size=1024, status="READY"
+        )
+        DocumentAnalysis.objects.create(
+            document=doc, analysis_text="Özet", analysis_json={"summary": "Özet"}
+        )
+        AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="READY", progress=100
+        )
+        url = reverse("analysis-full-stream", kwargs={"id": doc.id})
+
+        response = api_client.get(url, **self._auth(test_user))
+        body = _read_stream(response)
+
+        assert response["Content-Type"] == "text/event-stream"
+        assert "event: status" in body
+        assert "event: result" in body
+        assert '"summary": "\\u00d6zet"' in body
+
+    def test_stream_replays_published_events(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Run", file_size=1024)
+        job = AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="PROCESSING", progress=10
+        )
+        publish_job_event(job.id, "progress", {"progress": 40})
+        publish_job_event(job.id, "status", {"status": "FAILED", "progress": 100})
+        publish_job_event(job.id, "result", {"status": "FAILED", "error": "boom"})
+        url = reverse("analysis-full-stream", kwargs={"id": doc.id})
+
+        response = api_client.get(url, HTTP_LAST_EVENT_ID="1", **self._auth(test_user))
+        body = _read_stream(response)
+
+        assert "id: 1\n" not in body
+        assert body.index("id: 2\nevent: status") < body.index("id: 3\nevent: result")
+        assert '"error": "boom"' in body
+
+    def test_stream_skips_expired_events(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Gap", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        publish_job_event(job.id, "progress", {"progress": 10})
+        publish_job_event(job.id, "progress", {"progress": 20})
+        publish_job_event(job.id, "result", {"status": "READY", "error": ""})
+        cache.delete(f"analysis:job:{job.id}:event:2")
+        url = reverse("analysis-full-stream", kwargs={"id": doc.id})
+
+        response = api_client.get(url, **self._auth(test_user))
+        body = _read_stream(response)
+
+        assert "id: 1\n" in body
+        assert "id: 2\n" not in body
+        assert "id: 3\nevent: result" in body
+
+
+@pytest.mark.django_db
+class TestFullAnalysisProgress:
+    def test_get_reads_live_progress_from_cache(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(owner=test_user, title="Live", file_size=1024)
+        job = AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="PROCESSING", progress=25
+        )
+        publish_job_progress(job.id, 42)
+
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+        response = api_client.get(url)
+
+        assert response.data["job"]["progress"] == 42
+        job.refresh_from_db()
+        assert job.progress == 25
+
+    def test_get_falls_back_to_persisted_progress(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(owner=test_user, title="Cold", file_size=1024)
+        AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="PROCESSING", progress=50
+        )
+
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+        response = api_client.get(url)
+
+        assert response.data["job"]["progress"] == 50
+
+    @patch("analysis.tasks.generate_suggestions_en")
+    @patch("analysis.tasks.analyze_document_with_openai")
+    @patch("analysis.tasks.extract_full_text_pages")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_task_persists_only_milestones(
+        self, mock_download, mock_extract, mock_analyze, mock_suggest, test_user
+    ):
+        doc = Document.objects.create(owner=test_user, title="Big", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        mock_download.return_value = b"%PDF"
+        mock_extract.return_value = (40, [f"page {i}" for i in range(40)])
+        mock_analyze.return_value = ("{}", {"summary": "ok"})
+        mock_suggest.return_value = ("{}", {"suggestions": ["s"]})
+
+        with CaptureQueriesContext(connection) as ctx:
+            run_full_analysis(job.id)
+
+        job_updates = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "analysis_analysisjob"')
+        ]
+        # start + 3 milestones (25/50/75) + terminal, instead of one per chunk
+        assert len(job_updates) == 5
+
+        job.refresh_from_db()
+        assert job.status == "READY"
+        assert job.progress == 100
+        assert get_job_progress(job.id) == 100
+
+        doc.refresh_from_db()
+        assert doc.chunk_count == 20
+        assert doc.latest_job_id == job.id
+        assert doc.latest_job_status == "READY"
+
+    @patch("analysis.tasks.generate_suggestions_en")
+    @patch("analysis.tasks.analyze_document_with_openai")
+    @patch("analysis.tasks.extract_full_text_pages")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_status_changes_update_overview_stats(
+        self,
+        mock_download,
+        mock_extract,
+        mock_analyze,
+        mock_suggest,
+        api_client,
+        test_user,
+    ):
+        """Analiz durum geçişleri overview sayaçlarına yansımalı."""
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        mock_download.return_value = b"%PDF"
+        mock_extract.return_value = (1, ["page"])
+        mock_analyze.return_value = ("{}", {"summary": "ok"})
+        mock_suggest.return_value = ("{}", {"suggestions": []})
+
+        with patch("analysis.jobs.run_full_analysis.delay"):
+            api_client.post(reverse("analysis-full", kwargs={"id": doc.id}))
+        stats = DocumentStats.objects.get(owner=test_user)
+        assert (stats.total_documents, stats.processing, stats.ready) == (1, 1, 0)
+
+        run_full_analysis(doc.jobs.get().id)
+
+        stats.refresh_from_db()
+        assert (stats.total_documents, stats.processing, stats.ready) == (1, 0, 1)
+
+    @patch("documents.storage.get_bucket")
+    @patch("analysis.tasks.analyze_document_with_openai")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_blob_checksum_mismatch_fails_job(
+        self, mock_download, mock_analyze, mock_bucket, test_user
+    ):
+        """İndirilen blob checksum'ı tutmazsa iş FAILED olmalı, blob silinmeli."""
+        checksum = "a" * 64
+        path = f"blobs/{test_user.pk}/aa/{checksum}.pdf"
+        doc = Document.objects.create(
+            owner=test_user,
+            title="Blob",
+            file_path=path,
+            file_size=1024,
+            checksum=checksum,
+        )
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        mock_download.return_value = b"%PDF not the checksummed bytes"
+        bucket_api = MagicMock()
+        mock_bucket.return_value = ("documents", bucket_api)
+
+        run_full_analysis(job.id)
+
+        job.refresh_from_db()
+        assert job.status == "FAILED"
+        assert "checksum" in job.error
+        bucket_api.remove.assert_called_once_with([path])
+        mock_analyze.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestFullAnalysisConditionalGet:
+    def test_not_modified_with_matching_etag(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(
+            owner=test_user, title="Done", file_size=1024, status="READY"
+        )
+        DocumentAnalysis.objects.create(document=doc, analysis_json={"summary": "ok"})
+        AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="READY", progress=100
+        )
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+
+        first = api_client.get(url)
+        etag = first["ETag"]
+        second = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert first.status_code == status.HTTP_200_OK
+        assert "max-age=" in first["Cache-Control"]
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second.content == b""
+
+    def test_etag_changes_with_live_progress(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(owner=test_user, title="Run", file_size=1024)
+        job = AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="PROCESSING"
+        )
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+
+        etag = api_client.get(url)["ETag"]
+        publish_job_progress(job.id, 30)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+        assert "no-cache" in response["Cache-Control"]
+        assert "Last-Modified" not in response
+
+
+#### DOCUMENT ANALYSIS TABLE TESTS ####
+@pytest.mark.django_db
+class TestDocumentAnalysisVersions:
+    def _run(self, doc, summary):
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        with (
+            patch(
+                "analysis.tasks.download_pdf_bytes_from_supabase",
+                return_value=b"%PDF",
+            ),
+            patch(
+                "analysis.tasks.extract_full_text_pages",
+                return_value=(1, ["page"]),
+            ),
+            patch(
+                "analysis.tasks.analyze_document_with_openai",
+                return_value=("{}", {"summary": summary}),
+            ),
+            patch(
+                "analysis.tasks.generate_suggestions_en",
+                return_value=("{}", {"suggestions": []}),
+            ),
+            CaptureQueriesContext(connection) as ctx,
+        ):
+            run_full_analysis(job.id)
+        return job, ctx.captured_queries
+
+    def test_rerun_keeps_previous_version(self, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+
+        first, _ = self._run(doc, "ilk")
+        second, _ = self._run(doc, "ikinci")
+
+        analysis = DocumentAnalysis.objects.get(document=doc)
+        assert analysis.analysis_text == "ikinci"
+        assert (analysis.version, analysis.job_id) == (2, second.id)
+        previous = doc.analysis_versions.get()
+        assert previous.analysis_text == "ilk"
+        assert (previous.version, previous.job_id) == (1, first.id)
+
+    def test_status_updates_leave_analysis_row_alone(self, test_user):
+        """Durum/ilerleme güncellemeleri yalnızca dar document satırına yazmalı."""
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+
+        _, queries = self._run(doc, "özet")
+
+        writes = [
+            q["sql"]
+            for q in queries
+            if "documents_documentanalysis" in q["sql"]
+            and not q["sql"].startswith("SELECT")
+        ]
+        # Yalnızca bitişte tek bir INSERT
+        assert len(writes) == 1
+        assert writes[0].startswith('INSERT INTO "documents_documentanalysis"')
+        assert not any(
+            q["sql"].startswith('UPDATE "documents_document"')
+            and "analysis_json" in q["sql"]
+            for q in queries
+        )
+
+    def test_result_event_reads_analysis_table(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        job, _ = self._run(doc, "özet")
+        cache.clear()
+        token = RefreshToken.for_user(test_user).access_token
+        url = reverse("analysis-full-stream", kwargs={"id": doc.id})
+
+        response = api_client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+        body = _read_stream(response)
+
+        assert '"analysis_text": "\\u00f6zet"' in body
+
+
+#### SPARSE FIELDSET TESTS ####
+@pytest.mark.django_db
+class TestFullAnalysisFields:
+    def _doc(self, user):
+        doc = Document.objects.create(
+            owner=user, title="Done", file_size=1024, status="READY"
+        )
+        DocumentAnalysis.objects.create(
+            document=doc,
+            preview_text="önizleme",
+            analysis_text="Özet",
+            analysis_json={"summary": "Özet"},
+            ai_raw='{"summary": "Özet"}',
+        )
+        AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="READY", progress=100
+        )
+        return reverse("analysis-full", kwargs={"id": doc.id})
+
+    def test_default_returns_all_analysis_fields(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        url = self._doc(test_user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url)
+
+        assert set(response.data["analysis"]) == {
+            "analysis_text",
+            "analysis_json",
+            "ai_raw",
+        }
+        assert not any("preview_text" in q["sql"] for q in ctx.captured_queries)
+
+    def test_exclude_skips_ai_raw_column(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        url = self._doc(test_user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(f"{url}?exclude=ai_raw")
+
+        assert response.data["analysis"] == {
+            "analysis_text": "Özet",
+            "analysis_json": {"summary": "Özet"},
+        }
+        assert response.data["document"]["title"] == "Done"
+        assert not any("ai_raw" in q["sql"] for q in ctx.captured_queries)
+
+    def test_empty_fields_reads_no_blobs(self, api_client, test_user):
+        """Sadece durum isteyen istemci analiz kolonlarını hiç okutmamalı."""
+        api_client.force_authenticate(user=test_user)
+        url = self._doc(test_user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(f"{url}?fields=")
+
+        assert response.data["analysis"] == {}
+        assert response.data["job"]["status"] == "READY"
+        assert not any("analysis_json" in q["sql"] for q in ctx.captured_queries)
+
+    def test_etag_differs_per_selection(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        url = self._doc(test_user)
+
+        etag = api_client.get(url)["ETag"]
+        response = api_client.get(
+            f"{url}?fields=analysis_json", HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data["analysis"]) == ["analysis_json"]
+
+
+#### ASYNC (ASGI) VIEW TESTS ####
+@pytest.mark.django_db
+class TestAsyncFullAnalysis:
+    @pytest.fixture(autouse=True)
+    def asgi_urls(self, settings):
+        settings.ROOT_URLCONF = "config.urls_asgi"
+
+    def _auth(self, user):
+        token = RefreshToken.for_user(user).access_token
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_get_returns_analysis_and_live_progress(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Run", file_size=1024)
+        DocumentAnalysis.objects.create(document=doc, analysis_text="Özet")
+        job = AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="PROCESSING", progress=10
+        )
+        publish_job_progress(job.id, 55)
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+
+        response = api_client.get(url, **self._auth(test_user))
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["analysis"]["analysis_text"] == "Özet"
+        assert data["job"]["id"] == job.id
+        assert data["job"]["progress"] == 55
+        assert "no-cache" in response["Cache-Control"]
+
+    def test_get_not_modified_when_finished(self, api_client, test_user):
+        doc = Document.objects.create(
+            owner=test_user, title="Done", file_size=1024, status="READY"
+        )
+        AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="READY", progress=100
+        )
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+
+        etag = api_client.get(url, **self._auth(test_user))["ETag"]
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag, **self._auth(test_user))
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_get_isolation(self, api_client, test_user):
+        other = User.objects.create_user(username="other", password="pass12345")
+        doc = Document.objects.create(owner=other, title="Secret", file_size=1024)
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+
+        response = api_client.get(url, **self._auth(test_user))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["message"] == "Doküman bulunamadı."
+
+    def test_post_queues_job_once(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+
+        with patch("analysis.jobs.run_full_analysis.delay") as mock_task:
+            first = api_client.post(url, **self._auth(test_user))
+            second = api_client.post(url, **self._auth(test_user))
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_409_CONFLICT
+        job = AnalysisJob.objects.get(document=doc)
+        assert first.json()["job"]["id"] == job.id
+        mock_task.assert_called_once_with(job.id)
+
+    def test_unauthenticated(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+
+        response = api_client.get(reverse("analysis-full", kwargs={"id": doc.id}))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+#### ANALYSIS EVENT TESTS ####
+@pytest.mark.django_db
+class TestAnalysisEvents:
+    @patch("analysis.tasks.generate_suggestions_en")
+    @patch("analysis.tasks.analyze_document_with_openai")
+    @patch("analysis.tasks.extract_full_text_pages")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_transitions_append_events(
+        self,
+        mock_download,
+        mock_extract,
+        mock_analyze,
+        mock_suggest,
+        api_client,
+        test_user,
+    ):
+        """Her durum geçişi aşama süreleriyle birlikte olay tablosuna yazılmalı."""
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        mock_download.return_value = b"%PDF"
+        mock_extract.return_value = (1, ["page"])
+        mock_analyze.return_value = ("{}", {"summary": "ok"})
+        mock_suggest.return_value = ("{}", {"suggestions": []})
+
+        with patch("analysis.jobs.run_full_analysis.delay"):
+            api_client.post(reverse("analysis-full", kwargs={"id": doc.id}))
+        job = doc.jobs.get()
+        run_full_analysis(job.id)
+
+        events = list(job.events.order_by("id"))
+        assert [e.stage for e in events] == [
+            "queued",
+            "started",
+            "download",
+            "extract",
+            "chunk",
+            "analyze",
+            "suggestions",
+            "finished",
+        ]
+        assert events[0].event == "PENDING"
+        assert events[-1].event == "READY"
+        assert all(e.owner_id == test_user.id for e in events)
+        assert all(e.duration_ms is not None for e in events[1:])
+
+    @patch("analysis.tasks.extract_full_text_pages")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_failure_records_completed_stages(
+        self, mock_download, mock_extract, test_user
+    ):
+        """Hata durumunda tamamlanan aşamalar ve hata detayı yazılmalı."""
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        mock_download.return_value = b"%PDF"
+        mock_extract.side_effect = ValueError("bozuk pdf")
+
+        run_full_analysis(job.id)
+
+        events = list(job.events.order_by("id"))
+        assert [e.stage for e in events] == ["started", "download", "failed"]
+        assert events[-1].event == "FAILED"
+        assert "bozuk pdf" in events[-1].detail
+
+    def test_archive_moves_old_events_in_batches(self, test_user):
+        """Eski olaylar arşiv tablosuna taşınmalı, yeniler kalmalı."""
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        old = timezone.now() - timedelta(days=120)
+        events = [job_event(job, doc, "queued") for _ in range(5)]
+        for event in events[:3]:
+            event.ts = old
+        AnalysisEvent.objects.bulk_create(events)
+
+        archived = archive_events_before(timezone.now() - timedelta(days=90), 2)
+
+        assert archived == 3
+        assert AnalysisEvent.objects.count() == 2
+        archive = AnalysisEventArchive.objects.order_by("id")
+        assert [a.ts for a in archive] == [old] * 3
+        assert archive[0].owner_id == test_user.id
+
+    def test_archive_command(self, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        event = job_event(job, doc, "queued")
+        event.ts = timezone.now() - timedelta(days=10)
+        AnalysisEvent.objects.bulk_create([event])
+        out = StringIO()
+
+        call_command("archive_analysis_events", "--older-than-days", "7", stdout=out)
+
+        assert "1 events archived" in out.getvalue()
+        assert not AnalysisEvent.objects.exists()
+
+
+#### BULK ANALYSIS TESTS ####
+@pytest.mark.django_db
+class TestBulkFullAnalysis:
+    url = reverse("analysis-full-bulk")
+
+    def test_bulk_enqueue_returns_per_document_results(self, api_client, test_user):
+        """Toplu istek her doküman için ayrı sonuç döndürmeli."""
+        api_client.force_authenticate(user=test_user)
+        ready = Document.objects.create(
+            owner=test_user, title="A", file_size=1024, status="READY"
+        )
+        busy = Document.objects.create(owner=test_user, title="B", file_size=1024)
+        AnalysisJob.objects.create(document=busy, job_type="FULL", status="PENDING")
+        other = User.objects.create_user(username="other", password="123")
+        foreign = Document.objects.create(owner=other, title="C", file_size=1024)
+
+        with (
+            patch("analysis.jobs.group") as mock_group,
+            patch("analysis.jobs.run_full_analysis.delay") as mock_delay,
+        ):
+            response = api_client.post(
+                self.url,
+                {"document_ids": [ready.id, busy.id, foreign.id, ready.id]},
+                format="json",
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["queued"] == 1
+        results = {r["document_id"]: r for r in response.data["results"]}
+        assert [r["document_id"] for r in response.data["results"]] == [
+            ready.id,
+            busy.id,
+            foreign.id,
+        ]
+        assert results[ready.id]["status"] == 201
+        assert results[busy.id]["status"] == 409
+        assert results[foreign.id]["status"] == 404
+
+        job = ready.jobs.get()
+        assert results[ready.id]["job"]["id"] == job.id
+        ready.refresh_from_db()
+        assert ready.status == "PROCESSING"
+        assert ready.latest_job_id == job.id
+        assert job.events.get().stage == "queued"
+        mock_group.assert_not_called()
+        mock_delay.assert_called_once_with(job.id)
+
+    def test_bulk_enqueue_constant_queries(self, api_client, test_user):
+        """Sorgu sayısı doküman sayısından bağımsız olmalı, mesajlar grup olmalı."""
+        api_client.force_authenticate(user=test_user)
+        docs = [
+            Document.objects.create(
+                owner=test_user, title=f"D{i}", file_size=1024, status="READY"
+            )
+            for i in range(30)
+        ]
+        ids = [doc.id for doc in docs]
+
+        # Sayaç satırı hazır olsun, ilk istek onu yeniden kurmasın
+        DocumentStats.objects.create(owner=test_user, total_documents=30, ready=30)
+
+        with patch("analysis.jobs.group") as mock_group:
+            with CaptureQueriesContext(connection) as small:
+                api_client.post(self.url, {"document_ids": ids[:3]}, format="json")
+            with CaptureQueriesContext(connection) as large:
+                api_client.post(self.url, {"document_ids": ids[3:]}, format="json")
+
+        assert len(large.captured_queries) == len(small.captured_queries)
+        assert mock_group.return_value.apply_async.call_count == 2
+        assert AnalysisJob.objects.filter(document__owner=test_user).count() == 30
+        stats = DocumentStats.objects.get(owner=test_user)
+        assert (stats.processing, stats.ready) == (30, 0)
+
+    def test_bulk_enqueue_validation(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+
+        empty = api_client.post(self.url, {"document_ids": []}, format="json")
+        too_many = api_client.post(
+            self.url, {"document_ids": list(range(1, 502))}, format="json"
+        )
+
+        assert empty.status_code == status.HTTP_400_BAD_REQUEST
+        assert too_many.status_code == status.HTTP_400_BAD_REQUEST
+
+
+#### JOB STAGE STATS TESTS ####
+def _llm_call(name, latency_ms, tokens):
+    def call(full_text, calls=None, budget=None):
+        calls.append(
+            {
+                "name": name,
+                "model": "gpt-4o-mini",
+                "latency_ms": latency_ms,
+                "prompt_tokens": tokens,
+                "completion_tokens": tokens // 10,
+            }
+        )
+        return "{}", {"summary": "ok", "suggestions": ["s"]}
+
+    return call
+
+
+@pytest.mark.django_db
+class TestJobStageStats:
+    url = reverse("analysis-stage-stats")
+
+    @patch("analysis.tasks.generate_suggestions_en")
+    @patch("analysis.tasks.analyze_document_with_openai")
+    @patch("analysis.tasks.extract_full_text_pages")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_task_records_stage_stats(
+        self, mock_download, mock_extract, mock_analyze, mock_suggest, test_user
+    ):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        mock_download.return_value = b"%PDF-1.7 data"
+        mock_extract.return_value = (4, ["a", "b", "c", "d"])
+        mock_analyze.side_effect = _llm_call("analysis", 1200, 5000)
+        mock_suggest.side_effect = _llm_call("suggestions", 800, 3000)
+
+        run_full_analysis(job.id)
+
+        job.refresh_from_db()
+        stats = job.stats
+        assert {
+            "queue_ms",
+            "download_ms",
+            "extract_ms",
+            "chunk_ms",
+            "analyze_ms",
+            "suggestions_ms",
+            "total_ms",
+            "extract_ms_per_page",
+        } <= stats.keys()
+        assert stats["download_bytes"] == 13
+        assert (stats["pages"], stats["chunks"]) == (4, 2)
+        assert [c["name"] for c in stats["llm_calls"]] == ["analysis", "suggestions"]
+        assert stats["llm_calls"][0]["prompt_tokens"] == 5000
+
+    @patch("analysis.tasks.extract_full_text_pages")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_failed_job_keeps_completed_stages(
+        self, mock_download, mock_extract, test_user
+    ):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        mock_download.return_value = b"%PDF"
+        mock_extract.side_effect = ValueError("bozuk pdf")
+
+        run_full_analysis(job.id)
+
+        job.refresh_from_db()
+        assert job.status == "FAILED"
+        assert job.stats["download_bytes"] == 4
+        assert "download_ms" in job.stats
+        assert "extract_ms" not in job.stats
+        assert job.stats["llm_calls"] == []
+
+    def test_record_call_reads_usage(self):
+        calls = []
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+
+        record_call(calls, "analysis", "m", 0, SimpleNamespace(usage=usage))
+        record_call(None, "analysis", "m", 0, SimpleNamespace(usage=usage))
+
+        assert len(calls) == 1
+        assert (calls[0]["prompt_tokens"], calls[0]["completion_tokens"]) == (120, 30)
+
+    def _job(self, doc, stats, finished_at=None, status="READY"):
+        return AnalysisJob.objects.create(
+            document=doc,
+            job_type="FULL",
+            status=status,
+            finished_at=finished_at or timezone.now(),
+            stats=stats,
+        )
+
+    def test_report_percentiles(self, api_client, test_user):
+        """Rapor, aralıktaki işlerin aşama yüzdeliklerini döndürmeli."""
+        test_user.is_staff = True
+        test_user.save()
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        for ms in range(1, 101):
+            self._job(
+                doc,
+                {
+                    "download_ms": ms,
+                    "llm_calls": [
+                        {"name": "analysis", "latency_ms": ms * 10, "prompt_tokens": 10}
+                    ],
+                },
+            )
+        self._job(doc, {"download_ms": 99999}, timezone.now() - timedelta(days=3))
+        self._job(doc, {})
+
+        results = api_client.get(self.url).data["results"]
+
+        assert results["jobs"] == 100
+        assert results["truncated"] is False
+        download = results["stages"]["download_ms"]
+        assert (download["p50"], download["p95"], download["max"]) == (51, 95, 100)
+        analysis = results["llm"]["analysis"]
+        assert analysis["latency_ms"]["p99"] == 990
+        assert analysis["total_tokens"] == 1000
+
+    def test_report_range_and_access(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        self._job(doc, {"download_ms": 5}, timezone.now() - timedelta(days=3))
+        self._job(doc, {"download_ms": 7}, status="FAILED")
+        api_client.force_authenticate(user=test_user)
+
+        forbidden = api_client.get(self.url)
+        test_user.is_staff = True
+        test_user.save()
+        since = (timezone.now() - timedelta(days=4)).isoformat()
+        ranged = api_client.get(self.url, {"since": since, "status": "READY"})
+        tomorrow = (timezone.now() + timedelta(days=1)).isoformat()
+        invalid = api_client.get(self.url, {"since": tomorrow})
+
+        assert forbidden.status_code == status.HTTP_403_FORBIDDEN
+        assert ranged.data["results"]["stages"]["download_ms"]["max"] == 5
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+
+#### TOKEN BUDGET TESTS ####
+def _byte_encoding():
+    """Her baytın bir token olduğu gerçek bir tiktoken kodlaması."""
+    return tiktoken.Encoding(
+        "bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+
+
+def _fake_client(prompt_tokens=900, completion_tokens=100):
+    usage = SimpleNamespace(
+        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+    )
+    resp = SimpleNamespace(
+        usage=usage,
+        choices=[SimpleNamespace(message=SimpleNamespace(content="{}"))],
+    )
+    create = MagicMock(return_value=resp)
+    return SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+
+@pytest.mark.django_db
+class TestTokenBudget:
+    @pytest.fixture(autouse=True)
+    def byte_tokens(self, monkeypatch):
+        monkeypatch.setattr(tokens, "encoding_for", lambda model: _byte_encoding())
+
+    def test_fit_keeps_short_text(self):
+        assert tokens.fit_to_tokens("Kısa metin.", "gpt-4o-mini", 100) == (
+            "Kısa metin.",
+            len("Kısa metin.".encode()),
+        )
+
+    def test_fit_cuts_at_sentence_end(self):
+        text = "Birinci cümle burada bitiyor. " * 20
+
+        trimmed, count = tokens.fit_to_tokens(text, "gpt-4o-mini", 200)
+
+        assert count == len(trimmed.encode()) <= 200
+        assert trimmed.endswith("bitiyor.")
+        assert count > 160
+
+    def test_fit_counts_multibyte_text_exactly(self):
+        text = "ağaç şirket ölçüm 合同 付款 " * 50
+
+        trimmed, count = tokens.fit_to_tokens(text, "gpt-4o-mini", 101)
+
+        # Karakter sayısı değil, token sayısı sınırlanır; karakter bölünmez
+        assert count == len(trimmed.encode()) <= 101
+        assert len(trimmed) < 101
+        assert text.startswith(trimmed)
+
+    def test_byte_estimate_fallback(self, monkeypatch):
+        monkeypatch.setattr(tokens, "encoding_for", lambda model: tokens.ByteEstimate())
+        text = "合同付款报告收入分析风险" * 100
+
+        trimmed, count = tokens.fit_to_tokens(text, "gpt-4o-mini", 50)
+
+        assert count <= 50
+        assert len(trimmed.encode()) <= 50 * tokens.FALLBACK_BYTES_PER_TOKEN
+
+    @override_settings(
+        LLM_INPUT_TOKENS={"analysis": 300}, LLM_OUTPUT_TOKENS={"analysis": 500}
+    )
+    def test_call_is_trimmed_and_settled(self, test_user):
+        client = _fake_client()
+        calls = []
+        budget = TokenBudget(test_user)
+
+        complete_json(
+            client,
+            "analysis",
+            "gpt-4o-mini",
+            "Sistem.",
+            "Uzun bir cümle. " * 100,
+            0.2,
+            calls,
+            budget,
+        )
+
+        kwargs = client.chat.completions.create.call_args.kwargs
+        assert kwargs["max_tokens"] == 500
+        assert tokens.message_tokens(kwargs["messages"], "gpt-4o-mini") <= 300
+        assert calls[0]["input_tokens"] <= 300
+        usage = LLMUsage.objects.get(owner=test_user)
+        assert (usage.calls, usage.prompt_tokens, usage.completion_tokens) == (
+            1,
+            900,
+            100,
+        )
+        assert usage.reserved_tokens == 0
+        # 900 * 0.15 + 100 * 0.60 dolar / milyon token
+        assert usage.cost_usd == Decimal("0.000195")
+
+    def test_ceiling_is_enforced_before_the_call(self, test_user):
+        test_user.llm_daily_tokens = 1000
+        client = _fake_client()
+
+        with pytest.raises(TokenBudgetExceededError):
+            complete_json(
+                client,
+                "analysis",
+                "gpt-4o-mini",
+                "Sistem.",
+                "Metin.",
+                0.2,
+                budget=TokenBudget(test_user),
+            )
+
+        client.chat.completions.create.assert_not_called()
+        assert LLMUsage.objects.get(owner=test_user).reserved_tokens == 0
+
+    def test_failed_call_releases_reservation(self, test_user):
+        client = _fake_client()
+        client.chat.completions.create.side_effect = RuntimeError("openai down")
+
+        with pytest.raises(RuntimeError):
+            complete_json(
+                client,
+                "analysis",
+                "gpt-4o-mini",
+                "Sistem.",
+                "Metin.",
+                0.2,
+                budget=TokenBudget(test_user),
+            )
+
+        usage = LLMUsage.objects.get(owner=test_user)
+        assert (usage.reserved_tokens, usage.calls) == (0, 0)
+
+    @patch("analysis.tasks.generate_suggestions_en")
+    @patch("analysis.tasks.analyze_document_with_openai")
+    @patch("analysis.tasks.extract_full_text_pages")
+    @patch("analysis.tasks.download_pdf_bytes_from_supabase")
+    def test_job_keeps_analysis_when_suggestions_exceed_budget(
+        self, mock_download, mock_extract, mock_analyze, mock_suggest, test_user
+    ):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        job = AnalysisJob.objects.create(document=doc, job_type="FULL")
+        mock_download.return_value = b"%PDF"
+        mock_extract.return_value = (1, ["metin"])
+        mock_analyze.return_value = ("{}", {"summary": "ok"})
+        mock_suggest.side_effect = TokenBudgetExceededError("limit")
+
+        run_full_analysis(job.id)
+
+        job.refresh_from_db()
+        assert job.status == "READY"
+        analysis = DocumentAnalysis.objects.get(document=doc).analysis_json
+        assert analysis["suggestions"] == []
+
+    def test_enqueue_rejected_when_budget_used_up(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1024)
+        test_user.llm_daily_tokens = 500
+        test_user.save()
+        LLMUsage.objects.create(
+            owner=test_user, day=timezone.now().date(), prompt_tokens=500
+        )
+        api_client.force_authenticate(user=test_user)
+
+        single = api_client.post(reverse("analysis-full", args=[doc.id]))
+        bulk = api_client.post(
+            reverse("analysis-full-bulk"), {"document_ids": [doc.id]}, format="json"
+        )
+
+        assert single.status_code == bulk.status_code == 429
+        assert single["X-LLM-Tokens-Remaining"] == "0"
+        assert not AnalysisJob.objects.filter(document=doc).exists()
+
+    def test_usage_report(self, api_client, test_user):
+        today = timezone.now().date()
+        LLMUsage.objects.create(
+            owner=test_user,
+            day=today,
+            calls=2,
+            prompt_tokens=300,
+            completion_tokens=50,
+            cost_usd=Decimal("0.000075"),
+        )
+        LLMUsage.objects.create(
+            owner=test_user, day=today - timedelta(days=40), prompt_tokens=1
+        )
+        api_client.force_authenticate(user=test_user)
+
+        results = api_client.get(reverse("analysis-llm-usage")).data["results"]
+
+        assert results["limit"] == settings.LLM_DAILY_TOKENS_PLANS["free"]
+        assert results["used_today"] == 350
+        assert results["remaining_today"] == results["limit"] - 350
+        assert [row["total_tokens"] for row in results["days"]] == [350]
+        assert results["days"][0]["cost_usd"] == "0.000075"
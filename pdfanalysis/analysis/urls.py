@@ -1,11 +1,37 @@
 from django.urls import path
 
-from analysis.views import DocumentFullAnalysisCreateAPIView
+from analysis.views import (
+    BulkFullAnalysisCreateAPIView,
+    DocumentFullAnalysisCreateAPIView,
+    DocumentFullAnalysisStreamView,
+    JobStageStatsAPIView,
+    LLMUsageAPIView,
+)
 
 urlpatterns = [
+    path(
+        "full-analysis/bulk/",
+        BulkFullAnalysisCreateAPIView.as_view(),
+        name="analysis-full-bulk",
+    ),
     path(
         "full-analysis/<int:id>/",
         DocumentFullAnalysisCreateAPIView.as_view(),
         name="analysis-full",
     ),
+    path(
+        "stage-stats/",
+        JobStageStatsAPIView.as_view(),
+        name="analysis-stage-stats",
+    ),
+    path(
+        "llm-usage/",
+        LLMUsageAPIView.as_view(),
+        name="analysis-llm-usage",
+    ),
+    path(
+        "full-analysis/<int:id>/stream/",
+        DocumentFullAnalysisStreamView.as_view(),
+        name="analysis-full-stream",
+    ),
 ]
@@ -1,33 +1,123 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from analysis.channels import (
+    TERMINAL_JOB_STATUSES,
+    aget_job_progress,
+    get_job_progress,
+    job_event_hub,
+    job_result,
+    latest_job_seq,
+)
+from analysis.job_stats import stage_report
+from analysis.jobs import (
+    ALREADY_RUNNING,
+    NOT_FOUND,
+    QUEUED,
+    dispatch_full_analyses,
+    enqueue_full_analyses,
+)
+from analysis.llm_budget import TokenBudget
+from analysis.models import AnalysisJob, LLMUsage
+from analysis.serializers import (
+    BulkAnalysisRequestSerializer,
+    LLMUsageDaySerializer,
+    LLMUsageQuerySerializer,
+    StageStatsQuerySerializer,
+)
+from config.async_api import AsyncAPIView
+from documents.conditional import (
+    aconditional_response,
+    conditional_response,
+    make_etag,
+)
+from documents.fieldsets import requested_fields
+from documents.models import ANALYSIS_FIELDS, Document, DocumentAnalysis
+from documents.response_cache import acache_per_user, cache_per_user
+
+# Columns behind the "document" part of the full-analysis GET; the analysis
+# blobs are only read for the fields the request selects.
+DOCUMENT_FIELDS = (
+    "id",
+    "title",
+    "original_name",
+    "created_at",
+    "updated_at",
+    "file_size",
+    "status",
+    "page_count",
+)
+
+BULK_RESULTS = {
+    QUEUED: (201, "Full analysis job oluşturuldu."),
+    ALREADY_RUNNING: (409, "Full analysis zaten sırada veya çalışıyor."),
+    NOT_FOUND: (404, "Doküman bulunamadı."),
+}
+
+
+def _job_payload(job):
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "progress": job.progress,
+        "created_at": job.created_at,
+    }
+
 
-from analysis.models import AnalysisJob
-from analysis.tasks import run_full_analysis
-from documents.models import Document
+def _settled(response):
+    # The progress of a running job moves without a database write, so only
+    # finished (or never started) analyses are cached.
+    job = response.data["job"]
+    return job["id"] is None or job["status"] in TERMINAL_JOB_STATUSES
+
+
+def token_budget_exhausted(user):
+    """A 429 response when ``user`` has no LLM tokens left today, else ``None``."""
+    budget = TokenBudget(user).check()
+    if budget.remaining > 0:
+        return None
+    return Response(
+        {
+            "status": 429,
+            "message": f"Daily LLM token limit reached ({budget.limit}). "
+            "Please try again tomorrow.",
+        },
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers=budget.headers(),
+    )
 
 
 class DocumentFullAnalysisCreateAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, id):
-        doc = Document.objects.filter(
-            id=id, owner=request.user, is_deleted=False
-        ).first()
+        if exhausted := token_budget_exhausted(request.user):
+            return exhausted
+        outcome, job = enqueue_full_analyses(request.user, [id])[id]
 
-        if not doc:
+        if outcome == NOT_FOUND:
             return Response(
                 {"message": "Doküman bulunamadı.", "status": 404},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        existing = AnalysisJob.objects.filter(
-            document=doc,
-            job_type="FULL",
-            status__in=["PENDING", "PROCESSING"],
-        ).exists()
-        if existing:
+        if outcome == ALREADY_RUNNING:
             return Response(
                 {
                     "message": "Full analysis zaten sırada veya çalışıyor.",
@@ -35,38 +125,24 @@ class DocumentFullAnalysisCreateAPIView(APIView):
                 },
                 status=status.HTTP_409_CONFLICT,
             )
-
-        job = AnalysisJob.objects.create(
-            document=doc,
-            job_type="FULL",
-            status="PENDING",
-            progress=0,
-        )
-
-        doc.status = "PROCESSING"
-        doc.save(update_fields=["status"])
-
-        run_full_analysis.delay(job.id)
+        dispatch_full_analyses([job])
 
         return Response(
             {
                 "status": 201,
                 "message": "Full analysis job oluşturuldu.",
-                "job": {
-                    "id": job.id,
-                    "job_type": job.job_type,
-                    "status": job.status,
-                    "progress": job.progress,
-                    "created_at": job.created_at,
-                },
+                "job": _job_payload(job),
             },
             status=status.HTTP_201_CREATED,
         )
 
+    @cache_per_user("analysis-full", cacheable=_settled)
     def get(self, request, id):
-        doc = Document.objects.filter(
-            id=id, owner=request.user, is_deleted=False
-        ).first()
+        doc = (
+            Document.objects.filter(id=id, owner=request.user, is_deleted=False)
+            .only(*DOCUMENT_FIELDS)
+            .first()
+        )
 
         if not doc:
             return Response(
@@ -79,33 +155,340 @@ class DocumentFullAnalysisCreateAPIView(APIView):
             .first()
         )
 
+        progress = job.progress if job else None
+        if job and job.status not in TERMINAL_JOB_STATUSES:
+            progress = get_job_progress(job.id, job.progress)
+
+        fields = requested_fields(request, ANALYSIS_FIELDS)
+
+        def build():
+            analysis = None
+            if fields:
+                analysis = _analysis_query(doc, fields).first()
+            return analysis_response(doc, analysis, job, progress, fields)
+
+        etag, last_modified, cache_control = analysis_validators(
+            doc, job, progress, fields
+        )
+        return conditional_response(request, etag, last_modified, build, cache_control)
+
+
+class AsyncDocumentFullAnalysisView(AsyncAPIView, DocumentFullAnalysisCreateAPIView):
+    """``DocumentFullAnalysisCreateAPIView`` for the ASGI deployment."""
+
+    async def post(self, request, id):
+        # Enqueueing is a transaction and a broker publish, so there is
+        # nothing to gain from an async copy of it.
+        return await sync_to_async(super().post)(request, id)
+
+    @acache_per_user("analysis-full", cacheable=_settled)
+    async def get(self, request, id):
+        doc = await (
+            Document.objects.filter(id=id, owner=request.user, is_deleted=False)
+            .only(*DOCUMENT_FIELDS)
+            .afirst()
+        )
+
+        if not doc:
+            return Response(
+                {"status": 404, "message": "Doküman bulunamadı."}, status=404
+            )
+
+        job = await (
+            AnalysisJob.objects.filter(document=doc, job_type="FULL")
+            .order_by("-id")
+            .afirst()
+        )
+
+        progress = job.progress if job else None
+        if job and job.status not in TERMINAL_JOB_STATUSES:
+            progress = await aget_job_progress(job.id, job.progress)
+
+        fields = requested_fields(request, ANALYSIS_FIELDS)
+
+        async def build():
+            analysis = None
+            if fields:
+                analysis = await _analysis_query(doc, fields).afirst()
+            return analysis_response(doc, analysis, job, progress, fields)
+
+        etag, last_modified, cache_control = analysis_validators(
+            doc, job, progress, fields
+        )
+        return await aconditional_response(
+            request, etag, last_modified, build, cache_control
+        )
+
+
+def analysis_validators(doc, job, progress, fields):
+    """``(etag, last_modified, cache_control)`` of the full-analysis GET."""
+    etag = make_etag(
+        "analysis",
+        doc.id,
+        doc.updated_at.isoformat(),
+        job.id if job else None,
+        job.status if job else None,
+        progress,
+        ",".join(fields),
+    )
+    # Running jobs change without a timestamp, so they are validated by
+    # ETag only; finished ones may be reused for a short while.
+    if job is not None and job.status in TERMINAL_JOB_STATUSES:
+        last_modified = max(doc.updated_at, job.finished_at or doc.updated_at)
+        cache_control = {
+            "private": True,
+            "max_age": settings.ANALYSIS_TERMINAL_MAX_AGE,
+        }
+        return etag, last_modified, cache_control
+    return etag, None, None
+
+
+def _analysis_query(doc, fields):
+    return DocumentAnalysis.objects.filter(document=doc).only(*fields)
+
+
+def analysis_response(doc, analysis, job, progress, fields=ANALYSIS_FIELDS):
+    # Documents that were never analysed have no analysis row yet.
+    analysis = analysis or DocumentAnalysis()
+    return Response(
+        {
+            "status": 200,
+            # -------- DOCUMENT DATA --------
+            "document": {
+                "id": doc.id,
+                "title": doc.title,
+                "original_name": doc.original_name,
+                "created_at": doc.created_at,
+                "file_size": doc.file_size,
+                "document_status": doc.status,
+                "page_count": doc.page_count,
+            },
+            # -------- ANALYSIS DATA --------
+            "analysis": {field: getattr(analysis, field) for field in fields},
+            # -------- JOB DATA --------
+            "job": {
+                "id": job.id if job else None,
+                "status": job.status if job else None,
+                "progress": progress,
+                "error": job.error if job else None,
+                "finished_at": job.finished_at if job else None,
+            },
+        },
+        status=200,
+    )
+
+
+class BulkFullAnalysisCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkAnalysisRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if exhausted := token_budget_exhausted(request.user):
+            return exhausted
+
+        results = enqueue_full_analyses(
+            request.user, serializer.validated_data["document_ids"]
+        )
+        jobs = [job for outcome, job in results.values() if outcome == QUEUED]
+        dispatch_full_analyses(jobs)
+
+        items = []
+        for document_id, (outcome, job) in results.items():
+            item_status, message = BULK_RESULTS[outcome]
+            items.append(
+                {
+                    "document_id": document_id,
+                    "status": item_status,
+                    "message": message,
+                    "job": _job_payload(job) if job else None,
+                }
+            )
+
+        return Response(
+            {"status": 200, "queued": len(jobs), "results": items},
+            status=status.HTTP_200_OK,
+        )
+
+
+def _resolve_stream_job(request, id):
+    """Authenticate the request and return ``(job, channel_seq, error)``."""
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        result = None
+    if not result:
+        return (
+            None,
+            0,
+            JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            ),
+        )
+    user = result[0]
+
+    job = (
+        AnalysisJob.objects.filter(
+            document_id=id,
+            document__owner=user,
+            document__is_deleted=False,
+            job_type="FULL",
+        )
+        .order_by("-id")
+        .first()
+    )
+    if job:
+        return job, latest_job_seq(job.id), None
+
+    doc_exists = Document.objects.filter(id=id, owner=user, is_deleted=False).exists()
+    message = "Full analysis job bulunamadı." if doc_exists else "Doküman bulunamadı."
+    return None, 0, JsonResponse({"status": 404, "message": message}, status=404)
+
+
+def _sse(event, data, seq=None) -> str:
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    head = f"id: {seq}\n" if seq is not None else ""
+    return f"{head}event: {event}\ndata: {payload}\n\n"
+
+
+async def _job_event_stream(job, channel_seq, last_seq):
+    if last_seq is None:
+        # Fresh subscribers replay the whole channel. Only when it is empty
+        # (expired, or nothing published yet) the job row stands in for it.
+        last_seq = 0
+        if not channel_seq:
+            yield _sse("status", {"status": job.status, "progress": job.progress})
+            if job.status in TERMINAL_JOB_STATUSES:
+                analysis = await DocumentAnalysis.objects.filter(
+                    document_id=job.document_id
+                ).afirst()
+                yield _sse("result", job_result(job, analysis))
+                return
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.ANALYSIS_STREAM_MAX_SECONDS
+
+    async with job_event_hub.subscribe(job.id, last_seq) as queue:
+        while True:
+            timeout = min(settings.ANALYSIS_STREAM_HEARTBEAT, deadline - loop.time())
+            if timeout <= 0:
+                return
+            try:
+                seq, event, data = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+
+            if seq <= last_seq:
+                continue
+            last_seq = seq
+            yield _sse(event, data, seq)
+            if event == "result":
+                return
+
+
+class JobStageStatsAPIView(APIView):
+    """Per-stage percentiles of the jobs finished in a time range (staff only)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        query = StageStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        jobs = AnalysisJob.objects.filter(
+            job_type=params["job_type"],
+            finished_at__gte=params["since"],
+            finished_at__lt=params["until"],
+        )
+        if "status" in params:
+            jobs = jobs.filter(status=params["status"])
+        limit = settings.ANALYSIS_STAGE_STATS_MAX_JOBS
+        rows = list(
+            jobs.order_by("-finished_at").values_list("stats", flat=True)[: limit + 1]
+        )
+
         return Response(
             {
                 "status": 200,
-                # -------- DOCUMENT DATA --------
-                "document": {
-                    "id": doc.id,
-                    "title": doc.title,
-                    "original_name": doc.original_name,
-                    "created_at": doc.created_at,
-                    "file_size": doc.file_size,
-                    "document_status": doc.status,
-                    "page_count": doc.page_count,
+                "results": {
+                    "since": params["since"],
+                    "until": params["until"],
+                    "job_type": params["job_type"],
+                    # Only the latest ANALYSIS_STAGE_STATS_MAX_JOBS are read.
+                    "truncated": len(rows) > limit,
+                    **stage_report(rows[:limit]),
                 },
-                # -------- ANALYSIS DATA --------
-                "analysis": {
-                    "analysis_text": doc.analysis_text,
-                    "analysis_json": doc.analysis_json,
-                    "ai_raw": doc.ai_raw,
-                },
-                # -------- JOB DATA --------
-                "job": {
-                    "id": job.id if job else None,
-                    "status": job.status if job else None,
-                    "progress": job.progress if job else None,
-                    "error": job.error if job else None,
-                    "finished_at": job.finished_at if job else None,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class LLMUsageAPIView(APIView):
+    """The caller's LLM token spend per day and what is left of today's."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = LLMUsageQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        days = query.validated_data["days"]
+
+        budget = TokenBudget(request.user).check()
+        since = timezone.now().date() - timedelta(days=days - 1)
+        rows = (
+            LLMUsage.objects.filter(owner=request.user, day__gte=since)
+            .annotate(total_tokens=F("prompt_tokens") + F("completion_tokens"))
+            .order_by("-day")
+            .values(
+                "day",
+                "calls",
+                "prompt_tokens",
+                "completion_tokens",
+                "total_tokens",
+                "cost_usd",
+            )
+        )
+
+        return Response(
+            {
+                "status": 200,
+                "results": {
+                    "limit": budget.limit,
+                    "used_today": budget.used,
+                    "remaining_today": budget.remaining,
+                    "days": LLMUsageDaySerializer(rows, many=True).data,
                 },
             },
-            status=200,
+            status=status.HTTP_200_OK,
+            headers=budget.headers(),
+        )
+
+
+class DocumentFullAnalysisStreamView(View):
+    """
+    Server-Sent Events stream for the latest full analysis job of a document.
+
+    Meant to be served by an ASGI server: the stream only reads the cache
+    channel and holds no worker thread while it waits.
+    """
+
+    async def get(self, request, id):
+        job, channel_seq, error = await sync_to_async(_resolve_stream_job)(request, id)
+        if error:
+            return error
+
+        try:
+            last_seq = int(request.headers["Last-Event-ID"])
+        except (KeyError, ValueError):
+            last_seq = None
+
+        response = StreamingHttpResponse(
+            _job_event_stream(job, channel_seq, last_seq),
+            content_type="text/event-stream",
         )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,142 @@
+"""
+Throughput and tail latency of the I/O-bound endpoints, WSGI versus ASGI.
+
+Runs N concurrent clients in closed loops against a running server for a
+fixed duration and reports requests/s and p50/p95/p99 latency per endpoint.
+Start the fake storage server with a high latency so storage round trips
+dominate, point both deployments at it, and run this script against each:
+
+    python benchmarks/fake_storage.py --port 54321 --latency-ms 200
+    export SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_BUCKET=documents \\
+        SUPABASE_SERVICE_ROLE_KEY=service-role-key
+
+    # WSGI: every request holds a worker thread while it waits
+    gunicorn config.wsgi:application --workers 4 --threads 8 --port 8000
+    # ASGI: the async views await storage and the database on one loop each
+    uvicorn config.asgi:application --workers 4 --port 8001
+
+    python benchmarks/async_load.py --token <jwt> --document 42 \\
+        --base-url http://127.0.0.1:8000 --concurrency 500
+    python benchmarks/async_load.py --token <jwt> --document 42 \\
+        --base-url http://127.0.0.1:8001 --concurrency 500
+
+Raise the open file limit first (``ulimit -n 20000``).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from collections import Counter
+
+import httpx
+
+ENDPOINTS = ("signed-upload", "document-list", "analysis")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 1)
+
+
+def make_request(endpoint, args, seq):
+    if endpoint == "signed-upload":
+        checksum = hashlib.sha256(f"load-{next(seq)}".encode()).hexdigest()
+        return (
+            "POST",
+            "/api/documents/supabase/signed-upload/",
+            {
+                "file_name": "load.pdf",
+                "content_type": "application/pdf",
+                "file_size": 1024,
+                "checksum": checksum,
+            },
+        )
+    if endpoint == "document-list":
+        return "GET", "/api/documents/list/", None
+    return "GET", f"/api/analysis/full-analysis/{args.document}/", None
+
+
+async def worker(client, endpoint, args, seq, stats, deadline):
+    while time.perf_counter() < deadline:
+        method, path, payload = make_request(endpoint, args, seq)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=payload)
+            stats["status"][response.status_code] += 1
+        except httpx.HTTPError:
+            stats["status"]["error"] += 1
+            continue
+        stats["latency"].append(time.perf_counter() - started)
+
+
+async def run(endpoint, args):
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    timeout = httpx.Timeout(args.duration + 60, connect=30)
+    stats = {"status": Counter(), "latency": []}
+    seq = itertools.count()
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers=headers, limits=limits, timeout=timeout
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                worker(client, endpoint, args, seq, stats, deadline)
+                for _ in range(args.concurrency)
+            )
+        )
+        # Requests in flight at the deadline still count, so divide by the
+        # time it took them to drain rather than by the nominal duration.
+        elapsed = time.perf_counter() - started
+
+    latency = stats["latency"]
+    return {
+        "requests": len(latency),
+        "elapsed_s": round(elapsed, 1),
+        "requests_per_s": round(len(latency) / elapsed, 1),
+        "status": {str(code): count for code, count in stats["status"].items()},
+        "p50_ms": percentile(latency, 50),
+        "p95_ms": percentile(latency, 95),
+        "p99_ms": percentile(latency, 99),
+    }
+
+
+async def main(args):
+    endpoints = args.endpoints
+    if "analysis" in endpoints and args.document is None:
+        raise SystemExit("--document is required for the analysis endpoint")
+    results = {}
+    for endpoint in endpoints:
+        results[endpoint] = await run(endpoint, args)
+    print(
+        json.dumps(
+            {
+                "base_url": args.base_url,
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--document", type=int, help="document id for analysis")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument(
+        "--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS)
+    )
+    asyncio.run(main(parser.parse_args()))
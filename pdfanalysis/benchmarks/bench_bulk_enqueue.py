@@ -0,0 +1,115 @@
+"""
+Jobs enqueued per second: one request per document versus the bulk endpoint.
+
+Seeds ``--documents`` ready documents, then queues a full analysis for each of
+them through ``POST /api/analysis/full-analysis/<id>/`` one by one, and again
+through ``POST /api/analysis/full-analysis/bulk/`` in requests of
+``--batch-size`` ids. Celery publishes to kombu's in-memory transport, so the
+message serialization and publishing cost is included but no broker or worker
+is needed.
+
+    python benchmarks/bench_bulk_enqueue.py --documents 500 --batch-size 500
+"""
+
+import argparse
+import json
+import os
+import time
+
+import _django
+
+
+def seed(documents):
+    from accounts.models import User
+    from documents.models import Document
+
+    user = User.objects.create_user(username="bench", password="bench-pass")
+    Document.objects.bulk_create(
+        Document(
+            owner=user,
+            title=f"Doc {i}",
+            original_name=f"doc_{i}.pdf",
+            file_path=f"uploads/doc_{i}.pdf",
+            file_size=1024,
+            mime_type="application/pdf",
+            status="READY",
+        )
+        for i in range(documents)
+    )
+    return user, list(
+        Document.objects.filter(owner=user).order_by("id").values_list("id", flat=True)
+    )
+
+
+def reset(ids):
+    from analysis.models import AnalysisEvent, AnalysisJob
+    from documents.models import Document
+    from documents.stats import reconcile_document_stats
+
+    AnalysisEvent.objects.all().delete()
+    AnalysisJob.objects.all().delete()
+    Document.objects.filter(id__in=ids).update(status="READY")
+    owner_id = Document.objects.get(id=ids[0]).owner_id
+    reconcile_document_stats(owner_id)
+
+
+def run(client, requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as ctx:
+        for method_args in requests:
+            response = client.post(*method_args, format="json")
+            assert response.status_code < 400, response.data
+    elapsed = time.perf_counter() - started
+    return elapsed, len(ctx.captured_queries)
+
+
+def main(args):
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    _django.setup()
+
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    with _django.test_database():
+        user, ids = seed(args.documents)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        single = [(reverse("analysis-full", kwargs={"id": i}),) for i in ids]
+        bulk_url = reverse("analysis-full-bulk")
+        bulk = [
+            (bulk_url, {"document_ids": ids[start : start + args.batch_size]})
+            for start in range(0, len(ids), args.batch_size)
+        ]
+
+        results = {}
+        for name, requests in (("per_document", single), ("bulk", bulk)):
+            reset(ids)
+            elapsed, queries = run(client, requests)
+            results[name] = {
+                "requests": len(requests),
+                "queries": queries,
+                "seconds": round(elapsed, 3),
+                "jobs_per_second": round(len(ids) / elapsed, 1),
+            }
+
+    print(
+        json.dumps(
+            {
+                "documents": args.documents,
+                "batch_size": args.batch_size,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=500)
+    main(parser.parse_args())
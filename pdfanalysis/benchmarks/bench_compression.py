@@ -0,0 +1,261 @@
+"""
+Storage size, write throughput and read latency of compressed text columns.
+
+Writes a synthetic corpus of chunk texts (two extracted PDF pages each) and
+raw LLM outputs (JSON) into throwaway tables with a plain ``TextField`` (what
+``DocumentChunk.text`` / ``ai_raw`` used to be) and with ``CompressedTextField``
+using zlib, zstd and zstd with a dictionary trained on a separate sample of
+the same corpus. On Postgres the plain column keeps its default storage, so
+the baseline already includes TOAST's own compression of large values.
+
+    python benchmarks/bench_compression.py --rows 5000
+
+Ratios depend on the corpus; the synthetic one repeats page furniture and a
+limited vocabulary the way real reports and contracts do.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+import _django
+
+WORDS = (
+    "agreement party parties payment term terms invoice delivery service "
+    "services shall may must within days notice written period clause section "
+    "liability obligation confidential information company customer supplier "
+    "revenue cost costs quarter annual report growth margin market risk risks "
+    "data analysis result results total net operating income expense tax "
+    "interest rate percent increase decrease compared previous year months "
+    "management board director review approval policy compliance audit "
+    "contract renewal termination breach remedy damages law governing court"
+).split()
+PAGES_PER_CHUNK = 2
+DICTIONARY_SIZE = 112640
+
+
+def sentence(rng):
+    words = rng.choices(WORDS, k=rng.randint(8, 22))
+    if rng.random() < 0.3:
+        words.insert(rng.randint(0, len(words)), f"{rng.randint(1, 9999):,}")
+    return " ".join(words).capitalize() + "."
+
+
+def page(rng, doc, number):
+    paragraphs = [
+        " ".join(sentence(rng) for _ in range(rng.randint(3, 7)))
+        for _ in range(rng.randint(3, 6))
+    ]
+    return "\n".join(
+        [
+            f"ACME Holdings {2019 + doc % 6} Annual Report",
+            f"Section {number // 4 + 1}",
+            *paragraphs,
+            f"Confidential - page {number} - do not distribute",
+        ]
+    )
+
+
+def chunk_text(rng, doc):
+    start = rng.randint(1, 40)
+    return "\n\n".join(page(rng, doc, start + i) for i in range(PAGES_PER_CHUNK))
+
+
+def ai_raw(rng, doc):
+    return json.dumps(
+        {
+            "summary": " ".join(sentence(rng) for _ in range(4)),
+            "key_points": [sentence(rng) for _ in range(rng.randint(4, 8))],
+            "risks": [
+                {"title": sentence(rng), "severity": rng.choice(["low", "high"])}
+                for _ in range(rng.randint(2, 5))
+            ],
+            "entities": [rng.choice(WORDS).title() for _ in range(10)],
+            "suggestions": [sentence(rng) for _ in range(3)],
+            "document": doc,
+        },
+        ensure_ascii=False,
+    )
+
+
+CORPORA = {"chunk_text": chunk_text, "ai_raw": ai_raw}
+
+
+def corpus(kind, count, seed):
+    rng = random.Random(seed)
+    return [CORPORA[kind](rng, i) for i in range(count)]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 3)
+
+
+def bench_models():
+    from django.db import models
+
+    from documents.compression import CompressedTextField
+
+    class PlainText(models.Model):
+        text = models.TextField()
+
+        class Meta:
+            app_label = "documents"
+            db_table = "bench_plain_text"
+
+    def compressed(dictionary):
+        class Meta:
+            app_label = "documents"
+            db_table = f"bench_compressed_{dictionary}"
+
+        return type(
+            f"Compressed_{dictionary}",
+            (models.Model,),
+            {
+                "__module__": __name__,
+                "Meta": Meta,
+                "text": CompressedTextField(dictionary=dictionary),
+            },
+        )
+
+    return PlainText, {kind: compressed(kind) for kind in CORPORA}
+
+
+def stored_bytes(model):
+    from django.db import connection
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"SELECT SUM(pg_column_size(text)), pg_total_relation_size(%s) "
+                f"FROM {table}",
+                [model._meta.db_table],
+            )
+            values, relation = cursor.fetchone()
+            return {"value_bytes": int(values), "relation_bytes": relation}
+        cursor.execute(f"SELECT SUM(LENGTH(CAST(text AS BLOB))) FROM {table}")
+        return {"value_bytes": cursor.fetchone()[0]}
+
+
+def measure(model, texts, reads, batch_size):
+    from django.db import connection
+
+    if connection.vendor == "postgresql":
+        # TRUNCATE, not DELETE, so each mode starts from an empty relation.
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {model._meta.db_table}")
+    else:
+        model.objects.all().delete()
+    raw_bytes = sum(len(text.encode("utf-8")) for text in texts)
+
+    started = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        model.objects.bulk_create(
+            [model(text=text) for text in texts[i : i + batch_size]]
+        )
+    write_s = time.perf_counter() - started
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"VACUUM ANALYZE {model._meta.db_table}")
+
+    pks = list(model.objects.values_list("pk", flat=True))
+    rng = random.Random(0)
+    latency = []
+    for pk in rng.choices(pks, k=reads):
+        started = time.perf_counter()
+        len(model.objects.get(pk=pk).text)
+        latency.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for row in model.objects.iterator(chunk_size=batch_size):
+        len(row.text)
+    scan_s = time.perf_counter() - started
+
+    size = stored_bytes(model)
+    return {
+        **size,
+        "ratio": round(raw_bytes / size["value_bytes"], 2),
+        "write_rows_per_s": round(len(texts) / write_s),
+        "write_mb_per_s": round(raw_bytes / write_s / 1e6, 1),
+        "read_p50_ms": percentile(latency, 50),
+        "read_p95_ms": percentile(latency, 95),
+        "read_mean_ms": round(statistics.mean(latency) * 1000, 3),
+        "scan_rows_per_s": round(len(texts) / scan_s),
+    }
+
+
+def main(args):
+    _django.setup()
+
+    from django.db import connection
+    from django.test import override_settings
+
+    from documents import compression
+    from documents.models import CompressionDictionary
+
+    with _django.test_database():
+        plain, compressed = bench_models()
+        with connection.schema_editor() as editor:
+            editor.create_model(plain)
+            for model in compressed.values():
+                editor.create_model(model)
+                if connection.vendor == "postgresql":
+                    editor.execute(
+                        f"ALTER TABLE {model._meta.db_table} "
+                        "ALTER COLUMN text SET STORAGE EXTERNAL"
+                    )
+
+        results = {}
+        for kind in args.corpora:
+            texts = corpus(kind, args.rows, seed=1)
+            raw_bytes = sum(len(text.encode("utf-8")) for text in texts)
+            model = compressed[kind]
+            compression.clear_dictionary_cache()
+
+            modes = {"plain_text": measure(plain, texts, args.reads, 500)}
+            for codec in ("zlib", "zstd"):
+                with override_settings(TEXT_COMPRESSION=codec):
+                    modes[codec] = measure(model, texts, args.reads, 500)
+
+            dict_data = compression.train_dictionary(
+                corpus(kind, args.training_rows, seed=2), DICTIONARY_SIZE
+            )
+            CompressionDictionary.objects.create(
+                name=kind,
+                dict_id=dict_data.dict_id(),
+                data=dict_data.as_bytes(),
+                sample_count=args.training_rows,
+            )
+            compression.clear_dictionary_cache()
+            with override_settings(TEXT_COMPRESSION="zstd"):
+                modes["zstd_dictionary"] = measure(model, texts, args.reads, 500)
+
+            results[kind] = {
+                "rows": len(texts),
+                "raw_bytes": raw_bytes,
+                "mean_row_bytes": raw_bytes // len(texts),
+                "modes": modes,
+            }
+
+    print(
+        json.dumps(
+            {"database": connection.vendor, "results": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=1000)
+    parser.add_argument("--training-rows", type=int, default=2000)
+    parser.add_argument(
+        "--corpora", nargs="+", choices=list(CORPORA), default=list(CORPORA)
+    )
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""
+Bytes and CPU saved by conditional GETs under a polling workload.
+
+Simulates clients polling the full-analysis GET of a finished 50-page
+analysis and the document list, once without validators (old behaviour) and
+once replaying the ETag from the previous response.
+
+    python benchmarks/bench_conditional_get.py --polls 500
+"""
+
+import argparse
+import json
+import time
+
+import _django
+
+
+def analysis_payload(pages=50):
+    sections = [
+        {"title": f"Section {i}", "content": "Lorem ipsum dolor sit amet. " * 40}
+        for i in range(pages)
+    ]
+    return {
+        "doc_type": "report",
+        "language": "en",
+        "summary": "Summary sentence. " * 50,
+        "key_points": [f"Key point {i}" for i in range(40)],
+        "entities": [{"type": "ORG", "value": f"Org {i}"} for i in range(100)],
+        "dates": [f"2026-01-{i % 28 + 1:02d}" for i in range(50)],
+        "numbers": [{"label": f"n{i}", "value": str(i)} for i in range(100)],
+        "action_items": [f"Action {i}" for i in range(20)],
+        "sections": sections,
+        "suggestions": ["Suggestion."] * 5,
+    }
+
+
+def seed():
+    from accounts.models import User
+    from analysis.models import AnalysisJob
+    from documents.models import Document, DocumentAnalysis
+
+    user = User.objects.create_user(username="bench", password="bench-pass")
+    analysis = analysis_payload()
+    docs = [
+        Document.objects.create(
+            owner=user,
+            title=f"Doc {i}",
+            original_name=f"doc_{i}.pdf",
+            file_path=f"uploads/doc_{i}.pdf",
+            file_size=1024 * 1024,
+            mime_type="application/pdf",
+            status="READY",
+        )
+        for i in range(20)
+    ]
+    for doc in docs:
+        DocumentAnalysis.objects.create(
+            document=doc,
+            analysis_json=analysis,
+            analysis_text=analysis["summary"],
+            ai_raw=json.dumps(analysis),
+        )
+        AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="READY", progress=100
+        )
+    return user, docs[0]
+
+
+def poll(client, url, polls, conditional):
+    etag = None
+    sent = 0
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for _ in range(polls):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if conditional and etag else {}
+        response = client.get(url, **headers)
+        etag = response.get("ETag", etag)
+        sent += len(response.content)
+    return {
+        "bytes": sent,
+        "cpu_ms_per_request": round((time.process_time() - cpu) * 1000 / polls, 3),
+        "wall_ms_per_request": round((time.perf_counter() - wall) * 1000 / polls, 3),
+    }
+
+
+def main(args):
+    _django.setup()
+
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    with _django.test_database():
+        user, doc = seed()
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        results = {}
+        for name, url in (
+            ("analysis", reverse("analysis-full", kwargs={"id": doc.id})),
+            ("document_list", reverse("document-list")),
+        ):
+            plain = poll(client, url, args.polls, conditional=False)
+            cond = poll(client, url, args.polls, conditional=True)
+            results[name] = {
+                "unconditional": plain,
+                "conditional": cond,
+                "bytes_saved_pct": round(100 * (1 - cond["bytes"] / plain["bytes"]), 1),
+                "cpu_saved_pct": round(
+                    100
+                    * (1 - cond["cpu_ms_per_request"] / plain["cpu_ms_per_request"]),
+                    1,
+                ),
+            }
+
+    print(json.dumps({"polls": args.polls, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", type=int, default=500)
+    main(parser.parse_args())
@@ -0,0 +1,132 @@
+"""
+Serialization time of a full-analysis payload, DRF's JSON versus orjson.
+
+Builds the response of the full-analysis GET for a 50-page document (one
+section per page plus entities, numbers and key points, the shape the LLM
+returns) and times rendering it with DRF's ``JSONRenderer`` and with
+``ORJSONRenderer``, and parsing the raw LLM output with ``json.loads`` and
+``config.renderers.loads``. No database is needed.
+
+    python benchmarks/bench_json.py --pages 50 --repeat 200
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import UTC, datetime
+
+import _django
+
+WORDS = (
+    "revenue growth margin contract party payment obligation risk audit "
+    "report quarter customer supplier delivery service term notice period "
+    "analysis result total net income expense tax rate increase decrease"
+).split()
+
+
+def text(rng, words):
+    return " ".join(rng.choices(WORDS, k=words)).capitalize() + "."
+
+
+def analysis(pages, seed=0):
+    rng = random.Random(seed)
+    return {
+        "doc_type": "report",
+        "language": "en",
+        "summary": " ".join(text(rng, 20) for _ in range(6)),
+        "key_points": [text(rng, 15) for _ in range(pages)],
+        "entities": [
+            {"type": rng.choice(["ORG", "PERSON", "GPE"]), "value": text(rng, 2)}
+            for _ in range(pages * 3)
+        ],
+        "dates": [f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"] * pages,
+        "numbers": [
+            {"label": text(rng, 3), "value": f"{rng.uniform(0, 1e6):,.2f}"}
+            for _ in range(pages * 2)
+        ],
+        "action_items": [text(rng, 10) for _ in range(pages // 2)],
+        "sections": [
+            {"title": f"Page {page}", "content": text(rng, 120)}
+            for page in range(1, pages + 1)
+        ],
+        "suggestions": [text(rng, 18) for _ in range(5)],
+    }
+
+
+def response(payload):
+    """The full-analysis GET body around ``payload``."""
+    return {
+        "status": 200,
+        "data": {
+            "document_id": 42,
+            "job_id": 7,
+            "status": "READY",
+            "progress": 100,
+            "analysis_json": payload,
+            "analysis_text": payload["summary"],
+            "ai_raw": json.dumps(payload, ensure_ascii=False),
+            "created_at": datetime.now(UTC),
+        },
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p95_ms": round(sorted(samples)[int(0.95 * (len(samples) - 1))] * 1000, 3),
+    }
+
+
+def main(args):
+    _django.setup()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from config.renderers import ORJSONRenderer, loads
+
+    body = response(analysis(args.pages))
+    raw = body["data"]["ai_raw"]
+    drf, fast = JSONRenderer(), ORJSONRenderer()
+    assert drf.render(body) == fast.render(body)
+
+    render = {
+        "drf_json": timed(lambda: drf.render(body), args.repeat),
+        "orjson": timed(lambda: fast.render(body), args.repeat),
+    }
+    parse = {
+        "json_loads": timed(lambda: json.loads(raw), args.repeat),
+        "orjson_loads": timed(lambda: loads(raw), args.repeat),
+    }
+    print(
+        json.dumps(
+            {
+                "pages": args.pages,
+                "response_bytes": len(fast.render(body)),
+                "llm_output_bytes": len(raw.encode("utf-8")),
+                "render": render,
+                "render_speedup": round(
+                    render["drf_json"]["mean_ms"] / render["orjson"]["mean_ms"], 1
+                ),
+                "parse": parse,
+                "parse_speedup": round(
+                    parse["json_loads"]["mean_ms"] / parse["orjson_loads"]["mean_ms"],
+                    1,
+                ),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
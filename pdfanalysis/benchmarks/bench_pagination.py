@@ -0,0 +1,169 @@
+"""
+Page-number versus keyset pagination at shallow and deep pages.
+
+Seeds one heavy tenant with ``--rows`` documents and as many analysis events,
+then times the document list and event log querysets through the old
+``Pagination10`` (COUNT plus OFFSET, with the ordering each view used) and
+the keyset paginator of each view at page 1 and at page ``--deep-page``. The keyset run
+starts from the cursor a client would hold after walking to that page.
+
+    python benchmarks/bench_pagination.py --rows 100000 --deep-page 10000
+
+Run it against PostgreSQL for numbers that mean anything in production.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import _django
+
+PAGE_SIZE = 10
+
+
+def seed(rows):
+    from accounts.models import User
+    from analysis.events import job_event
+    from analysis.models import AnalysisEvent, AnalysisJob
+    from documents.models import Document
+
+    user = User.objects.create_user(username="bench", password="bench-pass")
+    Document.objects.bulk_create(
+        (
+            Document(
+                owner=user,
+                title=f"Doc {i}",
+                original_name=f"doc_{i}.pdf",
+                file_path=f"uploads/doc_{i}.pdf",
+                file_size=1024,
+                mime_type="application/pdf",
+                status="READY",
+            )
+            for i in range(rows)
+        ),
+        batch_size=5000,
+    )
+    doc = Document.objects.filter(owner=user).first()
+    job = AnalysisJob.objects.create(
+        document=doc, job_type="FULL", status="READY", progress=100
+    )
+    AnalysisEvent.objects.bulk_create(
+        (job_event(job, doc, "finished") for _ in range(rows)),
+        batch_size=5000,
+    )
+    return user
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def measure(name, queryset, old_ordering, keyset_class, deep_page, repeat):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from documents.paginations import Pagination10
+
+    factory = APIRequestFactory()
+
+    def paginate(paginator_class, **params):
+        request = Request(factory.get("/", params))
+        paginator = paginator_class()
+        qs = (
+            queryset.order_by(old_ordering)
+            if paginator_class is Pagination10
+            else queryset
+        )
+        list(paginator.paginate_queryset(qs, request))
+
+    offset = (deep_page - 1) * PAGE_SIZE
+    field = keyset_class.keyset_field
+    anchor = queryset.order_by(f"-{field}", "-id")[offset - 1]
+    cursor = keyset_class.encode_cursor(getattr(anchor, field), anchor.id)
+
+    return {
+        name: {
+            "page_number_ms": {
+                "page_1": timed(lambda: paginate(Pagination10, page=1), repeat),
+                f"page_{deep_page}": timed(
+                    lambda: paginate(Pagination10, page=deep_page), repeat
+                ),
+            },
+            "keyset_ms": {
+                "page_1": timed(lambda: paginate(keyset_class), repeat),
+                f"page_{deep_page}": timed(
+                    lambda: paginate(keyset_class, cursor=cursor), repeat
+                ),
+                "page_1_with_count": timed(
+                    lambda: paginate(keyset_class, with_count="true"), repeat
+                ),
+            },
+        }
+    }
+
+
+def main(args):
+    _django.setup()
+
+    from django.db import connection
+
+    with _django.test_database():
+        user = seed(args.rows)
+
+        from analysis.models import AnalysisEvent
+        from documents.models import Document
+        from documents.paginations import EventKeysetPagination10, KeysetPagination10
+
+        # Production tables are analyzed by autovacuum; give the planner the
+        # same statistics here.
+        if connection.vendor in ("postgresql", "sqlite"):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        results = {}
+        results.update(
+            measure(
+                "document_list",
+                Document.objects.filter(owner=user, is_deleted=False),
+                "-id",
+                KeysetPagination10,
+                args.deep_page,
+                args.repeat,
+            )
+        )
+        results.update(
+            measure(
+                "event_log",
+                AnalysisEvent.objects.filter(owner=user),
+                "-ts",
+                EventKeysetPagination10,
+                args.deep_page,
+                args.repeat,
+            )
+        )
+
+    print(
+        json.dumps(
+            {
+                "vendor": connection.vendor,
+                "rows": args.rows,
+                "page_size": PAGE_SIZE,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--deep-page", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Latency and queries per request of the cached GET endpoints, hit versus miss.
+
+Requests the document list, the recent documents, the event log and the
+full-analysis GET of a finished 50-page analysis with the response cache
+disabled and warm, and reports the mean and p95 latency and the number of
+queries per request.
+
+    python benchmarks/bench_response_cache.py --requests 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import _django
+import bench_response_compression
+
+
+def measure(client, url, requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    response = client.get(url)
+    assert response.status_code == 200, response.status_code
+    samples = []
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get(url)
+            samples.append(time.perf_counter() - started)
+    return {
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p95_ms": round(sorted(samples)[int(0.95 * (len(samples) - 1))] * 1000, 3),
+        "queries_per_request": round(len(ctx.captured_queries) / requests, 2),
+    }
+
+
+def main(args):
+    _django.setup()
+
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from documents.response_cache import response_cache_stats
+
+    with _django.test_database():
+        user, doc = bench_response_compression.seed(args.pages, args.documents)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        endpoints = {
+            "document_list": reverse("document-list"),
+            "recent_documents": reverse("recent-documents"),
+            "event_log": reverse("event-log"),
+            "analysis": reverse("analysis-full", kwargs={"id": doc.id}),
+        }
+        results = {}
+        for name, url in endpoints.items():
+            with override_settings(RESPONSE_CACHE_TTL=0):
+                miss = measure(client, url, args.requests)
+            hit = measure(client, url, args.requests)
+            results[name] = {
+                "uncached": miss,
+                "cached": hit,
+                "speedup": round(miss["mean_ms"] / hit["mean_ms"], 1),
+            }
+        stats = response_cache_stats()
+
+    print(
+        json.dumps(
+            {"requests": args.requests, "results": results, "stats": stats},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--documents", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,120 @@
+"""
+Bytes on the wire and CPU per request with response compression.
+
+Requests the full-analysis GET of a 50-page analysis (``bench_json``'s
+payload), the document list and the recent documents and overview endpoints
+without compression and with gzip and brotli at several levels, and reports
+the response size and the CPU time per request, measured with the
+compression middleware in the stack.
+
+    python benchmarks/bench_response_compression.py --requests 200
+"""
+
+import argparse
+import json
+import time
+
+import _django
+import bench_json
+
+CODINGS = (
+    ("identity", "identity", {}),
+    ("gzip_1", "gzip", {"RESPONSE_COMPRESSION_GZIP_LEVEL": 1}),
+    ("gzip_6", "gzip", {"RESPONSE_COMPRESSION_GZIP_LEVEL": 6}),
+    ("gzip_9", "gzip", {"RESPONSE_COMPRESSION_GZIP_LEVEL": 9}),
+    ("br_1", "br", {"RESPONSE_COMPRESSION_BROTLI_QUALITY": 1}),
+    ("br_4", "br", {"RESPONSE_COMPRESSION_BROTLI_QUALITY": 4}),
+    ("br_11", "br", {"RESPONSE_COMPRESSION_BROTLI_QUALITY": 11}),
+)
+
+
+def seed(pages, documents):
+    from accounts.models import User
+    from analysis.models import AnalysisJob
+    from documents.models import Document, DocumentAnalysis
+
+    user = User.objects.create_user(username="bench", password="bench-pass")
+    docs = [
+        Document.objects.create(
+            owner=user,
+            title=f"Quarterly report {i}",
+            original_name=f"report_{i}.pdf",
+            file_path=f"uploads/report_{i}.pdf",
+            file_size=1024 * 1024,
+            mime_type="application/pdf",
+            status="READY",
+            page_count=pages,
+        )
+        for i in range(documents)
+    ]
+    payload = bench_json.analysis(pages)
+    DocumentAnalysis.objects.create(
+        document=docs[0],
+        analysis_json=payload,
+        analysis_text=payload["summary"],
+        ai_raw=json.dumps(payload, ensure_ascii=False),
+    )
+    AnalysisJob.objects.create(
+        document=docs[0], job_type="FULL", status="READY", progress=100
+    )
+    return user, docs[0]
+
+
+def measure(client, url, accept, requests):
+    response = client.get(url, HTTP_ACCEPT_ENCODING=accept)
+    assert response.status_code == 200, response.status_code
+    cpu = time.process_time()
+    for _ in range(requests):
+        client.get(url, HTTP_ACCEPT_ENCODING=accept)
+    return {
+        "encoding": response.get("Content-Encoding", "identity"),
+        "bytes": len(response.content),
+        "cpu_ms_per_request": round((time.process_time() - cpu) * 1000 / requests, 3),
+    }
+
+
+def main(args):
+    _django.setup()
+
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    with _django.test_database():
+        user, doc = seed(args.pages, args.documents)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        endpoints = {
+            "analysis": reverse("analysis-full", kwargs={"id": doc.id}),
+            "document_list": reverse("document-list"),
+            "recent_documents": reverse("recent-documents"),
+            "document_overview": reverse("document-overview"),
+        }
+        results = {}
+        for name, url in endpoints.items():
+            results[name] = {}
+            for label, accept, levels in CODINGS:
+                with override_settings(**levels):
+                    results[name][label] = measure(client, url, accept, args.requests)
+            identity = results[name]["identity"]
+            for row in results[name].values():
+                row["ratio"] = round(identity["bytes"] / row["bytes"], 2)
+                row["extra_cpu_ms"] = round(
+                    row["cpu_ms_per_request"] - identity["cpu_ms_per_request"], 3
+                )
+
+    print(
+        json.dumps(
+            {"pages": args.pages, "requests": args.requests, "results": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--documents", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,111 @@
+"""
+End-to-end latency of signed upload URLs for 1, 10 and 100 files.
+
+Points the backend at the in-process fake storage server (``fake_storage``)
+with ``--latency-ms`` per storage call and measures how long a client needs
+to get a signed URL for every file: one ``signed-upload`` request per file
+(the old flow) versus a single ``signed-upload-batch`` request. The batch is
+then uploaded and requested again, where every blob already exists and only
+the metadata call is made.
+
+    python benchmarks/bench_signed_upload.py --latency-ms 20
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import _django
+import fake_storage
+
+
+def files(count):
+    return [
+        {
+            "file_name": f"scan {i}.pdf",
+            "content_type": "application/pdf",
+            "file_size": 1024 * 1024,
+            "checksum": hashlib.sha256(f"{count}-{i}".encode()).hexdigest(),
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def main(args):
+    _django.setup()
+
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from accounts.models import User
+    from documents.storage import blob_path
+
+    with (
+        _django.test_database(),
+        fake_storage.running(args.latency_ms) as (url, storage),
+    ):
+        os.environ.update(
+            SUPABASE_URL=url,
+            SUPABASE_SERVICE_ROLE_KEY="service-role-key",
+            SUPABASE_BUCKET="documents",
+        )
+        user = User.objects.create_user(username="bench", password="bench-pass")
+        client = APIClient()
+        client.force_authenticate(user=user)
+        single_url = reverse("signed-upload")
+        batch_url = reverse("signed-upload-batch")
+
+        def one_by_one(batch):
+            for item in batch:
+                response = client.post(single_url, item, format="json")
+                assert response.status_code == 200, response.data
+
+        def batched(batch):
+            response = client.post(batch_url, {"files": batch}, format="json")
+            assert response.status_code == 200, response.data
+            assert all("detail" not in r for r in response.data["results"])
+
+        results = {}
+        for count in args.counts:
+            batch = files(count)
+            calls = storage.calls
+            single_ms = timed(lambda: one_by_one(batch))
+            single_calls = storage.calls - calls
+            calls = storage.calls
+            batch_ms = timed(lambda: batched(batch))
+            batch_calls = storage.calls - calls
+            for item in batch:
+                key = f"documents/{blob_path(user.pk, item['checksum'])}"
+                storage.objects[key] = b"%PDF"
+            calls = storage.calls
+            repeat_ms = timed(lambda: batched(batch))
+            results[f"{count}_files"] = {
+                "per_file_requests": {"ms": single_ms, "storage_calls": single_calls},
+                "batch_request": {"ms": batch_ms, "storage_calls": batch_calls},
+                "batch_repeat": {
+                    "ms": repeat_ms,
+                    "storage_calls": storage.calls - calls,
+                },
+            }
+
+    print(
+        json.dumps(
+            {"latency_ms": args.latency_ms, "results": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100])
+    main(parser.parse_args())
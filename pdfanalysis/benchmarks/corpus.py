@@ -0,0 +1,229 @@
+"""
+Deterministic synthetic PDF corpus for the benchmark suite.
+
+Each document is written directly in PDF syntax from a seeded generator, so
+the same name always produces the same bytes and no PDF library is needed:
+
+- ``text``: dense paragraphs, 45 lines per page, Helvetica.
+- ``table``: ruled grids of short cells, many positioned text runs and
+  rectangles per page.
+- ``many_pages``: 60 short pages, more than ``extract_full_text_pages``
+  reads.
+- ``unicode``: Turkish, Greek, Cyrillic and CJK text through a composite
+  font whose ``ToUnicode`` map the extractor has to apply to every glyph.
+
+    python benchmarks/corpus.py --out /tmp/corpus
+"""
+
+import argparse
+import random
+import zlib
+from pathlib import Path
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+
+WORDS = (
+    "revenue growth margin contract party payment obligation risk audit "
+    "report quarter customer supplier delivery service term notice period "
+    "analysis result total net income expense tax rate increase decrease"
+).split()
+
+UNICODE_WORDS = (
+    "ağaç şirket ölçüm ığdır çalışma gümüş sözleşme ödeme "
+    "ανάλυση έσοδα σύμβαση αναφορά "
+    "договор оплата отчёт прибыль "
+    "合同 付款 报告 收入 分析 风险"
+).split()
+
+# name: (kind, pages, seed)
+CORPUS = {
+    "text": ("text", 10, 1),
+    "table": ("table", 10, 2),
+    "many_pages": ("many_pages", 60, 3),
+    "unicode": ("unicode", 10, 4),
+}
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode()
+
+
+def _words(rng, words, count):
+    return " ".join(rng.choices(words, k=count))
+
+
+def _text_page(rng, lines=45):
+    ops = [b"BT /F1 10 Tf 12 TL 50 790 Td"]
+    for _ in range(lines):
+        ops.append(b"(" + _escape(_words(rng, WORDS, 12).capitalize()) + b") Tj T*")
+    ops.append(b"ET")
+    return b"\n".join(ops)
+
+
+def _table_page(rng, rows=30, cols=6):
+    width, height = 80, 22
+    left, top = 57, 780
+    ops = [b"0.5 w"]
+    for row in range(rows):
+        y = top - row * height
+        for col in range(cols):
+            x = left + col * width
+            ops.append(f"{x} {y - height} {width} {height} re S".encode())
+            if row == 0:
+                cell = rng.choice(WORDS).capitalize()
+            elif col == 0:
+                cell = f"{rng.choice(WORDS)} {row}"
+            else:
+                cell = f"{rng.uniform(0, 1e5):,.2f}"
+            ops.append(
+                b"BT /F1 8 Tf "
+                + f"{x + 4} {y - 15} Td".encode()
+                + b" ("
+                + _escape(cell)
+                + b") Tj ET"
+            )
+    return b"\n".join(ops)
+
+
+def _unicode_page(rng, lines=40):
+    ops = [b"BT /F2 10 Tf 12 TL 50 790 Td"]
+    for _ in range(lines):
+        line = _words(rng, UNICODE_WORDS, 10)
+        ops.append(b"<" + line.encode("utf-16-be").hex().encode() + b"> Tj T*")
+    ops.append(b"ET")
+    return b"\n".join(ops)
+
+
+def _to_unicode_cmap():
+    # Glyph ids are BMP code points, so the map is the identity, written as
+    # one range per high byte (a range may only vary its last byte).
+    ranges = [
+        f"<{high:02X}00> <{high:02X}FF> <{high:02X}00>"
+        for high in range(256)
+        if not 0xD8 <= high <= 0xDF
+    ]
+    blocks = []
+    for i in range(0, len(ranges), 100):
+        chunk = ranges[i : i + 100]
+        blocks.append(f"{len(chunk)} beginbfrange\n" + "\n".join(chunk))
+        blocks.append("endbfrange")
+    return (
+        "/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def /CMapType 2 def\n"
+        "1 begincodespacerange <0000> <FFFF> endcodespacerange\n"
+        + "\n".join(blocks)
+        + "\nendcmap CMapName currentdict /CMap defineresource pop end end"
+    ).encode()
+
+
+class _Writer:
+    def __init__(self):
+        self.objects = []
+
+    def add(self, body):
+        self.objects.append(body)
+        return len(self.objects)
+
+    def stream(self, data, compress=True):
+        if compress:
+            data = zlib.compress(data, 6)
+            head = f"<< /Length {len(data)} /Filter /FlateDecode >>"
+        else:
+            head = f"<< /Length {len(data)} >>"
+        return self.add(head.encode() + b"\nstream\n" + data + b"\nendstream")
+
+    def render(self, root):
+        out = bytearray(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects, start=1):
+            offsets.append(len(out))
+            out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode()
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode()
+        out += (
+            f"trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n"
+        ).encode()
+        return bytes(out)
+
+
+def _fonts(writer):
+    helvetica = writer.add(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding /WinAnsiEncoding >>"
+    )
+    descriptor = writer.add(
+        b"<< /Type /FontDescriptor /FontName /SyntheticSans /Flags 32 "
+        b"/FontBBox [0 -200 1000 900] /ItalicAngle 0 /Ascent 900 "
+        b"/Descent -200 /CapHeight 700 /StemV 80 >>"
+    )
+    cid_font = writer.add(
+        b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /SyntheticSans "
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) "
+        b"/Supplement 0 >> " + f"/FontDescriptor {descriptor} 0 R /DW 600 >>".encode()
+    )
+    to_unicode = writer.stream(_to_unicode_cmap())
+    composite = writer.add(
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /SyntheticSans "
+        b"/Encoding /Identity-H "
+        + f"/DescendantFonts [{cid_font} 0 R] /ToUnicode {to_unicode} 0 R >>".encode()
+    )
+    return f"<< /F1 {helvetica} 0 R /F2 {composite} 0 R >>".encode()
+
+
+def build(kind, pages, seed):
+    """The PDF bytes of a ``kind`` document of ``pages`` pages."""
+    rng = random.Random(seed)
+    page_content = {
+        "text": _text_page,
+        "table": _table_page,
+        "many_pages": lambda rng: _text_page(rng, lines=10),
+        "unicode": _unicode_page,
+    }[kind]
+
+    writer = _Writer()
+    fonts = _fonts(writer)
+    # Page tree first, so the pages can point at it; filled in at the end.
+    writer.add(b"")
+    pages_id = len(writer.objects)
+    kids = []
+    for _ in range(pages):
+        contents = writer.stream(page_content(rng))
+        kids.append(
+            writer.add(
+                f"<< /Type /Page /Parent {pages_id} 0 R "
+                f"/MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font ".encode()
+                + fonts
+                + f" >> /Contents {contents} 0 R >>".encode()
+            )
+        )
+    writer.objects[pages_id - 1] = (
+        f"<< /Type /Pages /Count {pages} /Kids [".encode()
+        + " ".join(f"{kid} 0 R" for kid in kids).encode()
+        + b"] >>"
+    )
+    root = writer.add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+    return writer.render(root)
+
+
+def corpus():
+    """``{name: pdf_bytes}`` for every document of ``CORPUS``."""
+    return {name: build(*spec) for name, spec in CORPUS.items()}
+
+
+def main(args):
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for name, pdf in corpus().items():
+        (out / f"{name}.pdf").write_bytes(pdf)
+        print(f"{name}.pdf {len(pdf)} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", required=True)
+    main(parser.parse_args())
@@ -0,0 +1,154 @@
+"""
+Stand-in for the OpenAI chat completions API.
+
+Answers ``POST /v1/chat/completions`` the way ``analysis.helpers.ai_analysis``
+expects: a JSON object with the analysis keys and ``suggestions``, sized by
+the length of the document sent, plus a ``usage`` block. Each call waits
+``latency_ms`` (plus up to ``jitter_ms``) and fails with a 429 or a 500 at
+``error_rate``, which the OpenAI client retries like the real thing.
+
+The backend's client reads ``OPENAI_BASE_URL``, so nothing has to change to
+use it:
+
+    python benchmarks/fake_openai.py --port 54322 --latency-ms 3000
+    export OPENAI_BASE_URL=http://127.0.0.1:54322/v1 OPENAI_API_KEY=fake
+
+or start it in-process with ``running()``.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import bench_json
+
+# Roughly one analysed page per this many characters of document text.
+CHARS_PER_PAGE = 3000
+
+
+class FakeOpenAI:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def draw(self):
+        """``(delay_seconds, failed)`` for the next call."""
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return delay, failed
+
+
+def completion(model, messages):
+    prompt = "".join(str(m.get("content", "")) for m in messages)
+    document = str(messages[-1].get("content", "")) if messages else ""
+    pages = max(1, min(50, len(document) // CHARS_PER_PAGE))
+    content = json.dumps(bench_json.analysis(pages, seed=len(document)))
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    openai: FakeOpenAI
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": "Not found"}})
+
+        delay, failed = self.openai.draw()
+        time.sleep(delay)
+        if failed:
+            code = self.openai.rng.choice((429, 500))
+            return self._send(
+                code, {"error": {"message": "Injected failure", "code": code}}
+            )
+        self._send(
+            200, completion(request.get("model", ""), request.get("messages", []))
+        )
+
+
+def make_server(
+    host="127.0.0.1", port=0, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=0
+):
+    openai = FakeOpenAI(latency_ms, jitter_ms, error_rate, seed)
+    handler = type("BoundHandler", (Handler,), {"openai": openai})
+    server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 1024})
+    server = server_class((host, port), handler)
+    server.daemon_threads = True
+    server.openai = openai
+    return server
+
+
+@contextmanager
+def running(port=0, **options):
+    """Serve on a local port (free by default); yields ``(base_url, openai)``."""
+    server = make_server(port=port, **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    try:
+        yield f"http://{host}:{port}/v1", server.openai
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54322)
+    parser.add_argument("--latency-ms", type=float, default=3000)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = make_server(
+        args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate
+    )
+    print(f"Fake OpenAI on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,202 @@
+"""
+In-memory stand-in for the Supabase Storage API.
+
+Implements the object endpoints the backend uses (signed upload URLs, upload
+to a signed URL, remove, exists/info and authenticated download) with a fixed
+artificial latency per call, so benchmarks and load tests can measure the
+backend's own round trips without a real project. ``error_rate`` makes that
+share of calls fail with a 503 before they do anything.
+
+Run standalone and point ``SUPABASE_URL`` at it:
+
+    python benchmarks/fake_storage.py --port 54321 --latency-ms 20
+
+or start it in-process with ``running()``.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+PREFIX = "/storage/v1/object/"
+
+
+class FakeStorage:
+    def __init__(self, latency_ms=0, error_rate=0.0, seed=0):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.objects = {}
+        self.tokens = {}
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def fails(self):
+        if not self.error_rate:
+            return False
+        with self.lock:
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return failed
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive
+    # clients would wait for a delayed ACK on every call.
+    disable_nagle_algorithm = True
+    storage: FakeStorage
+
+    def log_message(self, *args):
+        pass
+
+    def _route(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith(PREFIX):
+            return None, [], {}
+        parts = [unquote(p) for p in url.path[len(PREFIX) :].split("/") if p]
+        return url, parts, parse_qs(url.query)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, code, payload=None, body=None, content_type="application/json"):
+        time.sleep(self.storage.latency)
+        with self.storage.lock:
+            self.storage.calls += 1
+        if payload is not None:
+            body = json.dumps(payload).encode()
+        body = body or b""
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _injected_failure(self):
+        if not self.storage.fails():
+            return False
+        self._send(
+            503,
+            {"statusCode": "503", "error": "unavailable", "message": "Injected"},
+        )
+        return True
+
+    def _not_found(self):
+        self._send(
+            404,
+            {"statusCode": "404", "error": "not_found", "message": "Object not found"},
+        )
+
+    def do_POST(self):
+        _, parts, _ = self._route()
+        self._body()
+        if self._injected_failure():
+            return
+        if parts[:2] == ["upload", "sign"] and len(parts) > 3:
+            key = "/".join(parts[2:])
+            token = uuid.uuid4().hex
+            self.storage.tokens[token] = key
+            return self._send(200, {"url": f"/object/upload/sign/{key}?token={token}"})
+        self._not_found()
+
+    def do_PUT(self):
+        _, parts, query = self._route()
+        body = self._body()
+        if self._injected_failure():
+            return
+        token = (query.get("token") or [""])[0]
+        if parts[:2] == ["upload", "sign"] and token in self.storage.tokens:
+            key = self.storage.tokens.pop(token)
+            self.storage.objects[key] = body
+            return self._send(200, {"Key": key})
+        self._send(
+            400, {"statusCode": "400", "error": "invalid", "message": "Bad token"}
+        )
+
+    def do_DELETE(self):
+        _, parts, _ = self._route()
+        prefixes = json.loads(self._body() or b"{}").get("prefixes", [])
+        if self._injected_failure():
+            return
+        bucket = parts[0] if parts else ""
+        removed = []
+        for path in prefixes:
+            if self.storage.objects.pop(f"{bucket}/{path}", None) is not None:
+                removed.append({"name": path})
+        self._send(200, removed)
+
+    def do_HEAD(self):
+        _, parts, _ = self._route()
+        if self._injected_failure():
+            return
+        if "/".join(parts) in self.storage.objects:
+            return self._send(200)
+        self._send(404)
+
+    def do_GET(self):
+        _, parts, _ = self._route()
+        if self._injected_failure():
+            return
+        if parts[:1] == ["info"]:
+            key = "/".join(parts[1:])
+            if key not in self.storage.objects:
+                return self._not_found()
+            return self._send(
+                200, {"name": key, "size": len(self.storage.objects[key])}
+            )
+        if parts[:1] == ["authenticated"]:
+            key = "/".join(parts[1:])
+            if key not in self.storage.objects:
+                return self._not_found()
+            return self._send(
+                200, body=self.storage.objects[key], content_type="application/pdf"
+            )
+        self._not_found()
+
+
+def make_server(host="127.0.0.1", port=0, latency_ms=0, error_rate=0.0):
+    storage = FakeStorage(latency_ms, error_rate)
+    handler = type("BoundHandler", (Handler,), {"storage": storage})
+    # The default listen backlog of 5 drops connections from concurrent clients.
+    server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 1024})
+    server = server_class((host, port), handler)
+    server.daemon_threads = True
+    server.storage = storage
+    return server
+
+
+@contextmanager
+def running(latency_ms=0, error_rate=0.0, port=0):
+    """Serve on a local port (free by default); yields ``(base_url, storage)``."""
+    server = make_server(port=port, latency_ms=latency_ms, error_rate=error_rate)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    try:
+        yield f"http://{host}:{port}", server.storage
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.latency_ms, args.error_rate)
+    print(f"Fake storage on http://{args.host}:{args.port}")
+    server.serve_forever()
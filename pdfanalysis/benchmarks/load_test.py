@@ -0,0 +1,421 @@
+"""
+End-to-end load test of the upload and analysis flow with local fakes.
+
+Boots the fake storage (``fake_storage``) and fake OpenAI (``fake_openai``)
+servers in-process, with configurable latency and error rates, and drives
+the API with virtual users in closed loops for ``--duration`` seconds. Each
+iteration a user picks an action from ``--mix``:
+
+- ``upload``: signed upload URL, PUT of a synthetic PDF (``corpus``) to
+  storage, document create, full analysis, then polls the analysis GET
+  until the job finishes (``--job-timeout``);
+- ``list``, ``recent``, ``overview``, ``event-log``, ``analysis``: one read.
+
+Reports throughput, status counts and p50/p95/p99 latency per endpoint, and
+the completion time of the analysis jobs as seen by the client (to within
+``--poll-interval``).
+
+With ``--spawn`` the API server and Celery workers are started too, pointed
+at the fakes, so worker counts can be compared run against run:
+
+    python benchmarks/load_test.py --spawn --server uvicorn --web-workers 4 \\
+        --celery-concurrency 8 --users 50 --duration 120 \\
+        --mix upload=1,list=4,recent=2,overview=2,event-log=1,analysis=2
+
+Otherwise start them yourself with the environment the harness prints
+(fakes on ``--storage-port`` and ``--openai-port``) and pass ``--base-url``.
+Both need the project's database and ``CELERY_BROKER_URL``.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+import corpus
+import fake_openai
+import fake_storage
+import httpx
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+ACTIONS = ("upload", "list", "recent", "overview", "event-log", "analysis")
+READS = {
+    "list": ("document-list", "/api/documents/list/"),
+    "recent": ("recent-documents", "/api/documents/recent-documents/"),
+    "overview": ("document-overview", "/api/documents/overview/"),
+    "event-log": ("event-log", "/api/documents/event-log/"),
+}
+TERMINAL = ("READY", "FAILED")
+PASSWORD = "load-test-password"
+
+
+def percentile(values, q, scale=1000):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * scale, 1)
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Stats:
+    def __init__(self):
+        self.latency = defaultdict(list)
+        self.status = defaultdict(Counter)
+        self.jobs = Counter()
+        self.job_seconds = []
+
+    def endpoints(self, elapsed):
+        return {
+            name: {
+                "requests": len(latency),
+                "requests_per_s": round(len(latency) / elapsed, 2),
+                "status": {str(k): v for k, v in self.status[name].items()},
+                "p50_ms": percentile(latency, 50),
+                "p95_ms": percentile(latency, 95),
+                "p99_ms": percentile(latency, 99),
+            }
+            for name, latency in sorted(self.latency.items())
+        }
+
+    def job_report(self, elapsed):
+        seconds = self.job_seconds
+        return {
+            **self.jobs,
+            "completed_per_min": round(len(seconds) / elapsed * 60, 2),
+            "p50_s": percentile(seconds, 50, scale=1),
+            "p95_s": percentile(seconds, 95, scale=1),
+            "p99_s": percentile(seconds, 99, scale=1),
+        }
+
+
+async def call(client, stats, name, method, url, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.status[name]["error"] += 1
+        return None
+    stats.latency[name].append(time.perf_counter() - started)
+    stats.status[name][response.status_code] += 1
+    return response
+
+
+class VirtualUser:
+    def __init__(self, client, token, stats, args, rng, seq):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.stats = stats
+        self.args = args
+        self.rng = rng
+        self.seq = seq
+        self.documents = []
+
+    def request(self, name, method, url, **kwargs):
+        return call(
+            self.client, self.stats, name, method, url, headers=self.headers, **kwargs
+        )
+
+    async def run(self, deadline):
+        actions, weights = zip(*self.args.mix.items())
+        while time.perf_counter() < deadline:
+            action = self.rng.choices(actions, weights)[0]
+            if action == "upload":
+                await self.upload()
+            elif action == "analysis" and self.documents:
+                doc = self.rng.choice(self.documents)
+                await self.request(
+                    "analysis-get", "GET", f"/api/analysis/full-analysis/{doc}/"
+                )
+            else:
+                name, path = READS.get(action, READS["list"])
+                await self.request(name, "GET", path)
+            if self.args.think_ms:
+                await asyncio.sleep(self.rng.expovariate(1000 / self.args.think_ms))
+
+    async def upload(self):
+        pdf = corpus.build("text", self.args.pages, seed=next(self.seq))
+        checksum = hashlib.sha256(pdf).hexdigest()
+        response = await self.request(
+            "signed-upload",
+            "POST",
+            "/api/documents/supabase/signed-upload/",
+            json={
+                "file_name": "load.pdf",
+                "content_type": "application/pdf",
+                "file_size": len(pdf),
+                "checksum": checksum,
+            },
+        )
+        if response is None or response.status_code != 200:
+            return
+        target = response.json()["results"]
+        if target["upload_required"]:
+            response = await call(
+                self.client,
+                self.stats,
+                "storage-upload",
+                "PUT",
+                target["signed_url"],
+                content=pdf,
+                headers=target["headers"],
+            )
+            if response is None or response.status_code != 200:
+                return
+
+        response = await self.request(
+            "document-create",
+            "POST",
+            "/api/documents/create/",
+            json={
+                "title": f"Load {checksum[:8]}",
+                "original_name": "load.pdf",
+                "file_path": target["path"],
+                "file_size": len(pdf),
+                "mime_type": "application/pdf",
+                "checksum": checksum,
+            },
+        )
+        if response is None or response.status_code != 201:
+            return
+        doc = response.json()["id"]
+        self.documents.append(doc)
+
+        url = f"/api/analysis/full-analysis/{doc}/"
+        started = time.perf_counter()
+        response = await self.request("analysis-start", "POST", url)
+        if response is None or response.status_code != 201:
+            return
+        self.stats.jobs["started"] += 1
+        await self.wait_for_job(url, started)
+
+    async def wait_for_job(self, url, started):
+        while time.perf_counter() - started < self.args.job_timeout:
+            await asyncio.sleep(self.args.poll_interval)
+            response = await self.request("analysis-poll", "GET", url)
+            if response is None or response.status_code != 200:
+                continue
+            status = response.json()["job"]["status"]
+            if status in TERMINAL:
+                self.stats.jobs[status.lower()] += 1
+                if status == "READY":
+                    self.stats.job_seconds.append(time.perf_counter() - started)
+                return
+        self.stats.jobs["timed_out"] += 1
+
+
+async def login(client, username):
+    await client.post(
+        "/api/accounts/register/",
+        json={
+            "username": username,
+            "email": f"{username}@load.test",
+            "password": PASSWORD,
+        },
+    )
+    response = await client.post(
+        "/api/accounts/login/",
+        json={"username_or_email": username, "password": PASSWORD},
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def drive(args):
+    limits = httpx.Limits(max_connections=args.users * 2 + 10)
+    timeout = httpx.Timeout(args.job_timeout, connect=30)
+    run_id = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=timeout
+    ) as client:
+        semaphore = asyncio.Semaphore(20)
+
+        async def account(i):
+            async with semaphore:
+                return await login(client, f"load-{run_id}-{i}")
+
+        tokens = await asyncio.gather(*(account(i) for i in range(args.users)))
+
+        stats = Stats()
+        seq = itertools.count(args.seed * 1_000_000)
+        users = [
+            VirtualUser(client, token, stats, args, random.Random(args.seed + i), seq)
+            for i, token in enumerate(tokens)
+        ]
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(user.run(deadline) for user in users))
+        # Uploads started before the deadline are followed to the end, so
+        # divide by the time it took them to drain.
+        elapsed = time.perf_counter() - started
+    return stats, elapsed
+
+
+def backend_env(storage_url, openai_url, args):
+    return {
+        "SUPABASE_URL": storage_url,
+        "SUPABASE_BUCKET": args.bucket,
+        "SUPABASE_SERVICE_ROLE_KEY": "service-role-key",
+        "OPENAI_BASE_URL": openai_url,
+        "OPENAI_API_KEY": "fake",
+        # Virtual users upload and analyse far more than a free plan allows.
+        "UPLOAD_QUOTA_FREE": "1000000",
+        "LLM_DAILY_TOKENS_FREE": "1000000000",
+    }
+
+
+def spawn(args, env):
+    """Start the API server and the Celery workers; returns the processes."""
+    if args.server == "uvicorn":
+        server = ["uvicorn", "config.asgi:application"]
+        server += ["--port", str(args.port), "--workers", str(args.web_workers)]
+        server += ["--log-level", "warning"]
+    else:
+        server = ["gunicorn", "config.wsgi:application"]
+        server += ["--bind", f"127.0.0.1:{args.port}"]
+        server += ["--workers", str(args.web_workers), "--threads", str(args.threads)]
+    worker = ["celery", "-A", "config", "worker", "--loglevel", "warning"]
+    worker += ["--concurrency", str(args.celery_concurrency)]
+    env = {**os.environ, **env}
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", *command],
+            cwd=PROJECT_ROOT,
+            env=env,
+            start_new_session=True,
+        )
+        for command in (server, worker)
+    ]
+
+
+def wait_until_up(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/api/documents/list/", timeout=2)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    raise SystemExit(f"API server at {base_url} did not come up")
+
+
+def stop(processes):
+    for process in processes:
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def main(args):
+    if args.spawn:
+        args.base_url = f"http://127.0.0.1:{args.port}"
+    with ExitStack() as stack:
+        storage_url, storage = stack.enter_context(
+            fake_storage.running(
+                args.storage_latency_ms,
+                args.storage_error_rate,
+                port=args.storage_port,
+            )
+        )
+        openai_url, openai = stack.enter_context(
+            fake_openai.running(
+                port=args.openai_port,
+                latency_ms=args.openai_latency_ms,
+                jitter_ms=args.openai_jitter_ms,
+                error_rate=args.openai_error_rate,
+                seed=args.seed,
+            )
+        )
+        env = backend_env(storage_url, openai_url, args)
+        if args.spawn:
+            processes = spawn(args, env)
+            stack.callback(stop, processes)
+            wait_until_up(args.base_url)
+        else:
+            exports = " ".join(f"{k}={v}" for k, v in env.items())
+            print(f"backend environment: {exports}", file=sys.stderr)
+
+        stats, elapsed = asyncio.run(drive(args))
+        fakes = {
+            "storage": {"calls": storage.calls, "injected_errors": storage.errors},
+            "openai": {"calls": openai.calls, "injected_errors": openai.errors},
+        }
+
+    requests = sum(len(v) for v in stats.latency.values())
+    print(
+        json.dumps(
+            {
+                "base_url": args.base_url,
+                "users": args.users,
+                "mix": args.mix,
+                "duration_s": args.duration,
+                "elapsed_s": round(elapsed, 1),
+                "requests": requests,
+                "requests_per_s": round(requests / elapsed, 1),
+                "endpoints": stats.endpoints(elapsed),
+                "jobs": stats.job_report(elapsed),
+                "fakes": fakes,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="upload=1,list=4,recent=2,overview=2,event-log=1,analysis=2",
+    )
+    parser.add_argument("--think-ms", type=float, default=500)
+    parser.add_argument("--pages", type=int, default=10, help="pages per upload")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--job-timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+
+    fakes = parser.add_argument_group("fakes")
+    fakes.add_argument("--storage-port", type=int, default=54321)
+    fakes.add_argument("--storage-latency-ms", type=float, default=20)
+    fakes.add_argument("--storage-error-rate", type=float, default=0.0)
+    fakes.add_argument("--openai-port", type=int, default=54322)
+    fakes.add_argument("--openai-latency-ms", type=float, default=3000)
+    fakes.add_argument("--openai-jitter-ms", type=float, default=1000)
+    fakes.add_argument("--openai-error-rate", type=float, default=0.0)
+    fakes.add_argument("--bucket", default="documents")
+
+    spawned = parser.add_argument_group("spawned backend (--spawn)")
+    spawned.add_argument("--spawn", action="store_true")
+    spawned.add_argument("--server", choices=("uvicorn", "gunicorn"), default="uvicorn")
+    spawned.add_argument("--port", type=int, default=8000)
+    spawned.add_argument("--web-workers", type=int, default=2)
+    spawned.add_argument("--threads", type=int, default=8, help="gunicorn only")
+    spawned.add_argument("--celery-concurrency", type=int, default=4)
+    main(parser.parse_args())
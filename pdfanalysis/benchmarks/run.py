@@ -0,0 +1,258 @@
+"""
+Benchmark suite for the CPU-bound steps of the analysis pipeline.
+
+Times PDF extraction (``extract_full_text_pages``, ``extract_first_pages_text``)
+over the synthetic corpus of ``corpus.py``, the chunking step of
+``run_full_analysis`` (``store_chunks``), ``sanitize_text`` and
+``deep_sanitize``, and the document, recent-documents and event-log
+serializers. Every case runs once to warm up and then ``--repeat`` samples
+(fast cases loop inside a sample). The median is compared with
+``baseline.json``: a case slower than its baseline by more than the
+threshold (25% unless the baseline entry sets its own ``threshold``) is a
+regression, and any regression makes the run exit with status 1.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --filter extract --repeat 3
+    python benchmarks/run.py --update-baseline
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import _django
+import bench_json
+import corpus
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+MIN_SAMPLE_SECONDS = 0.05
+
+
+def extraction_cases(documents):
+    from analysis.services import extract_first_pages_text, extract_full_text_pages
+
+    for name, pdf in documents.items():
+        yield (
+            f"extract_full_text_pages[{name}]",
+            lambda pdf=pdf: extract_full_text_pages(pdf, max_pages=50),
+        )
+        yield (
+            f"extract_first_pages_text[{name}]",
+            lambda pdf=pdf: extract_first_pages_text(pdf, max_pages=2),
+        )
+
+
+def sanitize_cases(texts):
+    from analysis.tasks import deep_sanitize, sanitize_text
+
+    for name, pages in texts.items():
+        # Control characters as the extractor sometimes returns them.
+        full_text = "\x00\x07".join(pages)
+        yield f"sanitize_text[{name}]", lambda text=full_text: sanitize_text(text)
+    payload = bench_json.analysis(50)
+    yield "deep_sanitize[analysis_50_pages]", lambda: deep_sanitize(payload)
+
+
+def chunking_cases(texts):
+    from accounts.models import User
+    from analysis.models import AnalysisJob
+    from analysis.tasks import store_chunks
+    from documents.models import Document
+
+    owner = User.objects.create_user(username="bench", password="bench-pass")
+    for name, pages in texts.items():
+        doc = Document.objects.create(
+            owner=owner, title=name, file_size=1, status="PROCESSING"
+        )
+        job = AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="PROCESSING"
+        )
+
+        def run(job=job, doc=doc, pages=pages):
+            job.progress = 0
+            return store_chunks(job, doc, pages)
+
+        yield f"store_chunks[{name}]", run
+
+
+def serializer_cases():
+    from django.utils import timezone
+
+    from documents.models import Document
+    from documents.serializers import (
+        DocumentSerializer,
+        EventLogItemSerializer,
+        RecentDocumentItemSerializer,
+    )
+
+    now = timezone.now()
+    documents = [
+        Document(
+            id=i,
+            title=f"Quarterly report {i}",
+            original_name=f"report_{i}.pdf",
+            file_path=f"uploads/{i}/report.pdf",
+            file_size=1024 * i,
+            mime_type="application/pdf",
+            status="READY",
+            page_count=12,
+            language="en",
+            created_at=now - timedelta(minutes=i),
+            latest_job_id=i,
+            latest_job_status="READY",
+            latest_job_progress=100,
+            chunk_count=6,
+        )
+        for i in range(1, 101)
+    ]
+    events = [
+        {
+            "ts": now - timedelta(seconds=i),
+            "event": "FULL",
+            "stage": "finished",
+            "detail": f"FULL job finished ({i} ms)",
+            "duration_ms": i,
+            "document_id": i // 5,
+            "job_id": i,
+        }
+        for i in range(500)
+    ]
+    yield (
+        "DocumentSerializer[100]",
+        lambda: DocumentSerializer(documents, many=True).data,
+    )
+    yield (
+        "RecentDocumentItemSerializer[100]",
+        lambda: RecentDocumentItemSerializer(documents, many=True).data,
+    )
+    yield (
+        "EventLogItemSerializer[500]",
+        lambda: EventLogItemSerializer(events, many=True).data,
+    )
+
+
+def timed(fn, repeat):
+    # Fast cases are looped so one sample lasts at least MIN_SAMPLE_SECONDS
+    # and timer resolution does not turn into noise.
+    started = time.perf_counter()
+    fn()
+    once = time.perf_counter() - started
+    number = max(1, int(MIN_SAMPLE_SECONDS / max(once, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) * 1000 / number)
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "mean_ms": round(statistics.mean(samples), 4),
+        "runs": repeat,
+        "loops": number,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Per-case status against ``baseline``: ok, regression, improved or new."""
+    comparison = {}
+    for name, result in results.items():
+        entry = baseline.get("cases", {}).get(name)
+        if entry is None:
+            comparison[name] = {"status": "new"}
+            continue
+        limit = entry.get("threshold", baseline.get("threshold", threshold))
+        ratio = result["median_ms"] / entry["median_ms"]
+        if ratio > 1 + limit:
+            verdict = "regression"
+        elif ratio < 1 / (1 + limit):
+            verdict = "improved"
+        else:
+            verdict = "ok"
+        comparison[name] = {
+            "status": verdict,
+            "baseline_ms": entry["median_ms"],
+            "ratio": round(ratio, 3),
+            "threshold": limit,
+        }
+    return comparison
+
+
+def main(args):
+    _django.setup()
+
+    from analysis.services import extract_full_text_pages
+
+    documents = corpus.corpus()
+    texts = {name: extract_full_text_pages(pdf)[1] for name, pdf in documents.items()}
+
+    results = {}
+    with _django.test_database():
+        for name, fn in (
+            *extraction_cases(documents),
+            *sanitize_cases(texts),
+            *chunking_cases(texts),
+            *serializer_cases(),
+        ):
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = timed(fn, args.repeat)
+            print(f"{name}: {results[name]['median_ms']} ms", file=sys.stderr)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    report = {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(terse=True),
+        },
+        "repeat": args.repeat,
+        "cases": results,
+    }
+
+    if args.update_baseline:
+        # Cases left out by --filter keep their baseline.
+        cases = baseline.get("cases", {})
+        for name, result in results.items():
+            cases[name] = {**cases.get(name, {}), "median_ms": result["median_ms"]}
+        baseline = {
+            "threshold": baseline.get("threshold", args.threshold),
+            "environment": report["environment"],
+            "cases": cases,
+        }
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"baseline written to {baseline_path}", file=sys.stderr)
+        regressions = []
+    else:
+        report["comparison"] = compare(results, baseline, args.threshold)
+        regressions = [
+            name
+            for name, row in report["comparison"].items()
+            if row["status"] == "regression"
+        ]
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,122 @@
+"""
+Load test for the full-analysis SSE stream.
+
+Opens N concurrent subscribers against a running ASGI server and, optionally,
+publishes synthetic progress events into the shared cache so every subscriber
+has something to receive. The server and this script must share the same
+REDIS_URL for --publish to reach the subscribers.
+
+    uvicorn config.asgi:application --workers 1 --port 8000
+    python benchmarks/sse_load.py --token <jwt> --document 42 \\
+        --subscribers 5000 --publish --job 17
+
+Raise the open file limit first (``ulimit -n 20000``).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 1)
+
+
+async def subscriber(client, url, headers, stats, stop):
+    started = time.perf_counter()
+    try:
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code != 200:
+                stats["errors"] += 1
+                return
+            stats["connected"] += 1
+            first = True
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    stats["events"] += 1
+                    if first:
+                        stats["first_event"].append(time.perf_counter() - started)
+                        first = False
+                if stop.is_set():
+                    break
+    except httpx.HTTPError:
+        stats["errors"] += 1
+
+
+def publisher(job_id, rate, stop):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+
+    django.setup()
+
+    from analysis.channels import publish_job_event
+
+    progress = 0
+    while not stop.is_set():
+        progress = (progress + 1) % 100
+        publish_job_event(job_id, "progress", {"progress": progress})
+        time.sleep(1 / rate)
+
+
+async def main(args):
+    url = f"{args.base_url}/api/analysis/full-analysis/{args.document}/stream/"
+    headers = {"Authorization": f"Bearer {args.token}"}
+    stats = {"connected": 0, "errors": 0, "events": 0, "first_event": []}
+    stop = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=args.subscribers + 10)
+    timeout = httpx.Timeout(args.duration + 30, connect=30)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        tasks = [
+            asyncio.create_task(subscriber(client, url, headers, stats, stop))
+            for _ in range(args.subscribers)
+        ]
+        pub = None
+        if args.publish:
+            pub = asyncio.create_task(
+                asyncio.to_thread(publisher, args.job, args.rate, stop)
+            )
+
+        await asyncio.sleep(args.duration)
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if pub:
+            await pub
+
+    first = stats.pop("first_event")
+    result = {
+        **stats,
+        "subscribers": args.subscribers,
+        "duration_s": args.duration,
+        "events_per_s": round(stats["events"] / args.duration, 1),
+        "first_event_p50_ms": percentile(first, 50),
+        "first_event_p99_ms": percentile(first, 99),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--document", type=int, required=True)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--publish", action="store_true")
+    parser.add_argument("--job", type=int, help="job id to publish events for")
+    parser.add_argument("--rate", type=float, default=5, help="events per second")
+    asyncio.run(main(parser.parse_args()))
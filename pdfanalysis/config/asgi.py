@@ -2,6 +2,9 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The synchronous views of ``config.urls`` are served by default; setting
+``DJANGO_ROOT_URLCONF=config.urls_asgi`` opts in to the async views of the
+I/O-bound endpoints.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
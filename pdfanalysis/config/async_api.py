@@ -0,0 +1,49 @@
+"""
+DRF's ``APIView`` with coroutine handlers, for ASGI deployments.
+
+DRF views are synchronous, so under ASGI each one occupies a thread for as
+long as it waits on the database or on storage. ``AsyncAPIView`` runs DRF's
+own request pipeline (``initial``: content negotiation, authentication,
+permissions and throttles) in a thread and awaits the handler; errors go
+through ``handle_exception`` like in any other view.
+
+An async view subclasses the synchronous one it replaces, so it keeps its
+``permission_classes`` and ``pagination_class`` and only overrides the
+handlers. They are routed by ``config.urls_asgi``, which is opt-in (see
+``config.asgi``).
+"""
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication and throttles may read the database.
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            # ``options`` is DRF's synchronous metadata handler.
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = handler(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
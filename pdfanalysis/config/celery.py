@@ -2,6 +2,8 @@ import os
 
 from celery import Celery
 
+import config.metrics  # noqa: F401 - connects the task and connection signals
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 app = Celery("config")
@@ -0,0 +1,306 @@
+"""
+Prometheus metrics, served in the text exposition format at ``/metrics``.
+
+A scrape must send ``Authorization: Bearer <METRICS_TOKEN>``; without a
+token configured the endpoint answers 404, so it is never public.
+
+Updated on the hot path (a histogram observation each, no I/O):
+
+- ``http_request_duration_seconds`` and ``http_request_db_queries`` per URL
+  name of the ``documents``, ``analysis`` and ``accounts`` views, recorded
+  by ``MetricsMiddleware``. Other views share the ``other`` route and
+  unresolved paths the ``unmatched`` one, so the label set stays bounded.
+- ``celery_task_duration_seconds`` per task and final state, from the
+  Celery task signals.
+- ``external_call_duration_seconds`` per service (``openai``, ``storage``),
+  operation and outcome, from ``external_call``; the error rate is the
+  share of ``outcome="error"``.
+
+Computed when scraped: ``analysis_jobs_in_flight`` (pending and processing
+jobs) and ``celery_queue_length`` (messages waiting in
+``METRICS_CELERY_QUEUES``).
+
+Multiprocess mode: when ``PROMETHEUS_MULTIPROC_DIR`` is set (before start,
+to an emptied directory shared by the processes of one host) every process
+writes its samples there and a scrape aggregates them, which is what
+gunicorn workers and Celery's prefork pool need. A Celery worker serves its
+own metrics on ``METRICS_WORKER_PORT``; with the prefork pool the tasks run
+in child processes, so that also needs multiprocess mode.
+"""
+
+import hmac
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery import signals
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseNotFound
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # pragma: no cover - prometheus_client is in requirements.txt
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# Views of these apps are labelled with their URL name.
+ROUTE_APPS = frozenset(("documents", "analysis", "accounts"))
+ACTIVE_JOB_STATUSES = ("PENDING", "PROCESSING")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+TASK_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+CALL_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+if prometheus_client is not None:
+    REGISTRY = prometheus_client.CollectorRegistry()
+    REQUEST_SECONDS = prometheus_client.Histogram(
+        "http_request_duration_seconds",
+        "Time to produce an HTTP response.",
+        ("method", "route", "status"),
+        buckets=LATENCY_BUCKETS,
+        registry=REGISTRY,
+    )
+    REQUEST_QUERIES = prometheus_client.Histogram(
+        "http_request_db_queries",
+        "Database queries run while handling an HTTP request.",
+        ("route",),
+        buckets=QUERY_BUCKETS,
+        registry=REGISTRY,
+    )
+    TASK_SECONDS = prometheus_client.Histogram(
+        "celery_task_duration_seconds",
+        "Run time of a Celery task by its final state.",
+        ("task", "state"),
+        buckets=TASK_BUCKETS,
+        registry=REGISTRY,
+    )
+    EXTERNAL_CALL_SECONDS = prometheus_client.Histogram(
+        "external_call_duration_seconds",
+        "Latency of calls to the LLM and storage APIs.",
+        ("service", "operation", "outcome"),
+        buckets=CALL_BUCKETS,
+        registry=REGISTRY,
+    )
+else:  # pragma: no cover
+    REQUEST_SECONDS = REQUEST_QUERIES = TASK_SECONDS = EXTERNAL_CALL_SECONDS = None
+
+
+def multiprocess_mode():
+    return prometheus_client is not None and bool(
+        os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    )
+
+
+@contextmanager
+def external_call(service, operation):
+    """Time the enclosed call; an exception counts as ``outcome="error"``."""
+    if EXTERNAL_CALL_SECONDS is None:  # pragma: no cover
+        yield
+        return
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALL_SECONDS.labels(service, operation, outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+# Query counter of the request being handled. A one-item list, so the
+# threads ``sync_to_async`` runs the ORM in (which copy the context) add to
+# the same count.
+_queries = ContextVar("metrics_queries", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _queries.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def instrument_connection(connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+# ``config`` imports this module with the Celery app, before any connection
+# is opened.
+connection_created.connect(instrument_connection)
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    app = match.func.__module__.partition(".")[0]
+    if app in ROUTE_APPS and match.url_name:
+        return match.url_name
+    return "other"
+
+
+class MetricsMiddleware:
+    """Request latency and query count per route; first in ``MIDDLEWARE``."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if REQUEST_SECONDS is None or not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = [0]
+        token = _queries.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, started, counter[0])
+        return response
+
+    async def __acall__(self, request):
+        counter = [0]
+        token = _queries.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, started, counter[0])
+        return response
+
+    @staticmethod
+    def observe(request, response, started, queries):
+        route = route_name(request)
+        REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(
+            time.perf_counter() - started
+        )
+        REQUEST_QUERIES.labels(route).observe(queries)
+
+
+class InFlightJobsCollector:
+    """``analysis_jobs_in_flight`` by job type and status, read when scraped."""
+
+    def collect(self):
+        from django.db.models import Count
+
+        from analysis.models import AnalysisJob
+
+        family = GaugeMetricFamily(
+            "analysis_jobs_in_flight",
+            "Analysis jobs that are pending or processing.",
+            labels=("job_type", "status"),
+        )
+        counts = {
+            (row["job_type"], row["status"]): row["n"]
+            for row in AnalysisJob.objects.filter(status__in=ACTIVE_JOB_STATUSES)
+            .values("job_type", "status")
+            .annotate(n=Count("id"))
+        }
+        for job_type in ("PREVIEW", "FULL"):
+            for status in ACTIVE_JOB_STATUSES:
+                family.add_metric([job_type, status], counts.get((job_type, status), 0))
+        yield family
+
+
+class QueueDepthCollector:
+    """``celery_queue_length`` of ``METRICS_CELERY_QUEUES``, read when scraped."""
+
+    def collect(self):
+        from kombu import Queue
+
+        from config.celery import app
+
+        family = GaugeMetricFamily(
+            "celery_queue_length",
+            "Messages waiting in a Celery queue.",
+            labels=("queue",),
+        )
+        queues = settings.METRICS_CELERY_QUEUES
+        if queues:
+            try:
+                with app.connection_for_read() as conn:
+                    conn.ensure_connection(max_retries=1)
+                    channel = conn.default_channel
+                    for name in queues:
+                        # Declared the way Celery declares it: a passive
+                        # declare fails for an empty Redis queue.
+                        queue = app.amqp.queues.get(name) or Queue(name)
+                        family.add_metric([name], queue(channel).queue_declare()[1])
+            except Exception:
+                logger.warning("celery queue length unavailable", exc_info=True)
+        yield family
+
+
+def scrape_registry():
+    """The registry a scrape of this process reads."""
+    if not multiprocess_mode():
+        return REGISTRY
+    registry = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def state_registry():
+    registry = prometheus_client.CollectorRegistry(auto_describe=False)
+    registry.register(InFlightJobsCollector())
+    registry.register(QueueDepthCollector())
+    return registry
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if prometheus_client is None or not settings.METRICS_ENABLED or not token:
+        return HttpResponseNotFound()
+    if not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+    body = prometheus_client.generate_latest(
+        scrape_registry()
+    ) + prometheus_client.generate_latest(state_registry())
+    return HttpResponse(body, content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+_task_started = {}
+
+
+@signals.task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@signals.task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None or TASK_SECONDS is None:
+        return
+    TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(
+        time.perf_counter() - started
+    )
+
+
+@signals.worker_init.connect
+def _serve_worker_metrics(**kwargs):
+    port = settings.METRICS_WORKER_PORT
+    if prometheus_client is None or not settings.METRICS_ENABLED or not port:
+        return
+    prometheus_client.start_http_server(port, registry=scrape_registry())
@@ -0,0 +1,87 @@
+"""
+Response compression for the JSON API.
+
+Analysis payloads and document listings are large and compress well, but
+most responses are small and streamed ones (SSE progress) must reach the
+client event by event. ``ResponseCompressionMiddleware`` therefore only
+compresses complete responses whose content type is in
+``RESPONSE_COMPRESSION_TYPES`` and whose body is at least
+``RESPONSE_COMPRESSION_MIN_BYTES``, with brotli when the client accepts it
+and the ``brotli`` package is installed, otherwise gzip.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is in requirements.txt
+    brotli = None
+
+
+def accepted_encodings(header):
+    """Codings in an ``Accept-Encoding`` header with a non-zero q-value."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(
+            content,
+            mode=brotli.MODE_TEXT,
+            quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY,
+        )
+    return gzip.compress(
+        content, compresslevel=settings.RESPONSE_COMPRESSION_GZIP_LEVEL, mtime=0
+    )
+
+
+class ResponseCompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").partition(";")[0].strip()
+        if content_type not in settings.RESPONSE_COMPRESSION_TYPES:
+            return response
+        if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = encoding
+
+        # A strong ETag names one representation; the compressed body is
+        # another, so it is weakened (as GZipMiddleware does). Conditional
+        # requests compare ETags weakly and still match.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
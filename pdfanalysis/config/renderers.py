@@ -0,0 +1,74 @@
+"""
+orjson-backed JSON rendering and parsing.
+
+``ORJSONRenderer`` and ``ORJSONParser`` are DRF's ``JSONRenderer`` and
+``JSONParser`` with the (de)serialization done by orjson, which is two to
+three times faster on large nested payloads such as ``analysis_json``.
+Output is the same bytes DRF writes: compact, UTF-8, datetimes, decimals and
+lazy strings through DRF's ``JSONEncoder``, U+2028/U+2029 escaped. When
+orjson is not installed, or for what orjson cannot express (``; indent=``
+requests, ``UNICODE_JSON = False``), both fall back to DRF's implementation.
+
+``loads`` is the same choice for code that parses JSON outside a request,
+like the LLM responses in ``analysis.helpers.ai_analysis``.
+"""
+
+import codecs
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder so they keep its format (``Z``
+    # suffix, millisecond precision).
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_encoder = JSONEncoder()
+
+
+def loads(data):
+    """Parse a JSON document (``str`` or ``bytes``)."""
+    if orjson is None:
+        return json.loads(data)
+    return orjson.loads(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = get_encoding(parser_context or {})
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
@@ -61,8 +61,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "config.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.middleware.ResponseCompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -75,6 +77,15 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "config.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 CELERY_RESULT_BACKEND = "django-db"
@@ -89,7 +100,8 @@ SIMPLE_JWT = {
 }
 
 
-ROOT_URLCONF = "config.urls"
+# config.urls_asgi opts an ASGI deployment in to the async views.
+ROOT_URLCONF = os.getenv("DJANGO_ROOT_URLCONF", "config.urls")
 
 TEMPLATES = [
     {
@@ -142,6 +154,127 @@ CELERY_TIMEZONE = "Europe/Istanbul"
 # Windows için öneri: sonuç şişmesin
 CELERY_TASK_IGNORE_RESULT = True
 
+# Overview counters are kept incrementally; this repairs any drift.
+DOCUMENT_STATS_RECONCILE_SECONDS = int(
+    os.getenv("DOCUMENT_STATS_RECONCILE_SECONDS", "3600")
+)
+# Analysis events older than the retention period move to the archive table.
+ANALYSIS_EVENT_RETENTION_DAYS = int(os.getenv("ANALYSIS_EVENT_RETENTION_DAYS", "90"))
+ANALYSIS_EVENT_ARCHIVE_SECONDS = int(
+    os.getenv("ANALYSIS_EVENT_ARCHIVE_SECONDS", "86400")
+)
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-document-stats": {
+        "task": "documents.tasks.reconcile_document_stats",
+        "schedule": DOCUMENT_STATS_RECONCILE_SECONDS,
+    },
+    "archive-analysis-events": {
+        "task": "analysis.tasks.archive_analysis_events",
+        "schedule": ANALYSIS_EVENT_ARCHIVE_SECONDS,
+    },
+}
+
+# Cache (analysis job event channel). Redis is required when the API and the
+# Celery workers run in separate processes; local memory is enough for tests.
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+ANALYSIS_EVENT_TTL = int(os.getenv("ANALYSIS_EVENT_TTL", "3600"))
+ANALYSIS_STREAM_POLL_INTERVAL = float(os.getenv("ANALYSIS_STREAM_POLL_INTERVAL", "0.5"))
+ANALYSIS_STREAM_HEARTBEAT = float(os.getenv("ANALYSIS_STREAM_HEARTBEAT", "15"))
+ANALYSIS_STREAM_MAX_SECONDS = float(os.getenv("ANALYSIS_STREAM_MAX_SECONDS", "300"))
+
+# Cache-Control max-age for analysis responses of finished jobs
+ANALYSIS_TERMINAL_MAX_AGE = int(os.getenv("ANALYSIS_TERMINAL_MAX_AGE", "60"))
+
+# Most jobs read by the per-stage timing report, latest first
+ANALYSIS_STAGE_STATS_MAX_JOBS = int(os.getenv("ANALYSIS_STAGE_STATS_MAX_JOBS", "10000"))
+
+# Per-user response cache of the list and analysis GETs. Writes invalidate a
+# user's entries; the TTL only bounds what is left behind. 0 disables it.
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+# Upload quota: uploads per sliding window, per plan. User.upload_limit
+# overrides the plan. The window is counted in cache buckets and re-seeded from
+# the database every UPLOAD_QUOTA_RECONCILE_SECONDS.
+UPLOAD_QUOTA_PLANS = {
+    "free": int(os.getenv("UPLOAD_QUOTA_FREE", "15")),
+    "pro": int(os.getenv("UPLOAD_QUOTA_PRO", "200")),
+}
+UPLOAD_QUOTA_WINDOW_SECONDS = int(os.getenv("UPLOAD_QUOTA_WINDOW_SECONDS", "86400"))
+UPLOAD_QUOTA_BUCKET_SECONDS = int(os.getenv("UPLOAD_QUOTA_BUCKET_SECONDS", "3600"))
+UPLOAD_QUOTA_RECONCILE_SECONDS = int(
+    os.getenv("UPLOAD_QUOTA_RECONCILE_SECONDS", "3600")
+)
+
+# Batch signed uploads: files per request and concurrent storage calls.
+SIGNED_UPLOAD_BATCH_MAX = int(os.getenv("SIGNED_UPLOAD_BATCH_MAX", "100"))
+SIGNED_UPLOAD_CONCURRENCY = int(os.getenv("SIGNED_UPLOAD_CONCURRENCY", "8"))
+
+# Compressed text columns (chunk text, raw LLM output): "zstd", "zlib" or
+# "none". Values shorter than TEXT_COMPRESSION_MIN_BYTES are stored plain.
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "zstd")
+TEXT_COMPRESSION_MIN_BYTES = int(os.getenv("TEXT_COMPRESSION_MIN_BYTES", "256"))
+
+# Response compression: JSON bodies of at least RESPONSE_COMPRESSION_MIN_BYTES,
+# brotli when accepted, otherwise gzip. Streaming responses (SSE) are skipped.
+RESPONSE_COMPRESSION_MIN_BYTES = int(
+    os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")
+)
+RESPONSE_COMPRESSION_TYPES = ("application/json",)
+RESPONSE_COMPRESSION_GZIP_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "6"))
+RESPONSE_COMPRESSION_BROTLI_QUALITY = int(
+    os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", "4")
+)
+
+# Daily LLM token ceiling (prompt + completion tokens, UTC days) per plan; a
+# user's llm_daily_tokens overrides it. A call is only made while its upper
+# bound (prompt + max_tokens) still fits.
+LLM_DAILY_TOKENS_PLANS = {
+    "free": int(os.getenv("LLM_DAILY_TOKENS_FREE", "200000")),
+    "pro": int(os.getenv("LLM_DAILY_TOKENS_PRO", "2000000")),
+}
+# Prompt budget (in the model's tokens, system prompt included) and
+# max_tokens of each LLM call.
+LLM_INPUT_TOKENS = {
+    "analysis": int(os.getenv("LLM_ANALYSIS_INPUT_TOKENS", "30000")),
+    "suggestions": int(os.getenv("LLM_SUGGESTIONS_INPUT_TOKENS", "20000")),
+}
+LLM_OUTPUT_TOKENS = {
+    "analysis": int(os.getenv("LLM_ANALYSIS_OUTPUT_TOKENS", "2000")),
+    "suggestions": int(os.getenv("LLM_SUGGESTIONS_OUTPUT_TOKENS", "1200")),
+}
+# USD per million prompt and completion tokens, for LLMUsage.cost_usd.
+LLM_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Prometheus metrics at /metrics (config.metrics). A scrape must send
+# "Authorization: Bearer <METRICS_TOKEN>"; without a token the endpoint is off.
+# Set PROMETHEUS_MULTIPROC_DIR for gunicorn workers and the Celery prefork
+# pool; a Celery worker serves its metrics, unauthenticated, on
+# METRICS_WORKER_PORT (0: off), which must stay internal.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("1", "true", "yes", "on")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_WORKER_PORT = int(os.getenv("METRICS_WORKER_PORT", "0"))
+METRICS_CELERY_QUEUES = tuple(
+    q for q in os.getenv("METRICS_CELERY_QUEUES", "celery").split(",") if q
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
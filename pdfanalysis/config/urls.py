@@ -18,9 +18,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from config.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/accounts/", include("accounts.urls")),
     path("api/documents/", include("documents.urls")),
     path("api/analysis/", include("analysis.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,42 @@
+"""
+Opt-in URL configuration for ASGI deployments
+(``DJANGO_ROOT_URLCONF=config.urls_asgi``).
+
+The I/O-bound endpoints are served by their async views; everything else
+falls through to ``config.urls``. Names are shared, so ``reverse()`` gives
+the same paths under both deployments.
+"""
+
+from django.urls import path
+
+from analysis.views import AsyncDocumentFullAnalysisView
+from config.urls import urlpatterns as sync_urlpatterns
+from documents.views import (
+    AsyncDocumentListView,
+    AsyncSignedUploadURLBatchView,
+    AsyncSignedUploadURLView,
+)
+
+urlpatterns = [
+    path(
+        "api/documents/list/",
+        AsyncDocumentListView.as_view(),
+        name="document-list",
+    ),
+    path(
+        "api/documents/supabase/signed-upload/",
+        AsyncSignedUploadURLView.as_view(),
+        name="signed-upload",
+    ),
+    path(
+        "api/documents/supabase/signed-upload/batch/",
+        AsyncSignedUploadURLBatchView.as_view(),
+        name="signed-upload-batch",
+    ),
+    path(
+        "api/analysis/full-analysis/<int:id>/",
+        AsyncDocumentFullAnalysisView.as_view(),
+        name="analysis-full",
+    ),
+    *sync_urlpatterns,
+]
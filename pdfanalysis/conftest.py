@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cache içeriğinin testler arasında taşınmasını engeller."""
+    cache.clear()
+    yield
+    cache.clear()
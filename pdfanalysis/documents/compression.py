@@ -0,0 +1,236 @@
+"""
+Transparent compression for the large text columns (chunk text, raw LLM output).
+
+``CompressedTextField`` stores text as bytes in one of two forms:
+
+* ``MARKER`` + codec byte + compressed payload: zstd frames, or zlib streams
+  when ``TEXT_COMPRESSION`` is ``"zlib"`` or the ``zstandard`` package is not
+  installed;
+* plain UTF-8 for values shorter than ``TEXT_COMPRESSION_MIN_BYTES`` and for
+  rows written before the column was compressed. ``MARKER`` (0xFF) never
+  occurs in UTF-8, so the two cannot be confused and
+  ``compress_text_columns`` can convert a table in place.
+
+Rows are loaded compressed and only decompressed on first attribute access,
+so code that passes a row through without reading the text never pays for
+it. ``values()`` / ``values_list()`` return the stored bytes; ``decompress``
+turns them into text.
+
+zstd compresses with the newest ``CompressionDictionary`` trained for the
+field's ``dictionary`` name (``train_compression_dictionary``). The frame
+records the dictionary id, so rows written with an older dictionary stay
+readable after a new one is trained.
+"""
+
+import time
+import zlib
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is in requirements.txt
+    zstandard = None
+
+MARKER = b"\xff"
+ZSTD = b"z"
+ZLIB = b"d"
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# Newest dictionary per name, re-read after DICTIONARY_TTL seconds so workers
+# pick up a freshly trained one without a restart.
+DICTIONARY_TTL = 300
+_current = {}
+_by_id = {}
+
+
+def codec():
+    """The codec new values are written with: ``"zstd"``, ``"zlib"`` or ``"none"``."""
+    name = settings.TEXT_COMPRESSION
+    if name == "zstd" and zstandard is None:
+        return "zlib"
+    return name
+
+
+def is_compressed(value):
+    return not isinstance(value, str) and bytes(value[:1]) == MARKER
+
+
+def stored_dictionary_id(value):
+    """Dictionary id of a stored zstd value, 0 for anything else."""
+    value = bytes(value)
+    if value[:2] != MARKER + ZSTD:
+        return 0
+    return zstandard.get_frame_parameters(value[2:]).dict_id
+
+
+def _target_dictionary_id(dictionary):
+    dict_data = current_dictionary(dictionary) if dictionary else None
+    return dict_data.dict_id() if dict_data is not None else 0
+
+
+def is_current(value, dictionary=None):
+    """Whether a stored value is in the form ``compress`` would write now."""
+    value = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+    name = codec()
+    if not is_compressed(value):
+        return name == "none" or len(value) < settings.TEXT_COMPRESSION_MIN_BYTES
+    if name == "zlib":
+        return value[1:2] == ZLIB
+    if name == "zstd":
+        return value[1:2] == ZSTD and stored_dictionary_id(value) == (
+            _target_dictionary_id(dictionary)
+        )
+    return False
+
+
+def compress(text, dictionary=None):
+    """Stored form of ``text`` for a field using ``dictionary``."""
+    data = text.encode("utf-8")
+    name = codec()
+    if name == "none" or len(data) < settings.TEXT_COMPRESSION_MIN_BYTES:
+        return data
+    if name == "zlib":
+        return MARKER + ZLIB + zlib.compress(data, ZLIB_LEVEL)
+
+    dict_data = current_dictionary(dictionary) if dictionary else None
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+    return MARKER + ZSTD + compressor.compress(data)
+
+
+def decompress(value):
+    """Text of a stored value, compressed or plain."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not is_compressed(value):
+        return value.decode("utf-8")
+
+    kind, payload = value[1:2], value[2:]
+    if kind == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if kind == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed text needs the zstandard package.")
+        dict_id = zstandard.get_frame_parameters(payload).dict_id
+        dict_data = dictionary_by_id(dict_id) if dict_id else None
+        decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+        return decompressor.decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown text compression codec {kind!r}.")
+
+
+def _load(row):
+    dict_data = zstandard.ZstdCompressionDict(
+        bytes(row.data), dict_type=zstandard.DICT_TYPE_FULLDICT
+    )
+    dict_data.precompute_compress(level=ZSTD_LEVEL)
+    return dict_data
+
+
+def current_dictionary(name):
+    """Newest trained dictionary for ``name``, or None."""
+    cached = _current.get(name)
+    if cached is not None and time.monotonic() - cached[0] < DICTIONARY_TTL:
+        return cached[1]
+
+    from documents.models import CompressionDictionary
+
+    row = CompressionDictionary.objects.filter(name=name).order_by("-id").first()
+    dict_data = _load(row) if row is not None else None
+    if row is not None:
+        _by_id[row.dict_id] = dict_data
+    _current[name] = (time.monotonic(), dict_data)
+    return dict_data
+
+
+def dictionary_by_id(dict_id):
+    dict_data = _by_id.get(dict_id)
+    if dict_data is None:
+        from documents.models import CompressionDictionary
+
+        row = CompressionDictionary.objects.get(dict_id=dict_id)
+        dict_data = _by_id[dict_id] = _load(row)
+    return dict_data
+
+
+def clear_dictionary_cache():
+    _current.clear()
+    _by_id.clear()
+
+
+def train_dictionary(samples, size):
+    """Train a zstd dictionary of at most ``size`` bytes on ``samples`` (text)."""
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary needs the zstandard package.")
+    encoded = [sample.encode("utf-8") for sample in samples]
+    return zstandard.train_dictionary(size, encoded, level=ZSTD_LEVEL)
+
+
+def compressed_columns():
+    """``(model, field)`` for every ``CompressedTextField`` of the installed models."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, CompressedTextField):
+                yield model, field
+
+
+class CompressedText(DeferredAttribute):
+    """Decompresses the stored value on first access and keeps the text."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, (bytes, memoryview)):
+            value = instance.__dict__[self.field.attname] = decompress(value)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.BinaryField):
+    """
+    Text column stored compressed (see the module docstring).
+
+    Assign and read ``str``; assigning ``bytes`` stores them as they are,
+    which is how already compressed values are copied between rows.
+    """
+
+    descriptor_class = CompressedText
+
+    def __init__(self, *args, dictionary=None, **kwargs):
+        self.dictionary = dictionary
+        super().__init__(*args, **kwargs)
+
+    def _check_str_default_value(self):
+        return []
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dictionary is not None:
+            kwargs["dictionary"] = self.dictionary
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, memoryview):
+            return bytes(value)
+        return value
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            return compress(value, self.dictionary)
+        if isinstance(value, memoryview):
+            return bytes(value)
+        return value
+
+    def to_python(self, value):
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,92 @@
+"""
+Conditional GET helpers shared by the document and analysis views.
+
+Views compute cheap validators (ids, statuses, ``updated_at``) and hand the
+expensive part of the response to ``conditional_response`` as a callable, so
+a matching ``If-None-Match`` returns 304 before anything is serialized.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from documents.models import Document
+
+REVALIDATE = {"private": True, "no_cache": True}
+
+_OWNER_AGGREGATES = {"last_modified": Max("updated_at"), "total": Count("id")}
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def conditional_response(request, etag, last_modified, build, cache_control=None):
+    """
+    Return 304 when the request validators match, otherwise ``build()``.
+
+    ``last_modified`` may be ``None`` for representations that change without
+    a timestamp (e.g. live progress); those are validated by ETag only.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+    return _with_validators(response, etag, timestamp, cache_control)
+
+
+async def aconditional_response(
+    request, etag, last_modified, build, cache_control=None
+):
+    """``conditional_response`` for async views; ``build`` is a coroutine function."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await build()
+    return _with_validators(response, etag, timestamp, cache_control)
+
+
+def _with_validators(response, etag, timestamp, cache_control):
+    response["ETag"] = etag
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp)
+    patch_cache_control(response, **(cache_control or REVALIDATE))
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def owner_documents_validators(request, scope: str):
+    """
+    ETag and Last-Modified for views that list or aggregate a user's documents.
+
+    Soft deletes and status changes bump ``updated_at``, so the newest
+    ``updated_at`` plus the row count identify the state of every document the
+    user owns. The full path keeps pages and filters apart.
+    """
+    agg = Document.objects.filter(owner=request.user).aggregate(**_OWNER_AGGREGATES)
+    return _owner_validators(request, scope, agg)
+
+
+async def aowner_documents_validators(request, scope: str):
+    agg = await Document.objects.filter(owner=request.user).aaggregate(
+        **_OWNER_AGGREGATES
+    )
+    return _owner_validators(request, scope, agg)
+
+
+def _owner_validators(request, scope, agg):
+    etag = make_etag(
+        scope,
+        request.user.pk,
+        request.get_full_path(),
+        agg["total"],
+        agg["last_modified"].isoformat() if agg["last_modified"] else "",
+    )
+    return etag, agg["last_modified"]
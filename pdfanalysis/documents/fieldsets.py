@@ -0,0 +1,91 @@
+"""
+Sparse fieldsets: ``?fields=a,b`` keeps only the named fields of a response,
+``?exclude=c`` drops the named ones.
+
+Views resolve the selection once with ``requested_fields`` and use it twice:
+serializers built with ``DynamicFieldsMixin`` drop the other fields, and
+``only_fields`` narrows the queryset to the columns behind the selection, so
+columns nobody asked for are never read and related tables (the preview in
+``DocumentAnalysis``) are only joined when one of their fields is selected.
+"""
+
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+
+
+def _names(request, param):
+    raw = request.query_params.get(param)
+    if raw is None:
+        return None
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+def requested_fields(request, available, default=None):
+    """
+    The fields of ``available`` selected by the request, in their own order.
+
+    ``default`` is the selection when ``?fields=`` is absent (all of
+    ``available`` unless given). Unknown names are a 400, not a silent no-op.
+    """
+    fields = _names(request, FIELDS_PARAM)
+    exclude = _names(request, EXCLUDE_PARAM) or []
+
+    unknown = sorted(set(fields or []).union(exclude).difference(available))
+    if unknown:
+        raise ValidationError(
+            {FIELDS_PARAM: [f"Unknown field(s): {', '.join(unknown)}."]}
+        )
+
+    selected = set(fields) if fields is not None else set(default or available)
+    return tuple(name for name in available if name in selected and name not in exclude)
+
+
+def model_columns(serializer_class, fields, always=("id",)):
+    """
+    ``.only()`` arguments for a ``serializer_class`` restricted to ``fields``.
+
+    Fields whose source is a concrete model field map to it. Computed fields
+    list the columns they read in ``Meta.field_columns``, which may follow a
+    relation (``analysis__preview_text``); anything else is left to the
+    serializer. ``always`` is kept for lookups the view itself needs, such
+    as pagination keys.
+    """
+    meta = serializer_class.Meta
+    concrete = {f.attname for f in meta.model._meta.concrete_fields}
+    declared = serializer_class._declared_fields
+    field_columns = getattr(meta, "field_columns", {})
+    columns = dict.fromkeys(always)
+    for name in fields:
+        field = declared.get(name)
+        source = field.source if field is not None and field.source else name
+        for column in field_columns.get(name, (source,)):
+            if column in concrete or "__" in column:
+                columns[column] = None
+    return tuple(columns)
+
+
+def only_fields(queryset, serializer_class, fields, always=("id",)):
+    """``queryset`` loading just the columns ``fields`` needs."""
+    columns = model_columns(serializer_class, fields, always)
+    related = {column.split("__")[0] for column in columns if "__" in column}
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin taking a ``fields=`` selection at construction.
+
+    Without one, ``Meta.default_fields`` applies when the serializer has it.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = getattr(self.Meta, "default_fields", None)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from documents.compression import (
+    compress,
+    compressed_columns,
+    decompress,
+    is_compressed,
+    is_current,
+)
+
+
+def stored_size(value):
+    return len(value.encode("utf-8") if isinstance(value, str) else value)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compress the values of compressed text columns that are still stored "
+        "as plain text, in batches. With --recompress, values written with "
+        "another codec or an older dictionary are rewritten as well."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--recompress",
+            action="store_true",
+            help="Also rewrite values compressed with another codec or dictionary.",
+        )
+
+    def handle(self, *args, batch_size, recompress, **options):
+        for model, field in compressed_columns():
+            scanned, rewritten, before, after = self._compress(
+                model, field, batch_size, recompress
+            )
+            self.stdout.write(
+                f"{model._meta.label}.{field.name}: {scanned} rows scanned, "
+                f"{rewritten} rewritten ({before} -> {after} bytes)."
+            )
+
+    def _compress(self, model, field, batch_size, recompress):
+        last_pk = 0
+        scanned = rewritten = before = after = 0
+
+        while True:
+            # Rows are locked while their batch is rewritten, so a concurrent
+            # writer cannot be overwritten with the value read here.
+            with transaction.atomic():
+                rows = list(
+                    model.objects.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", field.attname)[:batch_size]
+                )
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+                scanned += len(rows)
+
+                changed = []
+                for pk, value in rows:
+                    if value is None or is_current(value, field.dictionary):
+                        continue
+                    if is_compressed(value) and not recompress:
+                        continue
+                    stored = compress(decompress(value), field.dictionary)
+                    before += stored_size(value)
+                    after += len(stored)
+                    changed.append(model(pk=pk, **{field.attname: stored}))
+
+                if changed:
+                    model.objects.bulk_update(changed, [field.name])
+                rewritten += len(changed)
+
+        return scanned, rewritten, before, after
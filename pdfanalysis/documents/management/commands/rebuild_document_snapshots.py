@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.models import Document
+
+SNAPSHOT_FIELDS = ("chunk_count", *Document.LATEST_JOB_FIELDS)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the denormalized chunk_count / latest_job_* fields of documents "
+        "in batches, or only report the inconsistent ones with --check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report documents whose snapshot is out of date.",
+        )
+
+    def handle(self, *args, batch_size, check, **options):
+        last_id = 0
+        scanned = stale = 0
+
+        while True:
+            batch = list(
+                Document.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", *SNAPSHOT_FIELDS)
+                .with_computed_snapshot()[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            scanned += len(batch)
+
+            changed = [doc for doc in batch if self._refresh(doc)]
+            stale += len(changed)
+            if check:
+                for doc in changed:
+                    self.stdout.write(f"document {doc.id}: snapshot out of date")
+            elif changed:
+                Document.objects.bulk_update(changed, SNAPSHOT_FIELDS)
+
+        verb = "out of date" if check else "rebuilt"
+        self.stdout.write(f"{scanned} documents scanned, {stale} {verb}.")
+        if check and stale:
+            raise CommandError(f"{stale} document snapshots are inconsistent.")
+
+    def _refresh(self, doc):
+        fresh = {field: getattr(doc, f"computed_{field}") for field in SNAPSHOT_FIELDS}
+        if all(getattr(doc, field) == value for field, value in fresh.items()):
+            return False
+        for field, value in fresh.items():
+            setattr(doc, field, value)
+        return True
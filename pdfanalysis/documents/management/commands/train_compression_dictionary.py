@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.compression import (
+    clear_dictionary_cache,
+    compressed_columns,
+    decompress,
+    train_dictionary,
+)
+from documents.models import CompressionDictionary
+
+
+class Command(BaseCommand):
+    help = (
+        "Train a zstd dictionary on the most recent values of the compressed "
+        "text columns sharing --name. New values use it right away; run "
+        "compress_text_columns --recompress to apply it to existing rows."
+    )
+
+    def add_arguments(self, parser):
+        names = sorted({field.dictionary for _, field in compressed_columns()})
+        parser.add_argument("--name", required=True, choices=names)
+        parser.add_argument("--samples", type=int, default=5000)
+        parser.add_argument(
+            "--size", type=int, default=112640, help="Dictionary size in bytes."
+        )
+
+    def handle(self, *args, name, samples, size, **options):
+        texts = []
+        for model, field in compressed_columns():
+            if field.dictionary != name:
+                continue
+            values = (
+                model.objects.order_by("-pk")
+                .exclude(**{field.attname: ""})
+                .values_list(field.attname, flat=True)[:samples]
+            )
+            texts.extend(decompress(value) for value in values)
+
+        try:
+            dict_data = train_dictionary(texts, size)
+        except Exception as e:
+            raise CommandError(
+                f"Could not train a dictionary on {len(texts)} samples: {e}"
+            ) from e
+
+        CompressionDictionary.objects.create(
+            name=name,
+            dict_id=dict_data.dict_id(),
+            data=dict_data.as_bytes(),
+            sample_count=len(texts),
+        )
+        clear_dictionary_cache()
+        self.stdout.write(
+            f"Dictionary {name} #{dict_data.dict_id()} trained on {len(texts)} "
+            f"samples ({len(dict_data)} bytes)."
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0005_document_ai_raw"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="chunk_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="latest_job_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="latest_job_progress",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="latest_job_status",
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+    ]
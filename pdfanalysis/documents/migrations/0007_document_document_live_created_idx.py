@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0006_document_chunk_count_document_latest_job_id_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["owner", "-created_at", "-id"],
+                name="document_live_created_idx",
+            ),
+        ),
+    ]
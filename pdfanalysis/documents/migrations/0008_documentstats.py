@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_delete_dailyusage"),
+        ("documents", "0007_document_document_live_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentStats",
+            fields=[
+                (
+                    "owner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="document_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("total_documents", models.IntegerField(default=0)),
+                ("processing", models.IntegerField(default=0)),
+                ("ready", models.IntegerField(default=0)),
+                ("errors", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-19 01:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0008_documentstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentAnalysis",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="analysis",
+                        serialize=False,
+                        to="documents.document",
+                    ),
+                ),
+                ("preview_text", models.TextField(blank=True)),
+                ("analysis_json", models.JSONField(blank=True, null=True)),
+                ("analysis_text", models.TextField(blank=True, default="")),
+                ("ai_raw", models.TextField(blank=True, default="")),
+                ("version", models.PositiveIntegerField(default=0)),
+                ("job_id", models.BigIntegerField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DocumentAnalysisVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField()),
+                ("job_id", models.BigIntegerField(blank=True, null=True)),
+                ("analysis_json", models.JSONField(blank=True, null=True)),
+                ("analysis_text", models.TextField(blank=True, default="")),
+                ("ai_raw", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField()),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="analysis_versions",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-version"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("document", "version"),
+                        name="document_analysis_version_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
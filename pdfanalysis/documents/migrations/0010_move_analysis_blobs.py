@@ -0,0 +1,81 @@
+from django.db import migrations
+from django.db.models import Q
+
+BATCH_SIZE = 2000
+BLOB_FIELDS = ("preview_text", "analysis_json", "analysis_text", "ai_raw")
+
+
+def move_blobs(apps, schema_editor):
+    """Copy the preview and analysis of every document into DocumentAnalysis."""
+    Document = apps.get_model("documents", "Document")
+    DocumentAnalysis = apps.get_model("documents", "DocumentAnalysis")
+
+    has_blobs = (
+        Q(analysis_json__isnull=False)
+        | ~Q(preview_text="")
+        | ~Q(analysis_text="")
+        | ~Q(ai_raw="")
+    )
+    last_id = 0
+    while True:
+        docs = list(
+            Document.objects.filter(has_blobs, id__gt=last_id)
+            .order_by("id")
+            .values("id", "latest_job_id", *BLOB_FIELDS)[:BATCH_SIZE]
+        )
+        if not docs:
+            break
+        last_id = docs[-1]["id"]
+        analyses = []
+        for doc in docs:
+            analysed = doc["analysis_json"] is not None or bool(
+                doc["analysis_text"] or doc["ai_raw"]
+            )
+            analyses.append(
+                DocumentAnalysis(
+                    document_id=doc["id"],
+                    preview_text=doc["preview_text"],
+                    analysis_json=doc["analysis_json"],
+                    analysis_text=doc["analysis_text"],
+                    ai_raw=doc["ai_raw"],
+                    version=1 if analysed else 0,
+                    job_id=doc["latest_job_id"] if analysed else None,
+                )
+            )
+        DocumentAnalysis.objects.bulk_create(analyses)
+
+
+def restore_blobs(apps, schema_editor):
+    Document = apps.get_model("documents", "Document")
+    DocumentAnalysis = apps.get_model("documents", "DocumentAnalysis")
+
+    last_id = 0
+    while True:
+        analyses = list(
+            DocumentAnalysis.objects.filter(document_id__gt=last_id)
+            .order_by("document_id")
+            .values("document_id", *BLOB_FIELDS)[:BATCH_SIZE]
+        )
+        if not analyses:
+            break
+        last_id = analyses[-1]["document_id"]
+        Document.objects.bulk_update(
+            [
+                Document(
+                    id=analysis["document_id"],
+                    **{field: analysis[field] for field in BLOB_FIELDS},
+                )
+                for analysis in analyses
+            ],
+            BLOB_FIELDS,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("documents", "0009_documentanalysis_documentanalysisversion"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_blobs, restore_blobs),
+    ]
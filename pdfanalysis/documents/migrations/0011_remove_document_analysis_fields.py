@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-19 01:06
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0010_move_analysis_blobs"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="document",
+            name="ai_raw",
+        ),
+        migrations.RemoveField(
+            model_name="document",
+            name="analysis_json",
+        ),
+        migrations.RemoveField(
+            model_name="document",
+            name="analysis_text",
+        ),
+        migrations.RemoveField(
+            model_name="document",
+            name="preview_text",
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 6.0.2 on 2026-10-19 01:18
+
+import documents.compression
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def decompress_rows(schema_editor, model, name):
+    """Rewrite every value of the column as plain text, in batches."""
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    column = quote(model._meta.get_field(name).column)
+    postgres = connection.vendor == "postgresql"
+
+    last_pk = 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                f"SELECT {pk}, {column} FROM {table} WHERE {pk} > %s "
+                f"ORDER BY {pk} LIMIT %s",
+                [last_pk, BATCH_SIZE],
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            for row_pk, value in rows:
+                if value is None or isinstance(value, str):
+                    continue
+                text = documents.compression.decompress(value)
+                cursor.execute(
+                    f"UPDATE {table} SET {column} = %s WHERE {pk} = %s",
+                    [text.encode("utf-8") if postgres else text, row_pk],
+                )
+
+
+class CompressTextColumn(migrations.AlterField):
+    """
+    ``AlterField`` from a text column to ``CompressedTextField`` keeping every
+    value as it is.
+
+    Postgres would cast with ``::bytea``, which reads backslashes in the text
+    as escapes, so the text is converted to its UTF-8 bytes instead; the rows
+    stay uncompressed until ``compress_text_columns`` runs. Storage is set to
+    EXTERNAL so TOAST does not compress values a second time. Going back,
+    compressed values are first rewritten as plain text.
+    """
+
+    def _alter(self, schema_editor, model, sql_type, using, storage):
+        quote = schema_editor.quote_name
+        table = quote(model._meta.db_table)
+        column = quote(model._meta.get_field(self.name).column)
+        schema_editor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {sql_type} "
+            f"USING {using}({column}, 'UTF8')"
+        )
+        schema_editor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} SET STORAGE {storage}"
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        self._alter(schema_editor, model, "bytea", "convert_to", "EXTERNAL")
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        decompress_rows(schema_editor, model, self.name)
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        self._alter(schema_editor, model, "text", "convert_from", "EXTENDED")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0011_remove_document_analysis_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompressionDictionary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50)),
+                ("dict_id", models.PositiveBigIntegerField(unique=True)),
+                ("data", models.BinaryField()),
+                ("sample_count", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        CompressTextColumn(
+            model_name="documentanalysis",
+            name="ai_raw",
+            field=documents.compression.CompressedTextField(
+                blank=True, default="", dictionary="ai_raw"
+            ),
+        ),
+        CompressTextColumn(
+            model_name="documentanalysisversion",
+            name="ai_raw",
+            field=documents.compression.CompressedTextField(
+                blank=True, default="", dictionary="ai_raw"
+            ),
+        ),
+        CompressTextColumn(
+            model_name="documentchunk",
+            name="text",
+            field=documents.compression.CompressedTextField(dictionary="chunk_text"),
+        ),
+    ]
@@ -1,6 +1,10 @@
+from django.apps import apps
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 from accounts.models import User
+from documents.compression import CompressedTextField
 
 # Create your models here.
 DOCUMENT_STATUS_CHOICES = (
@@ -12,6 +16,33 @@ DOCUMENT_STATUS_CHOICES = (
 )
 
 
+class DocumentQuerySet(models.QuerySet):
+    def with_computed_snapshot(self):
+        """
+        Annotate the values the denormalized snapshot fields should hold, as
+        ``computed_chunk_count`` and ``computed_latest_job_{id,status,progress}``.
+
+        Only used to rebuild and check the snapshot, never on request paths.
+        """
+        analysis_job = apps.get_model("analysis", "AnalysisJob")
+        latest_job = analysis_job.objects.filter(document=OuterRef("pk")).order_by(
+            "-id"
+        )
+        chunk_total = (
+            DocumentChunk.objects.filter(document=OuterRef("pk"))
+            .order_by()
+            .values("document")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        return self.annotate(
+            computed_chunk_count=Coalesce(Subquery(chunk_total), 0),
+            computed_latest_job_id=Subquery(latest_job.values("id")[:1]),
+            computed_latest_job_status=Subquery(latest_job.values("status")[:1]),
+            computed_latest_job_progress=Subquery(latest_job.values("progress")[:1]),
+        )
+
+
 class Document(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="documents")
     title = models.CharField(max_length=255, blank=True)
@@ -23,8 +54,6 @@ class Document(models.Model):
     page_count = models.PositiveIntegerField(null=True, blank=True)
     language = models.CharField(max_length=20, blank=True)
 
-    preview_text = models.TextField(blank=True)
-
     status = models.CharField(
         max_length=20,
         choices=DOCUMENT_STATUS_CHOICES,
@@ -36,10 +65,118 @@ class Document(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Preview and analysis outputs live in ``DocumentAnalysis``, so scans,
+    # counts and status updates only touch this narrow row.
+
+    # Denormalized snapshot so list endpoints read a single row per document.
+    # Kept in sync by the analysis job views and run_full_analysis; rebuilt
+    # and checked with the ``rebuild_document_snapshots`` command.
+    chunk_count = models.PositiveIntegerField(default=0)
+    latest_job_id = models.BigIntegerField(null=True, blank=True)
+    latest_job_status = models.CharField(max_length=20, null=True, blank=True)
+    latest_job_progress = models.PositiveIntegerField(null=True, blank=True)
+
+    objects = DocumentQuerySet.as_manager()
+
+    LATEST_JOB_FIELDS = ("latest_job_id", "latest_job_status", "latest_job_progress")
+
+    class Meta:
+        indexes = [
+            # Live documents of a user, newest first: keyset pagination and
+            # the daily upload limit.
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                condition=models.Q(is_deleted=False),
+                name="document_live_created_idx",
+            ),
+        ]
+
+    def set_latest_job(self, job):
+        self.latest_job_id = job.id
+        self.latest_job_status = job.status
+        self.latest_job_progress = job.progress
+
+
+# Outputs of a full analysis, current in ``DocumentAnalysis`` and kept per
+# version in ``DocumentAnalysisVersion``.
+ANALYSIS_FIELDS = ("analysis_text", "analysis_json", "ai_raw")
+
+
+class DocumentAnalysisManager(models.Manager):
+    def replace(self, document, job_id, **values):
+        """
+        Make ``values`` the current analysis of ``document``.
+
+        The analysis being replaced is kept as a ``DocumentAnalysisVersion``.
+        Runs in the caller's transaction; the row is locked so concurrent
+        jobs number their versions one after the other.
+        """
+        analysis = self.select_for_update().filter(document=document).first()
+        if analysis is None:
+            return self.create(document=document, job_id=job_id, version=1, **values)
+        if analysis.version:
+            DocumentAnalysisVersion.objects.create(
+                document=document,
+                version=analysis.version,
+                job_id=analysis.job_id,
+                created_at=analysis.updated_at,
+                **{field: getattr(analysis, field) for field in ANALYSIS_FIELDS},
+            )
+        for field, value in values.items():
+            setattr(analysis, field, value)
+        analysis.job_id = job_id
+        analysis.version += 1
+        analysis.save()
+        return analysis
+
+
+class DocumentAnalysis(models.Model):
+    """
+    Preview and current analysis of a document, one-to-one with ``Document``.
+
+    The row only exists once a document has a preview or an analysis;
+    readers treat a missing row as empty.
+    """
+
+    document = models.OneToOneField(
+        Document, on_delete=models.CASCADE, primary_key=True, related_name="analysis"
+    )
+    preview_text = models.TextField(blank=True)
+
+    analysis_json = models.JSONField(null=True, blank=True)
+    analysis_text = models.TextField(blank=True, default="")
+    ai_raw = CompressedTextField(blank=True, default="", dictionary="ai_raw")
+
+    # Number of analyses written so far; 0 while only a preview exists.
+    version = models.PositiveIntegerField(default=0)
+    job_id = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DocumentAnalysisManager()
+
+
+class DocumentAnalysisVersion(models.Model):
+    """A previous analysis of a document, replaced by a later job."""
+
+    document = models.ForeignKey(
+        Document, on_delete=models.CASCADE, related_name="analysis_versions"
+    )
+    version = models.PositiveIntegerField()
+    job_id = models.BigIntegerField(null=True, blank=True)
+
     analysis_json = models.JSONField(null=True, blank=True)
     analysis_text = models.TextField(blank=True, default="")
+    ai_raw = CompressedTextField(blank=True, default="", dictionary="ai_raw")
+
+    created_at = models.DateTimeField()
 
-    ai_raw = models.TextField(blank=True, default="")
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["document", "version"], name="document_analysis_version_uniq"
+            ),
+        ]
+        ordering = ["-version"]
 
 
 class DocumentChunk(models.Model):
@@ -50,10 +187,47 @@ class DocumentChunk(models.Model):
 
     page_start = models.PositiveIntegerField()
     page_end = models.PositiveIntegerField()
-    text = models.TextField()
+    text = CompressedTextField(dictionary="chunk_text")
 
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("document", "chunk_index")
         ordering = ["chunk_index"]
+
+
+class CompressionDictionary(models.Model):
+    """
+    A zstd dictionary trained on the values of ``CompressedTextField``s
+    sharing ``name``. The newest one per name compresses new values; older
+    ones are kept for the rows they compressed.
+    """
+
+    name = models.CharField(max_length=50)
+    dict_id = models.PositiveBigIntegerField(unique=True)
+    data = models.BinaryField()
+    sample_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.dict_id}"
+
+
+class DocumentStats(models.Model):
+    """
+    Per-user overview counters over live (not deleted) documents.
+
+    Maintained incrementally by ``documents.stats`` on creation, soft delete
+    and status changes, and reconciled against ``Document`` periodically.
+    """
+
+    owner = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="document_stats"
+    )
+    total_documents = models.IntegerField(default=0)
+    processing = models.IntegerField(default=0)
+    ready = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COUNTER_FIELDS = ("total_documents", "processing", "ready", "errors")
@@ -1,7 +1,167 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class Pagination10(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+def approximate_count(queryset, exact_below=10_000) -> int:
+    """
+    Row estimate from the planner on PostgreSQL, exact count elsewhere.
+
+    Estimates are poor for small result sets, so those are counted exactly;
+    that stays cheap precisely because the set is small.
+    """
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate < exact_below:
+        return queryset.count()
+    return estimate
+
+
+class KeysetPagination10(BasePagination):
+    """
+    Newest-first keyset pagination on ``(keyset_field, id)``.
+
+    Each page is a range scan that starts right after the previous one, so
+    deep pages cost the same as the first and no ``COUNT(*)`` is needed.
+    Cursors are opaque base64 tokens; ``?with_count=true`` adds an
+    approximate total.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    keyset_field = "created_at"
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        qs, page_size, position, reverse = self._prepare(queryset, request)
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = approximate_count(queryset)
+        return self._finish(list(qs[: page_size + 1]), page_size, position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, on the async ORM."""
+        qs, page_size, position, reverse = self._prepare(queryset, request)
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = await sync_to_async(approximate_count)(queryset)
+        results = [obj async for obj in qs[: page_size + 1]]
+        return self._finish(results, page_size, position, reverse)
+
+    def _prepare(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.count = None
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        # The redundant keyset bound gives the index a range to seek to; the
+        # OR alone would be a filter over the whole index.
+        field = self.keyset_field
+        if position is None:
+            qs = queryset.order_by(f"-{field}", "-id")
+        elif reverse:
+            value, pk = position
+            qs = queryset.filter(
+                Q(**{f"{field}__gt": value}) | Q(id__gt=pk), **{f"{field}__gte": value}
+            ).order_by(field, "id")
+        else:
+            value, pk = position
+            qs = queryset.filter(
+                Q(**{f"{field}__lt": value}) | Q(id__lt=pk), **{f"{field}__lte": value}
+            ).order_by(f"-{field}", "-id")
+        return qs, page_size, position, reverse
+
+    def _finish(self, results, page_size, position, reverse):
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        if not results:
+            self.next_position = self.previous_position = None
+        elif reverse:
+            self.next_position = results[-1]
+            self.previous_position = results[0] if has_more else None
+        else:
+            self.next_position = results[-1] if has_more else None
+            self.previous_position = results[0] if position else None
+
+        return results
+
+    def get_paginated_response(self, data):
+        payload = {}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload.update(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self._link(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self._link(self.previous_position, reverse=True)
+
+    def _link(self, obj, reverse):
+        token = self.encode_cursor(getattr(obj, self.keyset_field), obj.id, reverse)
+        url = remove_query_param(self.base_url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    @staticmethod
+    def encode_cursor(created_at, pk, reverse=False) -> str:
+        raw = json.dumps([created_at.isoformat(), pk, int(reverse)])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            created_at, pk, reverse = json.loads(raw)
+            return (datetime.fromisoformat(created_at), int(pk)), bool(reverse)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class EventKeysetPagination10(KeysetPagination10):
+    """Keyset pagination over the event log, keyed on the event timestamp."""
+
+    keyset_field = "ts"
@@ -0,0 +1,150 @@
+"""
+Sliding-window upload quota kept in the cache.
+
+The window (24 hours by default) is split into fixed buckets (an hour by
+default), each holding the number of uploads that started in it. Checking and
+reporting the quota is a single ``get_many`` over a constant number of keys;
+the oldest bucket counts whole, so the window slides in bucket-sized steps.
+
+An upload increments its bucket *before* the window is summed and rolls the
+increment back when the sum is over the limit, so a burst of concurrent
+uploads cannot all slip through.
+
+The document table is only read to seed the buckets, when the user's sync
+marker is missing: on first use, after cache eviction and every
+``UPLOAD_QUOTA_RECONCILE_SECONDS``.
+"""
+
+import time
+from collections import Counter
+from datetime import UTC, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from documents.models import Document
+
+
+def upload_limit_for(user) -> int:
+    if user.upload_limit is not None:
+        return user.upload_limit
+    plans = settings.UPLOAD_QUOTA_PLANS
+    return plans.get(user.plan, plans["free"])
+
+
+class UploadQuota:
+    def __init__(self, user):
+        self.user = user
+        self.limit = upload_limit_for(user)
+        self.bucket_size = settings.UPLOAD_QUOTA_BUCKET_SECONDS
+        self.bucket_count = max(
+            1, settings.UPLOAD_QUOTA_WINDOW_SECONDS // self.bucket_size
+        )
+        self.ttl = (self.bucket_count + 1) * self.bucket_size
+        self.used = 0
+        self.reset_after = 0
+        self._acquired_bucket = None
+
+    def _key(self, bucket: int) -> str:
+        return f"upload_quota:{self.user.pk}:{bucket}"
+
+    def _marker_key(self) -> str:
+        return f"upload_quota:{self.user.pk}:synced"
+
+    def _window(self):
+        current = int(time.time()) // self.bucket_size
+        return list(range(current - self.bucket_count + 1, current + 1))
+
+    def _load(self, buckets) -> dict:
+        keys = {self._key(b): b for b in buckets}
+        found = cache.get_many([*keys, self._marker_key()])
+        if self._marker_key() not in found:
+            return self._sync(buckets, found)
+        return {keys[k]: v for k, v in found.items() if k in keys}
+
+    def _sync(self, buckets, found) -> dict:
+        """Seed the window from the documents table."""
+        start = datetime.fromtimestamp(buckets[0] * self.bucket_size, tz=UTC)
+        created = Document.objects.filter(
+            owner=self.user, is_deleted=False, created_at__gte=start
+        ).values_list("created_at", flat=True)
+        counts = Counter(int(ts.timestamp()) // self.bucket_size for ts in created)
+
+        # The current bucket also holds uploads in flight that are not
+        # committed yet, so it is only seeded when absent and never overwritten.
+        *older, current = buckets
+        cache.set_many({self._key(b): counts[b] for b in older}, self.ttl)
+        current_key = self._key(current)
+        if current_key in found:
+            counts[current] = found[current_key]
+        else:
+            cache.add(current_key, counts[current], self.ttl)
+
+        cache.set(self._marker_key(), 1, settings.UPLOAD_QUOTA_RECONCILE_SECONDS)
+        return {b: counts[b] for b in buckets}
+
+    def _report(self, buckets, counts):
+        self.used = max(0, sum(counts.values()))
+        occupied = [b for b in buckets if counts.get(b, 0) > 0]
+        if occupied:
+            frees_at = (occupied[0] + self.bucket_count) * self.bucket_size
+            self.reset_after = max(0, frees_at - int(time.time()))
+        else:
+            self.reset_after = 0
+
+    def check(self):
+        """Refresh ``used`` and ``reset_after`` without taking a slot."""
+        buckets = self._window()
+        self._report(buckets, self._load(buckets))
+        return self
+
+    def acquire(self) -> bool:
+        """Take one upload slot; ``False`` when the quota is used up."""
+        buckets = self._window()
+        counts = self._load(buckets)
+        key = self._key(buckets[-1])
+        cache.add(key, 0, self.ttl)
+        counts[buckets[-1]] = cache.incr(key)
+
+        if sum(counts.values()) > self.limit:
+            counts[buckets[-1]] = cache.decr(key)
+            self._report(buckets, counts)
+            return False
+
+        self._acquired_bucket = buckets[-1]
+        self._report(buckets, counts)
+        return True
+
+    def release(self):
+        """Give back the slot taken by ``acquire`` (e.g. the save failed)."""
+        if self._acquired_bucket is None:
+            return
+        self._decr(self._acquired_bucket)
+        self._acquired_bucket = None
+        self.used = max(0, self.used - 1)
+
+    def refund(self, created_at):
+        """A document created inside the window was deleted."""
+        bucket = int(created_at.timestamp()) // self.bucket_size
+        if bucket in self._window():
+            self._decr(bucket)
+
+    def _decr(self, bucket):
+        key = self._key(bucket)
+        try:
+            if cache.decr(key) < 0:
+                cache.incr(key)
+        except ValueError:
+            # Expired or evicted; the next sync recounts from the database.
+            pass
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def headers(self) -> dict:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset_after),
+        }
@@ -0,0 +1,201 @@
+"""
+Per-user response cache for read-heavy GET endpoints.
+
+A cached response is keyed by the user, a per-user version number, the
+endpoint and its query string. Code that writes a user's documents, jobs or
+events calls ``bump_user_version`` (inside the writing transaction, so the
+bump is repeated on commit), which moves the user to a new version: every entry of the
+old one is unreachable at once, without finding or deleting keys, and
+expires with ``RESPONSE_CACHE_TTL``.
+
+Hits are answered from the cache without touching the ORM, including 304s
+for a matching ``If-None-Match``. Hits and misses are counted per endpoint
+(``response_cache_stats``) and reported in an ``X-Cache`` header.
+"""
+
+import functools
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+# Headers restored on a hit; the rest are added again by the renderer and
+# the middleware.
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Vary")
+STATS_EVENTS = ("hits", "misses")
+
+_endpoints = {}
+
+
+def _version_key(user_id):
+    return f"respcache:user:{user_id}:version"
+
+
+def _stats_key(endpoint, event):
+    return f"respcache:stats:{endpoint}:{event}"
+
+
+def _new_version():
+    # Versions start from the clock, so a version key evicted from the cache
+    # comes back higher than any version its old entries were stored under.
+    return time.time_ns() // 1000
+
+
+def user_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    """
+    Invalidate every cached response of ``user_id``.
+
+    The version moves at once and again when the surrounding transaction
+    commits: a request that read the old rows in between may have stored
+    them under the first new version, the second one leaves them behind.
+    """
+    _bump(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(user_id))
+
+
+def _bump(user_id):
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_version(), None)
+
+
+def response_key(endpoint, request, version):
+    query = "&".join(sorted(request.GET.urlencode().split("&")))
+    digest = hashlib.sha256(f"{request.path}?{query}".encode()).hexdigest()[:32]
+    return f"respcache:{request.user.pk}:{version}:{endpoint}:{digest}"
+
+
+def _lookup(endpoint, request):
+    """``(key, entry)`` of the request, ``entry`` being None on a miss."""
+    key = response_key(endpoint, request, user_version(request.user.pk))
+    entry = cache.get(key)
+    _count(endpoint, "misses" if entry is None else "hits")
+    return key, entry
+
+
+def _count(endpoint, event):
+    key = _stats_key(endpoint, event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def response_cache_stats():
+    """``{endpoint: {"hits", "misses", "hit_ratio"}}`` since the counters started."""
+    keys = {
+        (endpoint, event): _stats_key(endpoint, event)
+        for endpoint in _endpoints
+        for event in STATS_EVENTS
+    }
+    found = cache.get_many(keys.values())
+    stats = {}
+    for endpoint in _endpoints:
+        hits, misses = (found.get(keys[endpoint, event], 0) for event in STATS_EVENTS)
+        total = hits + misses
+        stats[endpoint] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+def _replay(request, entry):
+    status, data, headers = entry
+    last_modified = parse_http_date_safe(headers.get("Last-Modified", ""))
+    response = get_conditional_response(
+        request, etag=headers.get("ETag"), last_modified=last_modified
+    )
+    if response is None:
+        response = Response(data, status=status)
+    for name, value in headers.items():
+        response[name] = value
+    response["X-Cache"] = "HIT"
+    return response
+
+
+def _entry(response, cacheable):
+    if (
+        not isinstance(response, Response)
+        or response.status_code != 200
+        or (cacheable is not None and not cacheable(response))
+    ):
+        return None
+    headers = {name: response[name] for name in CACHED_HEADERS if name in response}
+    return response.status_code, response.data, headers
+
+
+def cache_per_user(endpoint, cacheable=None):
+    """
+    Cache the 200 responses of a view's ``get`` per user (see module docstring).
+
+    ``cacheable(response)`` may refuse responses that change without a write,
+    such as the live progress of a running job.
+    """
+    _endpoints[endpoint] = None
+
+    def decorator(get):
+        @functools.wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_TTL:
+                return get(self, request, *args, **kwargs)
+            key, entry = _lookup(endpoint, request)
+            if entry is not None:
+                return _replay(request, entry)
+
+            response = get(self, request, *args, **kwargs)
+            entry = _entry(response, cacheable)
+            if entry is not None:
+                cache.set(key, entry, settings.RESPONSE_CACHE_TTL)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def acache_per_user(endpoint, cacheable=None):
+    """``cache_per_user`` for async views."""
+    _endpoints[endpoint] = None
+
+    def decorator(get):
+        @functools.wraps(get)
+        async def wrapper(self, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_TTL:
+                return await get(self, request, *args, **kwargs)
+            key, entry = await sync_to_async(_lookup, thread_sensitive=False)(
+                endpoint, request
+            )
+            if entry is not None:
+                return _replay(request, entry)
+
+            response = await get(self, request, *args, **kwargs)
+            entry = _entry(response, cacheable)
+            if entry is not None:
+                await cache.aset(key, entry, settings.RESPONSE_CACHE_TTL)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
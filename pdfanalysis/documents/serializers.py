@@ -1,9 +1,11 @@
-from datetime import timedelta
-
-from django.utils import timezone
+from django.db import transaction
 from rest_framework import serializers
 
-from documents.models import Document, DocumentChunk
+from documents.fieldsets import DynamicFieldsMixin
+from documents.models import Document
+from documents.response_cache import bump_user_version
+from documents.stats import document_created
+from documents.storage import blob_path
 
 
 class DocumentCreateSerializer(serializers.ModelSerializer):
@@ -18,28 +20,6 @@ class DocumentCreateSerializer(serializers.ModelSerializer):
             "checksum",
         )
 
-    def validate(self, attrs):
-        user = self.context["request"].user
-
-        time_threshold = timezone.now() - timedelta(days=1)
-        daily_limit = 15
-
-        daily_upload_count = Document.objects.filter(
-            owner=user, created_at__gte=time_threshold, is_deleted=False
-        ).count()
-
-        if daily_upload_count >= daily_limit:
-            raise serializers.ValidationError(
-                {
-                    "error": (
-                        f"Daily upload limit reached ({daily_limit}). "
-                        "Please try again tomorrow."
-                    )
-                }
-            )
-
-        return attrs
-
     def validate_mime_type(self, value):
         if value != "application/pdf":
             raise serializers.ValidationError("Only PDF files are accepted.")
@@ -56,16 +36,30 @@ class DocumentCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Invalid file_path.")
         return value
 
+    def validate(self, attrs):
+        # Content-addressed blobs may only be claimed by their owner, with
+        # their own checksum.
+        path = attrs.get("file_path", "")
+        owner_id = self.context["request"].user.pk
+        if path.startswith("blobs/") and path != blob_path(
+            owner_id, attrs.get("checksum", "")
+        ):
+            raise serializers.ValidationError(
+                {"file_path": ["file_path does not match checksum."]}
+            )
+        return attrs
+
     def create(self, validated_data):
         user = self.context["request"].user
-        return Document.objects.create(owner=user, **validated_data)
+        with transaction.atomic():
+            doc = Document.objects.create(owner=user, **validated_data)
+            document_created(doc)
+            bump_user_version(doc.owner_id)
+        return doc
 
 
-class DocumentSerializer(serializers.ModelSerializer):
-    latest_preview_job_status = serializers.SerializerMethodField()
-    latest_preview_job_progress = serializers.SerializerMethodField()
-    latest_preview_job_error = serializers.SerializerMethodField()
-    chunk_count = serializers.SerializerMethodField()
+class DocumentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    preview_text = serializers.SerializerMethodField()
 
     class Meta:
         model = Document
@@ -81,29 +75,18 @@ class DocumentSerializer(serializers.ModelSerializer):
             "language",
             "preview_text",
             "created_at",
-            "latest_preview_job_status",
-            "latest_preview_job_progress",
-            "latest_preview_job_error",
+            "latest_job_id",
+            "latest_job_status",
+            "latest_job_progress",
             "chunk_count",
         )
+        # The preview lives in DocumentAnalysis; it is only joined on request.
+        default_fields = tuple(f for f in fields if f != "preview_text")
+        field_columns = {"preview_text": ("analysis__preview_text",)}
 
-    def _latest_preview_job(self, obj):
-        return obj.jobs.filter(job_type="PREVIEW").order_by("-id").first()
-
-    def get_latest_preview_job_status(self, obj):
-        job = self._latest_preview_job(obj)
-        return job.status if job else None
-
-    def get_latest_preview_job_progress(self, obj):
-        job = self._latest_preview_job(obj)
-        return job.progress if job else None
-
-    def get_latest_preview_job_error(self, obj):
-        job = self._latest_preview_job(obj)
-        return job.error if job else ""
-
-    def get_chunk_count(self, obj):
-        return DocumentChunk.objects.filter(document=obj).count()
+    def get_preview_text(self, obj):
+        analysis = getattr(obj, "analysis", None)
+        return analysis.preview_text if analysis else ""
 
 
 class DocumentOverviewSerializer(serializers.Serializer):
@@ -113,13 +96,14 @@ class DocumentOverviewSerializer(serializers.Serializer):
     errors = serializers.IntegerField()
 
 
-class RecentDocumentItemSerializer(serializers.ModelSerializer):
+class RecentDocumentItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     document_name = serializers.SerializerMethodField()
     uploaded_at = serializers.DateTimeField(source="created_at")
 
     class Meta:
         model = Document
         fields = ("id", "document_name", "status", "uploaded_at")
+        field_columns = {"document_name": ("title", "original_name")}
 
     def get_document_name(self, obj):
         return obj.title or obj.original_name
@@ -128,5 +112,8 @@ class RecentDocumentItemSerializer(serializers.ModelSerializer):
 class EventLogItemSerializer(serializers.Serializer):
     ts = serializers.DateTimeField()
     event = serializers.CharField()
+    stage = serializers.CharField()
     detail = serializers.CharField()
+    duration_ms = serializers.IntegerField(allow_null=True)
     document_id = serializers.IntegerField(allow_null=True)
+    job_id = serializers.IntegerField(allow_null=True)
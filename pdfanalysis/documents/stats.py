@@ -0,0 +1,175 @@
+"""
+Incremental per-user overview counters.
+
+Every place that creates, soft-deletes or changes the status of a document
+reports the change here, inside the transaction that saves the document. The
+matching ``DocumentStats`` row is adjusted with ``F()`` expressions, so the
+overview endpoint reads one row instead of aggregating all documents. A
+missing row is rebuilt from ``Document``, and ``reconcile_all_document_stats``
+repairs any drift on a schedule.
+"""
+
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from documents.models import Document, DocumentStats
+
+# Overview counter -> document statuses it counts.
+COUNTER_STATUSES = {
+    "processing": ("PROCESSING",),
+    "ready": ("READY", "PREVIEW_READY"),
+    "errors": ("FAILED",),
+}
+
+_STATUS_COUNTER = {
+    status: counter
+    for counter, statuses in COUNTER_STATUSES.items()
+    for status in statuses
+}
+
+
+def document_created(doc):
+    _apply(doc.owner_id, None, doc.status)
+
+
+def document_deleted(doc):
+    _apply(doc.owner_id, doc.status, None)
+
+
+def document_status_changed(doc, previous_status):
+    if doc.is_deleted or previous_status == doc.status:
+        return
+    _apply(doc.owner_id, previous_status, doc.status)
+
+
+def documents_status_changed(owner_id, previous_statuses, new_status):
+    """Several live documents of one owner moved to ``new_status`` at once."""
+    deltas = Counter()
+    for previous_status in previous_statuses:
+        if previous_status != new_status:
+            deltas.update(_deltas(previous_status, new_status))
+    _apply_deltas(owner_id, deltas)
+
+
+def _deltas(old_status, new_status):
+    """``old_status=None`` is a creation, ``new_status=None`` a deletion."""
+    deltas = Counter()
+    if old_status is None:
+        deltas["total_documents"] += 1
+    elif old_status in _STATUS_COUNTER:
+        deltas[_STATUS_COUNTER[old_status]] -= 1
+    if new_status is None:
+        deltas["total_documents"] -= 1
+    elif new_status in _STATUS_COUNTER:
+        deltas[_STATUS_COUNTER[new_status]] += 1
+    return deltas
+
+
+def _apply(owner_id, old_status, new_status):
+    _apply_deltas(owner_id, _deltas(old_status, new_status))
+
+
+def _apply_deltas(owner_id, deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    updated = DocumentStats.objects.filter(owner_id=owner_id).update(
+        **changes, updated_at=timezone.now()
+    )
+    if not updated:
+        # The document is already saved, so the rebuild includes this change.
+        reconcile_document_stats(owner_id)
+
+
+def _count_by_owner(owner_ids):
+    rows = (
+        Document.objects.filter(owner_id__in=owner_ids, is_deleted=False)
+        .values("owner_id")
+        .annotate(
+            total_documents=Count("id"),
+            **{
+                counter: Count("id", filter=Q(status__in=statuses))
+                for counter, statuses in COUNTER_STATUSES.items()
+            },
+        )
+    )
+    counts = {
+        owner_id: dict.fromkeys(DocumentStats.COUNTER_FIELDS, 0)
+        for owner_id in owner_ids
+    }
+    for row in rows:
+        counts[row.pop("owner_id")] = row
+    return counts
+
+
+def _reconcile(owner_ids):
+    """
+    Recompute the counters of ``owner_ids``; return ``(stats_by_owner, fixed)``.
+
+    Existing rows are locked before counting, so an increment racing with the
+    recount either lands before it (and is counted) or waits for it.
+    """
+    with transaction.atomic():
+        stats_by_owner = DocumentStats.objects.select_for_update().in_bulk(owner_ids)
+        counts = _count_by_owner(owner_ids)
+        now = timezone.now()
+        to_create, to_update = [], []
+        for owner_id, fresh in counts.items():
+            stats = stats_by_owner.get(owner_id)
+            if stats is None:
+                stats = DocumentStats(owner_id=owner_id, **fresh)
+                stats_by_owner[owner_id] = stats
+                to_create.append(stats)
+                continue
+            if all(getattr(stats, f) == v for f, v in fresh.items()):
+                continue
+            for field, value in fresh.items():
+                setattr(stats, field, value)
+            stats.updated_at = now
+            to_update.append(stats)
+
+        DocumentStats.objects.bulk_create(to_create, ignore_conflicts=True)
+        DocumentStats.objects.bulk_update(
+            to_update, [*DocumentStats.COUNTER_FIELDS, "updated_at"]
+        )
+    return stats_by_owner, len(to_create) + len(to_update)
+
+
+def reconcile_document_stats(owner_id) -> DocumentStats:
+    """Recompute one user's counters from ``Document``."""
+    stats_by_owner, _ = _reconcile([owner_id])
+    return stats_by_owner[owner_id]
+
+
+def get_document_stats(owner_id) -> DocumentStats:
+    stats = DocumentStats.objects.filter(owner_id=owner_id).first()
+    return stats or reconcile_document_stats(owner_id)
+
+
+def reconcile_all_document_stats(batch_size=500):
+    """
+    Recompute every user's counters in id-ordered batches.
+
+    Returns ``(users_scanned, rows_fixed)``; created rows count as fixed.
+    """
+    user_model = get_user_model()
+    last_id = 0
+    scanned = fixed = 0
+
+    while True:
+        owner_ids = list(
+            user_model.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not owner_ids:
+            break
+        last_id = owner_ids[-1]
+        scanned += len(owner_ids)
+        fixed += _reconcile(owner_ids)[1]
+
+    return scanned, fixed
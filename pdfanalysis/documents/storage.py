@@ -0,0 +1,212 @@
+"""
+Supabase Storage helpers for the signed-upload endpoints.
+
+Uploads are content-addressed per owner: a file is stored under its
+owner's id and the SHA-256 of its bytes (``blobs/<owner>/<aa>/<sha256>.pdf``),
+so a user's identical files share one blob and nothing is ever overwritten.
+The name a user sees lives on their ``Document`` row (``original_name``), not
+in the storage key. Before signing an upload the blob is probed with one
+metadata call; when it already exists the client skips the transfer and
+creates the document directly.
+
+The checksum comes from the client, so the storage key alone proves
+nothing about the bytes behind it. Keys are scoped to the owner, so a wrong
+checksum only ever affects the uploader's own files, and the analysis task
+hashes the downloaded bytes and fails the job on a mismatch
+(``verify_blob``).
+
+Building a Supabase client costs tens of milliseconds (it sets up every
+sub-client and its HTTP pool), so one client per credentials is kept for the
+life of the process and shared by all requests and threads. The per-file
+remote calls of a batch run on a bounded thread pool.
+
+The ``a``-prefixed helpers are the async counterparts used by the ASGI views.
+They talk to the same Storage API through ``storage3``'s httpx-based async
+client, so waiting on storage does not hold a thread.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from storage3 import AsyncStorageClient
+from supabase import create_client
+
+from config.metrics import external_call
+
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+UPLOAD_HEADERS = {"Content-Type": "application/pdf"}
+CHECKSUM_RE = re.compile(r"^[0-9a-f]{64}$")
+
+logger = logging.getLogger(__name__)
+
+
+class StorageConfigurationError(Exception):
+    pass
+
+
+class BlobChecksumError(ValueError):
+    pass
+
+
+def blob_path(owner_id, checksum):
+    return f"blobs/{owner_id}/{checksum[:2]}/{checksum}.pdf"
+
+
+def verify_blob(path, checksum, content):
+    """
+    Raise ``BlobChecksumError`` when ``content`` of a blob is not ``checksum``.
+
+    The blob is removed first (best effort): an upload to an existing key is
+    skipped, so a wrong blob would otherwise be reused by every later upload
+    of the real file.
+    """
+    if not path.startswith("blobs/"):
+        return
+    if hashlib.sha256(content).hexdigest() == checksum:
+        return
+    try:
+        get_bucket()[1].remove([path])
+    except Exception:
+        logger.warning("could not remove mismatched blob %s", path, exc_info=True)
+    raise BlobChecksumError("Stored file does not match its checksum.")
+
+
+def validate_upload(file_name, content_type, file_size, checksum):
+    """Error message for an upload request, or ``None`` when it is valid."""
+    if not file_name or not content_type or not checksum:
+        return "file_name, content_type and checksum are required."
+    if content_type != "application/pdf":
+        return "Only application/pdf is allowed."
+    if file_size and int(file_size) > MAX_UPLOAD_SIZE:
+        return "File size exceeds 50MB limit."
+    if not CHECKSUM_RE.match(str(checksum)):
+        return "checksum must be the lowercase hex SHA-256 of the file."
+    return None
+
+
+@lru_cache(maxsize=4)
+def get_client(url, key):
+    return create_client(url, key)
+
+
+# httpx connection pools are bound to the event loop that opened them.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(url, key):
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if (url, key) not in clients:
+        clients[url, key] = AsyncStorageClient(
+            f"{url}/storage/v1/",
+            headers={"apiKey": key, "Authorization": f"Bearer {key}"},
+        )
+    return clients[url, key]
+
+
+def _credentials():
+    url = os.getenv("SUPABASE_URL", "")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+    bucket = os.getenv("SUPABASE_BUCKET", "")
+    if not url or not key or not bucket:
+        raise StorageConfigurationError(
+            "Server configuration error: Missing Supabase credentials."
+        )
+    return url, key, bucket
+
+
+def get_bucket():
+    """``(bucket_name, bucket_api)`` of the configured storage bucket."""
+    url, key, bucket = _credentials()
+    return bucket, get_client(url, key).storage.from_(bucket)
+
+
+def aget_bucket():
+    """``get_bucket`` with an async ``bucket_api``; call from a running loop."""
+    url, key, bucket = _credentials()
+    return bucket, get_async_client(url, key).from_(bucket)
+
+
+def prepare_upload(bucket_api, storage_path):
+    """
+    ``(upload_required, signed_url, token)`` for a content-addressed path.
+
+    An existing blob costs only the metadata call and needs no upload.
+    """
+    with external_call("storage", "exists"):
+        exists = bucket_api.exists(storage_path)
+    if exists:
+        return False, None, None
+    with external_call("storage", "sign_upload"):
+        res = bucket_api.create_signed_upload_url(storage_path)
+    return (True, *_signed_upload(res))
+
+
+async def aprepare_upload(bucket_api, storage_path):
+    with external_call("storage", "exists"):
+        exists = await bucket_api.exists(storage_path)
+    if exists:
+        return False, None, None
+    with external_call("storage", "sign_upload"):
+        res = await bucket_api.create_signed_upload_url(storage_path)
+    return (True, *_signed_upload(res))
+
+
+def _signed_upload(res):
+    if isinstance(res, dict):
+        signed_url = res.get("signed_url") or res.get("signedURL")
+        token = res.get("token")
+    else:
+        signed_url = getattr(res, "signed_url", None) or getattr(res, "signedURL", None)
+        token = getattr(res, "token", None)
+    return signed_url, token
+
+
+def prepare_uploads(bucket_api, storage_paths):
+    """
+    ``prepare_upload`` for many paths with bounded concurrency.
+
+    Returns ``{path: (upload_required, signed_url, token)}``; a path whose
+    calls failed maps to the exception instead.
+    """
+
+    def prepare(path):
+        try:
+            return _checked(prepare_upload(bucket_api, path))
+        except Exception as e:
+            return e
+
+    paths = list(dict.fromkeys(storage_paths))
+    workers = min(settings.SIGNED_UPLOAD_CONCURRENCY, len(paths))
+    if workers <= 1:
+        return {path: prepare(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(paths, executor.map(prepare, paths)))
+
+
+async def aprepare_uploads(bucket_api, storage_paths):
+    """``prepare_uploads`` on the event loop, bounded by a semaphore."""
+    semaphore = asyncio.Semaphore(settings.SIGNED_UPLOAD_CONCURRENCY)
+
+    async def prepare(path):
+        try:
+            async with semaphore:
+                return _checked(await aprepare_upload(bucket_api, path))
+        except Exception as e:
+            return e
+
+    paths = list(dict.fromkeys(storage_paths))
+    return dict(zip(paths, await asyncio.gather(*map(prepare, paths))))
+
+
+def _checked(prepared):
+    upload_required, signed_url, _ = prepared
+    if upload_required and not signed_url:
+        return ValueError("Failed to generate signed URL.")
+    return prepared
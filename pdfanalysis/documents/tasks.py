@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from documents.stats import reconcile_all_document_stats
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_document_stats():
+    scanned, fixed = reconcile_all_document_stats()
+    if fixed:
+        logger.warning("Document stats drifted for %s of %s users", fixed, scanned)
+    return {"scanned": scanned, "fixed": fixed}
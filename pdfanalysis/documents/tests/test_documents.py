@@ -1,15 +1,47 @@
-from datetime import timedelta
-from unittest.mock import MagicMock, patch
-
+import gzip
+import hashlib
+import json
+import uuid
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import brotli
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APIClient
-
-from analysis.models import AnalysisJob
-from documents.models import Document
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from analysis.events import job_event
+from analysis.models import AnalysisEvent, AnalysisJob
+from config import metrics
+from config.async_api import AsyncAPIView
+from config.middleware import ResponseCompressionMiddleware
+from config.renderers import ORJSONRenderer, loads
+from documents import compression
+from documents.models import (
+    CompressionDictionary,
+    Document,
+    DocumentAnalysis,
+    DocumentChunk,
+    DocumentStats,
+)
+from documents.storage import get_client, prepare_upload
+from documents.tasks import reconcile_document_stats
+from documents.views import DocumentListAPIView
 
 User = get_user_model()
 
@@ -54,6 +86,49 @@ class TestDocumentCreate:
         assert response.data["title"] == payload["title"]
         assert Document.objects.filter(owner=test_user, title="My Resume").exists()
 
+    def test_create_document_blob_path_must_match_checksum(self, api_client, test_user):
+        """İçerik adresli yol yalnızca kendi checksum'ı ile kullanılabilmeli."""
+        api_client.force_authenticate(user=test_user)
+        checksum = sha256(b"%PDF mine")
+        payload = {
+            "title": "Blob",
+            "original_name": "cv.pdf",
+            "file_path": f"blobs/{test_user.pk}/{checksum[:2]}/{checksum}.pdf",
+            "file_size": 1024,
+            "mime_type": "application/pdf",
+            "checksum": sha256(b"%PDF other"),
+        }
+
+        mismatch = api_client.post(self.url, payload, format="json")
+        payload["checksum"] = checksum
+        match = api_client.post(self.url, payload, format="json")
+
+        assert mismatch.status_code == status.HTTP_400_BAD_REQUEST
+        assert "file_path" in mismatch.data
+        assert match.status_code == status.HTTP_201_CREATED
+
+    def test_create_document_cannot_claim_other_users_blob(self, api_client, test_user):
+        """Başka kullanıcının blob'u checksum bilinse bile alınamamalı."""
+        other = get_user_model().objects.create_user(
+            username="blobowner", password="pass"
+        )
+        api_client.force_authenticate(user=test_user)
+        checksum = sha256(b"%PDF theirs")
+        payload = {
+            "title": "Blob",
+            "original_name": "cv.pdf",
+            "file_path": f"blobs/{other.pk}/{checksum[:2]}/{checksum}.pdf",
+            "file_size": 1024,
+            "mime_type": "application/pdf",
+            "checksum": checksum,
+        }
+
+        response = api_client.post(self.url, payload, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "file_path" in response.data
+        assert not Document.objects.filter(owner=test_user).exists()
+
     def test_create_document_invalid_mime(self, api_client, test_user):
         """PDF dışındaki dosya türlerinin reddedilmesi testi."""
         api_client.force_authenticate(user=test_user)
@@ -115,6 +190,64 @@ class TestDocumentCreate:
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert "Daily upload limit reached" in str(response.data)
+        assert response["X-RateLimit-Remaining"] == "0"
+
+    def _payload(self, i):
+        return {
+            "title": f"Doc {i}",
+            "original_name": f"doc_{i}.pdf",
+            "file_path": f"uploads/doc_{i}.pdf",
+            "mime_type": "application/pdf",
+            "file_size": 100,
+            "checksum": f"hash_{i}",
+        }
+
+    def test_upload_quota_headers(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.post(self.url, self._payload(0), format="json")
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response["X-RateLimit-Limit"] == "15"
+        assert response["X-RateLimit-Remaining"] == "14"
+        assert int(response["X-RateLimit-Reset"]) > 0
+
+    def test_upload_quota_is_enforced_from_cache(self, api_client, test_user):
+        """Limit, sayım sorgusu olmadan cache sayacından uygulanmalı."""
+        test_user.upload_limit = 2
+        test_user.save()
+        api_client.force_authenticate(user=test_user)
+        api_client.post(self.url, self._payload(0), format="json")
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = api_client.post(self.url, self._payload(1), format="json")
+            third = api_client.post(self.url, self._payload(2), format="json")
+
+        assert second.status_code == status.HTTP_201_CREATED
+        assert third.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Daily upload limit reached (2)" in str(third.data)
+        assert not any("COUNT" in q["sql"] for q in ctx.captured_queries)
+        assert Document.objects.filter(owner=test_user).count() == 2
+
+    def test_upload_quota_follows_plan(self, api_client, test_user):
+        test_user.plan = "pro"
+        test_user.save()
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.post(self.url, self._payload(0), format="json")
+
+        assert response["X-RateLimit-Limit"] == "200"
+
+    def test_delete_gives_quota_back(self, api_client, test_user):
+        test_user.upload_limit = 1
+        test_user.save()
+        api_client.force_authenticate(user=test_user)
+        first = api_client.post(self.url, self._payload(0), format="json")
+
+        api_client.patch(reverse("document-delete", kwargs={"id": first.data["id"]}))
+        response = api_client.post(self.url, self._payload(1), format="json")
+
+        assert response.status_code == status.HTTP_201_CREATED
 
     def test_create_document_unauthenticated(self, api_client):
         """Yetkisiz erişimin engellenmesi testi."""
@@ -184,9 +317,24 @@ class TestDocumentList:
         api_client.force_authenticate(user=test_user)
         for i in range(12):
             Document.objects.create(owner=test_user, title=f"D {i}", file_size=1024)
-        response = api_client.get(self.url)
+        response = api_client.get(f"{self.url}?with_count=true")
         assert response.data["count"] == 12
         assert len(response.data["results"]) == 10
+        assert response.data["previous"] is None
+
+        second = api_client.get(response.data["next"])
+        assert "count" not in second.data
+        assert second.data["next"] is None
+        assert [d["title"] for d in second.data["results"]] == ["D 1", "D 0"]
+
+        back = api_client.get(second.data["previous"])
+        assert back.data["results"] == response.data["results"]
+        assert back.data["previous"] is None
+
+    def test_list_documents_invalid_cursor(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        response = api_client.get(f"{self.url}?cursor=not-a-cursor")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
 ######### DOCUMENT DELETE TESTS ############
@@ -311,6 +459,54 @@ class TestDocumentOverview:
         response = api_client.get(self.url)
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
+    def test_overview_follows_create_and_delete(self, api_client, test_user):
+        """Sayaçlar oluşturma ve silme ile artımlı güncellenmeli."""
+        api_client.force_authenticate(user=test_user)
+        Document.objects.create(owner=test_user, status="READY", file_size=100)
+        assert api_client.get(self.url).data["results"]["total_documents"] == 1
+
+        payload = {
+            "title": "New",
+            "original_name": "new.pdf",
+            "file_path": "uploads/new.pdf",
+            "file_size": 100,
+            "mime_type": "application/pdf",
+            "checksum": "abc",
+        }
+        api_client.post(reverse("document-create"), payload, format="json")
+        ready = Document.objects.get(owner=test_user, status="READY")
+        api_client.patch(reverse("document-delete", kwargs={"id": ready.id}))
+
+        results = api_client.get(self.url).data["results"]
+        assert results["total_documents"] == 1
+        assert results["ready"] == 0
+
+    def test_overview_reads_one_row(self, api_client, test_user):
+        """Overview, doküman sayısından bağımsız tek sorgu çalıştırmalı."""
+        api_client.force_authenticate(user=test_user)
+        for i in range(20):
+            Document.objects.create(owner=test_user, status="READY", file_size=100)
+        api_client.get(self.url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(self.url)
+
+        assert response.data["results"]["ready"] == 20
+        assert len(ctx.captured_queries) == 1
+        assert '"documents_document"' not in ctx.captured_queries[0]["sql"]
+
+    def test_reconcile_task_fixes_drift(self, test_user):
+        Document.objects.create(owner=test_user, status="FAILED", file_size=100)
+        DocumentStats.objects.create(owner=test_user, total_documents=5, errors=0)
+        other = User.objects.create_user(username="other", password="pass")
+
+        result = reconcile_document_stats()
+
+        stats = DocumentStats.objects.get(owner=test_user)
+        assert (stats.total_documents, stats.errors) == (1, 1)
+        assert DocumentStats.objects.get(owner=other).total_documents == 0
+        assert result == {"scanned": 2, "fixed": 2}
+
 
 ####### RECENT DOCUMENTS TESTS ############
 @pytest.mark.django_db
@@ -389,6 +585,12 @@ class TestDocumentRecentList:
 
 
 ######## EVENT LOG TESTS ############
+def log_events(*jobs):
+    AnalysisEvent.objects.bulk_create(
+        job_event(job, job.document, "queued") for job in jobs
+    )
+
+
 @pytest.mark.django_db
 class TestEventLogList:
     url = reverse("event-log")
@@ -404,6 +606,7 @@ class TestEventLogList:
         job2 = AnalysisJob.objects.create(
             document=doc, job_type="ANALYSIS", status="PROCESSING"
         )
+        log_events(job1, job2)
 
         response = api_client.get(self.url)
 
@@ -419,6 +622,8 @@ class TestEventLogList:
         assert results[1]["detail"] == f"{job1.job_type} job {job1.status}"
 
         assert results[0]["document_id"] == doc.id
+        assert results[0]["job_id"] == job2.id
+        assert results[0]["stage"] == "queued"
 
     def test_event_log_isolation(self, api_client, test_user):
         """Kullanıcıların sadece kendi dökümanlarına ait logları görmesi testi."""
@@ -430,8 +635,10 @@ class TestEventLogList:
         other_doc = Document.objects.create(
             owner=other_user, title="Secret", file_size=100
         )
-        AnalysisJob.objects.create(
-            document=other_doc, job_type="PREVIEW", status="FAILED"
+        log_events(
+            AnalysisJob.objects.create(
+                document=other_doc, job_type="PREVIEW", status="FAILED"
+            )
         )
 
         api_client.force_authenticate(user=test_user)
@@ -444,16 +651,22 @@ class TestEventLogList:
         api_client.force_authenticate(user=test_user)
         doc = Document.objects.create(owner=test_user, title="Page Doc", file_size=100)
 
-        # 12 adet iş oluştur
-        for i in range(12):
-            AnalysisJob.objects.create(document=doc, job_type="PREVIEW", status="READY")
+        # 12 adet olay oluştur
+        job = AnalysisJob.objects.create(document=doc, job_type="PREVIEW")
+        log_events(*[job] * 12)
 
-        response = api_client.get(self.url)
+        response = api_client.get(f"{self.url}?with_count=1")
 
         assert response.data["count"] == 12
         assert len(response.data["results"]) == 10
         assert response.data["next"] is not None
 
+        # Yeni kayıtlar imleçle alınan sonraki sayfayı kaydırmamalı
+        log_events(job)
+        second = api_client.get(response.data["next"])
+        assert len(second.data["results"]) == 2
+        assert second.data["next"] is None
+
     def test_event_log_unauthenticated(self, api_client):
         """Yetkisiz erişimin engellenmesi testi."""
         response = api_client.get(self.url)
@@ -461,43 +674,112 @@ class TestEventLogList:
 
 
 ###### SIGNED UPLOAD URL TESTS ############
+def sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+@pytest.fixture
+def mock_bucket():
+    """Önbellekteki storage istemcisini sahte bir bucket ile değiştirir."""
+    get_client.cache_clear()
+    with patch("documents.storage.create_client") as mock_create_client:
+        bucket = mock_create_client.return_value.storage.from_.return_value
+        bucket.exists.return_value = False
+        bucket.create_signed_upload_url.side_effect = lambda path: {
+            "signed_url": f"https://supabase.co/{path}",
+            "token": "mock-token-123",
+        }
+        yield bucket
+    get_client.cache_clear()
+
+
 @pytest.mark.django_db
 class TestSignedUploadURL:
     url = reverse("signed-upload")
 
-    @patch("documents.views.create_client")
-    def test_signed_upload_success(self, mock_create_client, api_client, test_user):
+    def test_signed_upload_success(self, api_client, test_user, mock_bucket):
         api_client.force_authenticate(user=test_user)
+        checksum = sha256(b"%PDF-1.7 test")
 
-        mock_supabase = MagicMock()
-        mock_storage = MagicMock()
-        mock_bucket = MagicMock()
+        payload = {
+            "file_name": "test dökümanı.pdf",
+            "content_type": "application/pdf",
+            "file_size": 1024 * 1024,
+            "checksum": checksum,
+        }
 
-        mock_create_client.return_value = mock_supabase
-        mock_supabase.storage = mock_storage
-        mock_storage.from_.return_value = mock_bucket
+        response = api_client.post(self.url, payload, format="json")
 
-        mock_bucket.remove.return_value = None
-        mock_bucket.create_signed_upload_url.return_value = {
-            "signed_url": "https://supabase.co/signed-url-abc",
-            "token": "mock-token-123",
-        }
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert results["path"] == f"blobs/{test_user.pk}/{checksum[:2]}/{checksum}.pdf"
+        assert results["upload_required"] is True
+        assert results["signed_url"].endswith(results["path"])
+        mock_bucket.remove.assert_not_called()
+
+    def test_signed_upload_existing_blob_skips_upload(
+        self, api_client, test_user, mock_bucket
+    ):
+        """Aynı içerik zaten yüklüyse tek metadata çağrısı yeterli olmalı."""
+        api_client.force_authenticate(user=test_user)
+        mock_bucket.exists.return_value = True
 
         payload = {
-            "file_name": "test dökümanı.pdf",
+            "file_name": "cv.pdf",
             "content_type": "application/pdf",
-            "file_size": 1024 * 1024,
+            "checksum": sha256(b"%PDF cv"),
         }
 
         response = api_client.post(self.url, payload, format="json")
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data["results"]["path"] == "uploads/test_dokuman.pdf"
+        assert response.data["results"]["upload_required"] is False
+        assert response.data["results"]["signed_url"] is None
+        mock_bucket.exists.assert_called_once()
+        mock_bucket.create_signed_upload_url.assert_not_called()
+
+    def test_signed_upload_same_name_different_content(
+        self, api_client, test_user, mock_bucket
+    ):
+        """Aynı isimli farklı dosyalar birbirinin üzerine yazmamalı."""
+        api_client.force_authenticate(user=test_user)
+        paths = [
+            api_client.post(
+                self.url,
+                {
+                    "file_name": "cv.pdf",
+                    "content_type": "application/pdf",
+                    "checksum": sha256(content),
+                },
+                format="json",
+            ).data["results"]["path"]
+            for content in (b"%PDF one", b"%PDF two")
+        ]
+
+        assert paths[0] != paths[1]
+
+    def test_signed_upload_invalid_checksum(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+
+        payload = {
+            "file_name": "test.pdf",
+            "content_type": "application/pdf",
+            "checksum": "../../etc/passwd",
+        }
+
+        response = api_client.post(self.url, payload, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "SHA-256" in response.data["detail"]
 
     def test_signed_upload_invalid_mime(self, api_client, test_user):
         api_client.force_authenticate(user=test_user)
 
-        payload = {"file_name": "image.png", "content_type": "image/png"}
+        payload = {
+            "file_name": "image.png",
+            "content_type": "image/png",
+            "checksum": sha256(b"png"),
+        }
 
         response = api_client.post(self.url, payload, format="json")
 
@@ -511,6 +793,7 @@ class TestSignedUploadURL:
             "file_name": "big_file.pdf",
             "content_type": "application/pdf",
             "file_size": 51 * 1024 * 1024,
+            "checksum": sha256(b"big"),
         }
 
         response = api_client.post(self.url, payload, format="json")
@@ -524,8 +807,935 @@ class TestSignedUploadURL:
         response = api_client.post(self.url, {"file_name": "test.pdf"})
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
-        assert "file_name and content_type are required." in response.data["detail"]
+        assert (
+            "file_name, content_type and checksum are required."
+            in response.data["detail"]
+        )
 
     def test_signed_upload_unauthenticated(self, api_client):
         response = api_client.post(self.url, {})
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestSignedUploadURLBatch:
+    url = reverse("signed-upload-batch")
+
+    def _files(self, *names):
+        return [
+            {
+                "file_name": name,
+                "content_type": "application/pdf",
+                "file_size": 1024,
+                "checksum": sha256(name.encode()),
+            }
+            for name in names
+        ]
+
+    def test_batch_returns_all_signed_urls(self, api_client, test_user, mock_bucket):
+        """Tüm dosyalar için imzalı URL'ler tek yanıtta dönmeli."""
+        api_client.force_authenticate(user=test_user)
+        files = self._files("a.pdf", "b.pdf", "a.pdf")
+        existing = files[1]["checksum"]
+        mock_bucket.exists.side_effect = lambda path: existing in path
+
+        response = api_client.post(self.url, {"files": files}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert [r["upload_required"] for r in results] == [True, False, True]
+        assert results[0]["path"] == results[2]["path"]
+        assert results[0]["signed_url"].endswith(results[0]["path"])
+        # Aynı blob iki kez sorgulanmamalı
+        assert mock_bucket.exists.call_count == 2
+        assert mock_bucket.create_signed_upload_url.call_count == 1
+        assert response["X-RateLimit-Limit"] == "15"
+
+    def test_batch_reports_per_file_failures(self, api_client, test_user, mock_bucket):
+        api_client.force_authenticate(user=test_user)
+        files = self._files("ok.pdf", "bad.pdf")
+        bad = files[1]["checksum"]
+
+        def sign(path):
+            if bad in path:
+                raise RuntimeError("storage down")
+            return {"signed_url": f"https://supabase.co/{path}", "token": "t"}
+
+        mock_bucket.create_signed_upload_url.side_effect = sign
+
+        response = api_client.post(self.url, {"files": files}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        ok, failed = response.data["results"]
+        assert ok["signed_url"]
+        assert failed["detail"] == "storage down"
+
+    def test_batch_validates_all_files(self, api_client, test_user, mock_bucket):
+        """Geçersiz dosyalar indeksleriyle birlikte raporlanmalı."""
+        api_client.force_authenticate(user=test_user)
+        files = self._files("ok.pdf", "image.png", "big.pdf")
+        files[1]["content_type"] = "image/png"
+        files[2]["file_size"] = 51 * 1024 * 1024
+
+        response = api_client.post(self.url, {"files": files}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["detail"] == {
+            1: "Only application/pdf is allowed.",
+            2: "File size exceeds 50MB limit.",
+        }
+        mock_bucket.exists.assert_not_called()
+
+    def test_batch_size_limit(self, api_client, test_user, settings):
+        api_client.force_authenticate(user=test_user)
+        settings.SIGNED_UPLOAD_BATCH_MAX = 2
+
+        response = api_client.post(
+            self.url, {"files": self._files("a.pdf", "b.pdf", "c.pdf")}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+######## CONDITIONAL GET TESTS ############
+@pytest.mark.django_db
+class TestConditionalGet:
+    @pytest.mark.parametrize(
+        "url_name", ["document-list", "recent-documents", "document-overview"]
+    )
+    def test_not_modified_until_documents_change(self, api_client, test_user, url_name):
+        api_client.force_authenticate(user=test_user)
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=100)
+        url = reverse(url_name)
+
+        etag = api_client.get(url)["ETag"]
+        unchanged = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        api_client.patch(reverse("document-delete", kwargs={"id": doc.id}))
+        changed = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+        assert changed.status_code == status.HTTP_200_OK
+
+    def test_etag_depends_on_query(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        Document.objects.create(owner=test_user, original_name="a.pdf", file_size=1)
+        url = reverse("document-list")
+
+        etag = api_client.get(url)["ETag"]
+        response = api_client.get(f"{url}?name=a", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+######## ASYNC (ASGI) VIEW TESTS ############
+@pytest.fixture
+def mock_async_bucket():
+    """Async storage istemcisini sahte bir bucket ile değiştirir."""
+    bucket = MagicMock()
+    bucket.exists = AsyncMock(return_value=False)
+    bucket.create_signed_upload_url = AsyncMock(
+        side_effect=lambda path: {
+            "signed_url": f"https://supabase.co/{path}",
+            "token": "mock-token-123",
+        }
+    )
+    with patch("documents.storage.AsyncStorageClient") as mock_client:
+        mock_client.return_value.from_.return_value = bucket
+        yield bucket
+
+
+@pytest.mark.django_db
+class TestAsyncDocumentViews:
+    @pytest.fixture(autouse=True)
+    def asgi_urls(self, settings):
+        settings.ROOT_URLCONF = "config.urls_asgi"
+
+    def _auth(self, user):
+        token = RefreshToken.for_user(user).access_token
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_list_requires_token(self, api_client):
+        response = api_client.get(reverse("document-list"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response["WWW-Authenticate"].startswith("Bearer")
+
+    def test_list_matches_sync_view(self, api_client, test_user):
+        """Async liste, senkron görünümle aynı sayfayı ve ETag'i döndürmeli."""
+        for i in range(12):
+            Document.objects.create(
+                owner=test_user, original_name=f"f{i}.pdf", file_size=1
+            )
+        Document.objects.create(owner=test_user, file_size=1, is_deleted=True)
+        url = reverse("document-list")
+
+        response = api_client.get(f"{url}?with_count=true", **self._auth(test_user))
+        api_client.force_authenticate(user=test_user)
+        with override_settings(ROOT_URLCONF="config.urls"):
+            sync_response = api_client.get(f"{url}?with_count=true")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["results"] == sync_response.json()["results"]
+        assert response.json()["count"] == 12
+        assert response.json()["next"]
+        assert response["ETag"] == sync_response["ETag"]
+
+    def test_list_not_modified(self, api_client, test_user):
+        Document.objects.create(owner=test_user, original_name="a.pdf", file_size=1)
+        url = reverse("document-list")
+
+        etag = api_client.get(url, **self._auth(test_user))["ETag"]
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag, **self._auth(test_user))
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_signed_upload(self, api_client, test_user, mock_async_bucket):
+        checksum = sha256(b"%PDF async")
+        payload = {
+            "file_name": "async.pdf",
+            "content_type": "application/pdf",
+            "checksum": checksum,
+        }
+
+        response = api_client.post(
+            reverse("signed-upload"), payload, format="json", **self._auth(test_user)
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert results["path"] == f"blobs/{test_user.pk}/{checksum[:2]}/{checksum}.pdf"
+        assert results["upload_required"] is True
+        assert results["token"] == "mock-token-123"
+        assert response["X-RateLimit-Limit"] == "15"
+
+    def test_post_is_csrf_exempt(self, test_user, mock_async_bucket):
+        """Token ile gelen POST, DRF görünümleri gibi CSRF kontrolüne takılmamalı."""
+        client = APIClient(enforce_csrf_checks=True)
+        payload = {
+            "file_name": "a.pdf",
+            "content_type": "application/pdf",
+            "checksum": sha256(b"%PDF csrf"),
+        }
+
+        response = client.post(
+            reverse("signed-upload"), payload, format="json", **self._auth(test_user)
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_signed_upload_validation(self, api_client, test_user, mock_async_bucket):
+        payload = {"file_name": "a.png", "content_type": "image/png"}
+
+        response = api_client.post(
+            reverse("signed-upload"), payload, format="json", **self._auth(test_user)
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_async_bucket.exists.assert_not_called()
+
+    def test_batch_signed_upload(self, api_client, test_user, mock_async_bucket):
+        """Mevcut blob'lar atlanmalı, hatalar dosya bazında raporlanmalı."""
+        names = ["a.pdf", "b.pdf", "c.pdf", "a.pdf"]
+        files = [
+            {
+                "file_name": name,
+                "content_type": "application/pdf",
+                "checksum": sha256(name.encode()),
+            }
+            for name in names
+        ]
+        existing, bad = files[1]["checksum"], files[2]["checksum"]
+        mock_async_bucket.exists.side_effect = lambda path: existing in path
+
+        def sign(path):
+            if bad in path:
+                raise RuntimeError("storage down")
+            return {"signed_url": f"https://supabase.co/{path}", "token": "t"}
+
+        mock_async_bucket.create_signed_upload_url.side_effect = sign
+
+        response = api_client.post(
+            reverse("signed-upload-batch"),
+            {"files": files},
+            format="json",
+            **self._auth(test_user),
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [r.get("upload_required") for r in results] == [True, False, None, True]
+        assert results[2]["detail"] == "storage down"
+        assert mock_async_bucket.exists.await_count == 3
+
+    def test_django_errors_go_through_exception_handler(self, test_user):
+        """Http404 ve PermissionDenied 500 değil, DRF hata yanıtı olmalı."""
+
+        class FailingView(AsyncAPIView):
+            async def get(self, request, error):
+                raise error
+
+        view = FailingView.as_view()
+        for error, code in ((Http404, 404), (PermissionDenied, 403)):
+            request = APIRequestFactory().get("/")
+            force_authenticate(request, user=test_user)
+
+            response = async_to_sync(view)(request, error=error)
+
+            assert response.status_code == code
+            assert "detail" in response.data
+
+    def test_permission_classes_apply(self, api_client, test_user):
+        """Senkron görünümün permission_classes'ı async görünümde de geçerli."""
+        with patch.object(DocumentListAPIView, "permission_classes", [IsAdminUser]):
+            response = api_client.get(reverse("document-list"), **self._auth(test_user))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+######## LIST QUERY COUNT TESTS ############
+@pytest.mark.django_db
+class TestDocumentListQueryCount:
+    url = reverse("document-list")
+
+    def _count_queries(self, api_client, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(f"{self.url}?page_size={page_size}")
+        assert len(response.data["results"]) == page_size
+        return ctx.captured_queries, response
+
+    def test_query_count_is_constant(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        for i in range(30):
+            Document.objects.create(
+                owner=test_user,
+                title=f"D {i}",
+                file_size=1,
+                chunk_count=2,
+                latest_job_id=i,
+                latest_job_status="READY",
+                latest_job_progress=100,
+            )
+
+        small, _ = self._count_queries(api_client, 3)
+        large, response = self._count_queries(api_client, 30)
+
+        assert len(small) == len(large)
+        assert not any("JOIN" in q["sql"] for q in large)
+        item = response.data["results"][0]
+        assert item["latest_job_status"] == "READY"
+        assert item["chunk_count"] == 2
+
+
+######## SPARSE FIELDSET TESTS ############
+def document_selects(queries):
+    return [q["sql"] for q in queries if 'FROM "documents_document"' in q["sql"]][-1]
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    url = reverse("document-list")
+
+    def _docs(self, user, count=3):
+        for i in range(count):
+            doc = Document.objects.create(
+                owner=user,
+                title=f"Doc {i}",
+                original_name=f"doc_{i}.pdf",
+                file_size=1,
+            )
+            DocumentAnalysis.objects.create(
+                document=doc,
+                preview_text=f"önizleme {i}",
+                analysis_text="özet",
+                analysis_json={"summary": "özet"},
+                ai_raw='{"summary": "özet"}',
+            )
+
+    def test_default_list_reads_only_document_table(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        self._docs(test_user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(self.url)
+
+        sql = document_selects(ctx.captured_queries)
+        assert response.status_code == status.HTTP_200_OK
+        assert "preview_text" not in response.data["results"][0]
+        assert "documents_documentanalysis" not in sql
+        assert "JOIN" not in sql
+
+    def test_preview_text_is_joined_on_request(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        self._docs(test_user)
+        Document.objects.create(owner=test_user, title="Yeni", file_size=1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(f"{self.url}?fields=title,preview_text")
+
+        previews = [r["preview_text"] for r in response.data["results"]]
+        assert previews == ["", "önizleme 2", "önizleme 1", "önizleme 0"]
+        sql = document_selects(ctx.captured_queries)
+        assert "LEFT OUTER JOIN" in sql
+        assert "ai_raw" not in sql
+
+    def test_fields_limits_response_and_columns(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        self._docs(test_user, count=12)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(f"{self.url}?fields=title,status")
+
+        sql = document_selects(ctx.captured_queries)
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data["results"][0]) == {"title", "status"}
+        assert "preview_text" not in sql
+        # Sayfalama anahtarları seçilmese de yüklenmeli
+        assert response.data["next"]
+
+    def test_exclude_drops_fields(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        self._docs(test_user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(f"{self.url}?exclude=file_path,mime_type")
+
+        item = response.data["results"][0]
+        assert "file_path" not in item
+        assert item["title"]
+        assert "mime_type" not in document_selects(ctx.captured_queries)
+
+    def test_unknown_field_is_rejected(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.get(f"{self.url}?fields=title,owner")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["fields"] == ["Unknown field(s): owner."]
+
+    def test_recent_documents_method_field_columns(self, api_client, test_user):
+        """Hesaplanan alanların kolonları yüklenmeli, ek sorgu atılmamalı."""
+        api_client.force_authenticate(user=test_user)
+        self._docs(test_user, count=5)
+        url = reverse("recent-documents")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(f"{url}?fields=document_name")
+
+        assert [r["document_name"] for r in response.data["results"]][0] == "Doc 4"
+        selects = [
+            q for q in ctx.captured_queries if 'FROM "documents_document"' in q["sql"]
+        ]
+        # ETag doğrulayıcıları + sayfa; satır başına erteleme sorgusu yok
+        assert len(selects) == 2
+        assert "preview_text" not in selects[-1]["sql"]
+
+    def test_etag_depends_on_fields(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        self._docs(test_user)
+
+        etag = api_client.get(self.url)["ETag"]
+        response = api_client.get(f"{self.url}?fields=id", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+######## DOCUMENT SNAPSHOT TESTS ############
+@pytest.mark.django_db
+class TestDocumentSnapshotCommand:
+    def _stale_doc(self, user):
+        doc = Document.objects.create(owner=user, title="Stale", file_size=1)
+        AnalysisJob.objects.create(document=doc, job_type="FULL", status="FAILED")
+        job = AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="READY", progress=100
+        )
+        for i in range(3):
+            DocumentChunk.objects.create(
+                document=doc, chunk_index=i, page_start=i, page_end=i, text="t"
+            )
+        return doc, job
+
+    def test_check_reports_inconsistent(self, test_user):
+        self._stale_doc(test_user)
+
+        with pytest.raises(CommandError):
+            call_command("rebuild_document_snapshots", "--check", stdout=StringIO())
+
+    def test_rebuild_in_batches(self, test_user):
+        doc, job = self._stale_doc(test_user)
+        Document.objects.create(owner=test_user, title="Empty", file_size=1)
+
+        out = StringIO()
+        call_command("rebuild_document_snapshots", "--batch-size", "1", stdout=out)
+
+        doc.refresh_from_db()
+        assert doc.chunk_count == 3
+        assert doc.latest_job_id == job.id
+        assert doc.latest_job_status == "READY"
+        assert doc.latest_job_progress == 100
+        assert "2 documents scanned, 1 rebuilt." in out.getvalue()
+        call_command("rebuild_document_snapshots", "--check", stdout=StringIO())
+
+
+######## COMPRESSED TEXT TESTS ############
+@pytest.mark.django_db
+class TestCompressedText:
+    @pytest.fixture(autouse=True)
+    def _dictionary_cache(self):
+        compression.clear_dictionary_cache()
+        yield
+        compression.clear_dictionary_cache()
+
+    def _text(self, i=0):
+        return " ".join(
+            f"Bölüm {i}.{n}: sözleşme tarafları ödeme koşullarını kabul eder."
+            for n in range(20)
+        )
+
+    def _chunk(self, user, text, index=0):
+        doc, _ = Document.objects.get_or_create(owner=user, title="Chunks", file_size=1)
+        return DocumentChunk.objects.create(
+            document=doc, chunk_index=index, page_start=1, page_end=2, text=text
+        )
+
+    def _stored(self, chunk):
+        return DocumentChunk.objects.values_list("text", flat=True).get(pk=chunk.pk)
+
+    def test_long_text_round_trip(self, test_user):
+        text = self._text()
+        chunk = self._chunk(test_user, text)
+
+        stored = self._stored(chunk)
+        assert stored.startswith(compression.MARKER + compression.ZSTD)
+        assert len(stored) < len(text.encode("utf-8")) / 2
+        assert DocumentChunk.objects.get(pk=chunk.pk).text == text
+
+    def test_short_text_stored_plain(self, test_user):
+        chunk = self._chunk(test_user, "kısa metin")
+
+        assert self._stored(chunk) == "kısa metin".encode()
+        assert DocumentChunk.objects.get(pk=chunk.pk).text == "kısa metin"
+
+    @override_settings(TEXT_COMPRESSION="zlib")
+    def test_zlib_codec(self, test_user):
+        chunk = self._chunk(test_user, self._text())
+
+        assert self._stored(chunk).startswith(compression.MARKER + compression.ZLIB)
+        assert DocumentChunk.objects.get(pk=chunk.pk).text == self._text()
+
+    def test_decompressed_on_first_access(self, test_user):
+        chunk = self._chunk(test_user, self._text())
+
+        with patch(
+            "documents.compression.decompress", wraps=compression.decompress
+        ) as decompress:
+            loaded = DocumentChunk.objects.get(pk=chunk.pk)
+            assert decompress.call_count == 0
+            assert loaded.text == loaded.text == self._text()
+
+        assert decompress.call_count == 1
+
+    def test_dictionary_recorded_in_frame(self, test_user):
+        for i in range(300):
+            self._chunk(test_user, self._text(i), index=i)
+
+        out = StringIO()
+        call_command(
+            "train_compression_dictionary",
+            "--name",
+            "chunk_text",
+            "--size",
+            "4096",
+            stdout=out,
+        )
+        dictionary = CompressionDictionary.objects.get(name="chunk_text")
+        chunk = self._chunk(test_user, self._text(999), index=999)
+        compression.clear_dictionary_cache()
+
+        assert "trained on 300 samples" in out.getvalue()
+        assert compression.stored_dictionary_id(self._stored(chunk)) == (
+            dictionary.dict_id
+        )
+        assert DocumentChunk.objects.get(pk=chunk.pk).text == self._text(999)
+
+    def test_command_compresses_plain_rows(self, test_user):
+        chunks = [self._chunk(test_user, self._text(i), index=i) for i in range(3)]
+        plain = self._text(0).encode("utf-8")
+        DocumentChunk.objects.update(text=plain)
+        DocumentAnalysis.objects.create(document=chunks[0].document, ai_raw="{}")
+
+        out = StringIO()
+        call_command("compress_text_columns", "--batch-size", "2", stdout=out)
+
+        assert all(
+            compression.is_compressed(value)
+            for value in DocumentChunk.objects.values_list("text", flat=True)
+        )
+        assert DocumentChunk.objects.get(pk=chunks[2].pk).text == self._text(0)
+        assert "documents.DocumentChunk.text: 3 rows scanned, 3 rewritten" in (
+            out.getvalue()
+        )
+        assert "documents.DocumentAnalysis.ai_raw: 1 rows scanned, 0 rewritten" in (
+            out.getvalue()
+        )
+
+
+######## JSON RENDERER TESTS ############
+class TestORJSONRenderer:
+    def _payload(self):
+        return {
+            "title": "Sözleşme\u2028özeti",
+            "created_at": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=UTC),
+            "amount": Decimal("12.50"),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "sections": [{"title": "Giriş", "page": 1}, {"title": "Sonuç"}],
+            1: None,
+        }
+
+    def test_same_output_as_drf(self):
+        assert ORJSONRenderer().render(self._payload()) == JSONRenderer().render(
+            self._payload()
+        )
+
+    def test_indent_falls_back_to_drf(self):
+        media_type = "application/json; indent=2"
+
+        assert ORJSONRenderer().render(self._payload(), media_type) == (
+            JSONRenderer().render(self._payload(), media_type)
+        )
+
+    def test_without_orjson(self):
+        with patch("config.renderers.orjson", None):
+            assert ORJSONRenderer().render(self._payload()) == (
+                JSONRenderer().render(self._payload())
+            )
+            assert loads('{"a": [1]}') == {"a": [1]}
+
+    @pytest.mark.django_db
+    def test_invalid_json_body_is_400(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.post(
+            reverse("signed-upload"), data="{bozuk", content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["detail"].startswith("JSON parse error")
+
+
+######## RESPONSE COMPRESSION TESTS ############
+class TestResponseCompression:
+    body = json.dumps(
+        [{"title": f"Doküman {i}", "status": "READY"} for i in range(100)]
+    )
+
+    def _process(self, response, accept="gzip, deflate, br"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+        return ResponseCompressionMiddleware(lambda r: response)(request)
+
+    def _json(self, body=None):
+        response = HttpResponse(body or self.body, content_type="application/json")
+        response["ETag"] = '"abc"'
+        return response
+
+    def test_brotli_preferred(self):
+        response = self._process(self._json())
+
+        assert response["Content-Encoding"] == "br"
+        assert brotli.decompress(response.content).decode() == self.body
+        assert response["Content-Length"] == str(len(response.content))
+        assert response["ETag"] == 'W/"abc"'
+        assert "Accept-Encoding" in response["Vary"]
+
+    def test_gzip_when_brotli_refused(self):
+        response = self._process(self._json(), accept="gzip, br;q=0")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content).decode() == self.body
+
+    @pytest.mark.parametrize(
+        "response",
+        [
+            HttpResponse('{"a": 1}', content_type="application/json"),
+            HttpResponse("x" * 5000, content_type="text/html"),
+            StreamingHttpResponse(
+                iter(["data: 1\n\n"]), content_type="text/event-stream"
+            ),
+        ],
+    )
+    def test_skipped(self, response):
+        response = self._process(response)
+
+        assert not response.has_header("Content-Encoding")
+
+    @override_settings(RESPONSE_COMPRESSION_GZIP_LEVEL=1)
+    def test_level_configurable(self):
+        fast = self._process(self._json(), accept="gzip").content
+
+        with override_settings(RESPONSE_COMPRESSION_GZIP_LEVEL=9):
+            best = self._process(self._json(), accept="gzip").content
+
+        # gzip başlığındaki XFL baytı: 4 = en hızlı, 2 = en iyi sıkıştırma
+        assert (fast[8], best[8]) == (4, 2)
+
+    @pytest.mark.django_db
+    def test_weak_etag_still_matches(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        for i in range(30):
+            Document.objects.create(owner=test_user, title=f"Doküman {i}", file_size=1)
+        url = reverse("document-list")
+
+        first = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        again = api_client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+
+        assert first["Content-Encoding"] == "gzip"
+        assert first["ETag"].startswith("W/")
+        assert again.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+######## RESPONSE CACHE TESTS ############
+@pytest.mark.django_db
+class TestResponseCache:
+    def _create(self, user, **kwargs):
+        return Document.objects.create(owner=user, title="Doc", file_size=1, **kwargs)
+
+    @pytest.mark.parametrize(
+        "url_name", ["document-list", "recent-documents", "event-log"]
+    )
+    def test_hit_skips_database(self, api_client, test_user, url_name):
+        api_client.force_authenticate(user=test_user)
+        self._create(test_user)
+        url = reverse(url_name)
+
+        first = api_client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            second = api_client.get(url)
+
+        assert first["X-Cache"] == "MISS"
+        assert second["X-Cache"] == "HIT"
+        assert second.data == first.data
+        assert second.get("ETag") == first.get("ETag")
+        # Sadece kimlik doğrulama sorgusu kalır, doküman sorgusu yok
+        assert not any("documents_" in q["sql"] for q in ctx.captured_queries)
+
+    def test_query_params_and_users_are_separate(self, api_client, test_user):
+        other = User.objects.create_user(username="other", password="password123")
+        self._create(test_user)
+        url = reverse("document-list")
+
+        api_client.force_authenticate(user=test_user)
+        api_client.get(url)
+        filtered = api_client.get(f"{url}?page_size=1")
+        api_client.force_authenticate(user=other)
+        foreign = api_client.get(url)
+
+        assert filtered["X-Cache"] == "MISS"
+        assert foreign["X-Cache"] == "MISS"
+        assert foreign.data["results"] == []
+
+    def test_writes_invalidate(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        doc = self._create(test_user)
+        url = reverse("document-list")
+        api_client.get(url)
+
+        api_client.patch(reverse("document-delete", kwargs={"id": doc.id}))
+        response = api_client.get(url)
+
+        assert response["X-Cache"] == "MISS"
+        assert response.data["results"] == []
+
+    def test_not_modified_from_cache(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        self._create(test_user)
+        url = reverse("document-list")
+        etag = api_client.get(url)["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["X-Cache"] == "HIT"
+        assert not any("documents_" in q["sql"] for q in ctx.captured_queries)
+
+    def test_running_analysis_not_cached(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        doc = self._create(test_user, status="PROCESSING")
+        job = AnalysisJob.objects.create(
+            document=doc, job_type="FULL", status="PROCESSING"
+        )
+        url = reverse("analysis-full", kwargs={"id": doc.id})
+
+        running = api_client.get(url)
+        job.status = "READY"
+        job.save(update_fields=["status"])
+        finished = api_client.get(url)
+        again = api_client.get(url)
+
+        assert running.data["job"]["status"] == "PROCESSING"
+        assert finished["X-Cache"] == "MISS"
+        assert finished.data["job"]["status"] == "READY"
+        assert again["X-Cache"] == "HIT"
+
+    @override_settings(RESPONSE_CACHE_TTL=0)
+    def test_disabled(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        url = reverse("document-list")
+        api_client.get(url)
+
+        assert not api_client.get(url).has_header("X-Cache")
+
+    def test_stats(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        url = reverse("document-list")
+        for _ in range(4):
+            api_client.get(url)
+
+        forbidden = api_client.get(reverse("response-cache-stats"))
+        test_user.is_staff = True
+        test_user.save()
+        stats = api_client.get(reverse("response-cache-stats")).data["results"]
+
+        assert forbidden.status_code == status.HTTP_403_FORBIDDEN
+        assert stats["document-list"] == {"hits": 3, "misses": 1, "hit_ratio": 0.75}
+        assert stats["event-log"]["hit_ratio"] is None
+
+
+######## METRICS TESTS ############
+def _sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    @pytest.fixture(autouse=True)
+    def _no_broker(self, settings):
+        # Testlerde broker yok, kuyruk uzunluğu okunmaz
+        settings.METRICS_CELERY_QUEUES = ()
+        settings.METRICS_TOKEN = "s3cret"
+
+    def test_request_latency_and_queries_per_route(self, api_client, test_user):
+        api_client.force_authenticate(user=test_user)
+        labels = {"method": "GET", "route": "document-list", "status": "200"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+        queries = _sample("http_request_db_queries_sum", route="document-list")
+
+        response = api_client.get(reverse("document-list"), HTTP_CACHE_CONTROL="")
+
+        assert response.status_code == 200
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+        assert _sample("http_request_db_queries_sum", route="document-list") > queries
+
+    def test_unknown_paths_share_one_route(self, api_client):
+        before = _sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="unmatched",
+            status="404",
+        )
+        api_client.get("/api/documents/yok-boyle-bir-sayfa/")
+        api_client.get("/baska-bir-sayfa/")
+        assert (
+            _sample(
+                "http_request_duration_seconds_count",
+                method="GET",
+                route="unmatched",
+                status="404",
+            )
+            == before + 2
+        )
+
+    def test_endpoint_exposes_in_flight_jobs(self, api_client, test_user):
+        doc = Document.objects.create(owner=test_user, title="Doc", file_size=1)
+        AnalysisJob.objects.create(document=doc, job_type="FULL", status="PROCESSING")
+        AnalysisJob.objects.create(document=doc, job_type="FULL", status="READY")
+
+        response = api_client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret"
+        )
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        body = response.content.decode()
+        assert (
+            'analysis_jobs_in_flight{job_type="FULL",status="PROCESSING"} 1.0' in body
+        )
+        assert 'analysis_jobs_in_flight{job_type="FULL",status="PENDING"} 0.0' in body
+        assert "# TYPE http_request_duration_seconds histogram" in body
+
+    def test_token_is_required(self, api_client):
+        assert api_client.get(reverse("metrics")).status_code == 401
+        assert (
+            api_client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+            ).status_code
+            == 401
+        )
+        response = api_client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret"
+        )
+        assert response.status_code == 200
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self, api_client):
+        assert api_client.get(reverse("metrics")).status_code == 404
+
+    @override_settings(METRICS_TOKEN="")
+    def test_disabled_without_token(self, api_client):
+        """Token tanımlı değilse uç nokta herkese açık olmamalı."""
+        response = api_client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer ")
+        assert response.status_code == 404
+
+    def test_storage_errors_are_counted(self):
+        bucket_api = MagicMock()
+        bucket_api.exists.side_effect = RuntimeError("storage down")
+        labels = {"service": "storage", "operation": "exists"}
+        errors = _sample(
+            "external_call_duration_seconds_count", outcome="error", **labels
+        )
+
+        with pytest.raises(RuntimeError):
+            prepare_upload(bucket_api, "blobs/aa/x.pdf")
+        bucket_api.exists.side_effect = None
+        bucket_api.exists.return_value = True
+        ok = _sample("external_call_duration_seconds_count", outcome="ok", **labels)
+        prepare_upload(bucket_api, "blobs/aa/x.pdf")
+
+        assert (
+            _sample("external_call_duration_seconds_count", outcome="error", **labels)
+            == errors + 1
+        )
+        assert (
+            _sample("external_call_duration_seconds_count", outcome="ok", **labels)
+            == ok + 1
+        )
+
+    def test_task_duration_by_state(self):
+        labels = {"task": reconcile_document_stats.name, "state": "SUCCESS"}
+        before = _sample("celery_task_duration_seconds_count", **labels)
+
+        reconcile_document_stats.apply()
+
+        assert _sample("celery_task_duration_seconds_count", **labels) == before + 1
+
+    @override_settings(METRICS_CELERY_QUEUES=("celery",))
+    def test_queue_length(self, monkeypatch):
+        from kombu import Connection
+
+        from config.celery import app
+
+        monkeypatch.setattr(app, "connection_for_read", lambda: Connection("memory://"))
+        with Connection("memory://") as conn:
+            queue = conn.SimpleQueue("celery")
+            queue.put({"task": "bekleyen"})
+            queue.put({"task": "bekleyen"})
+
+            family = next(metrics.QueueDepthCollector().collect())
+
+            queue.clear()
+            queue.close()
+        assert [(s.labels, s.value) for s in family.samples] == [
+            ({"queue": "celery"}, 2)
+        ]
@@ -0,0 +1,184 @@
+import re
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from analysis.events import job_event
+from analysis.models import AnalysisEvent, AnalysisJob
+from documents.models import Document
+from documents.paginations import KeysetPagination10
+
+User = get_user_model()
+
+HOT_TABLES = ("documents_document", "analysis_analysisjob", "analysis_analysisevent")
+
+OWNERS = 40
+DOCUMENTS_PER_OWNER = 250
+# The first owner is a heavy tenant, the case the list indexes exist for.
+HEAVY_OWNER_DOCUMENTS = 2500
+
+
+def explain(sql):
+    prefix = "EXPLAIN" if connection.vendor == "postgresql" else "EXPLAIN QUERY PLAN"
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}")
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+def full_scans(plan):
+    """Hot tables read without an index in the given plan."""
+    if connection.vendor == "postgresql":
+        tables = re.findall(r"Seq Scan on (\w+)", plan)
+    else:
+        tables = re.findall(r"^SCAN (\w+)$", plan, re.MULTILINE)
+    return [t for t in tables if t in HOT_TABLES]
+
+
+@pytest.fixture
+def large_dataset(db):
+    """Planner'ın gerçekçi seçim yapması için çok kullanıcılı büyük veri seti."""
+    owners = User.objects.bulk_create(
+        User(username=f"owner{i}", email=f"owner{i}@example.com") for i in range(OWNERS)
+    )
+    Document.objects.bulk_create(
+        (
+            Document(
+                owner=owner,
+                title=f"Doc {i}",
+                original_name=f"doc_{i}.pdf",
+                file_path=f"uploads/doc_{i}.pdf",
+                file_size=1024,
+                mime_type="application/pdf",
+                status="READY",
+                is_deleted=i % 10 == 0,
+            )
+            for owner in owners
+            for i in range(
+                HEAVY_OWNER_DOCUMENTS if owner is owners[0] else DOCUMENTS_PER_OWNER
+            )
+        ),
+        batch_size=2000,
+    )
+    # Keep the seed out of the 24h upload window.
+    Document.objects.update(created_at=timezone.now() - timedelta(days=2))
+    AnalysisJob.objects.bulk_create(
+        (
+            AnalysisJob(document_id=doc_id, job_type=job_type, status="READY")
+            for doc_id in Document.objects.values_list("id", flat=True)
+            for job_type in ("PREVIEW", "FULL")
+        ),
+        batch_size=2000,
+    )
+    AnalysisEvent.objects.bulk_create(
+        (
+            job_event(job, job.document, stage)
+            for job in AnalysisJob.objects.select_related("document")
+            for stage in ("queued", "finished")
+        ),
+        batch_size=2000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    owner = owners[0]
+    doc = Document.objects.filter(owner=owner, is_deleted=False).first()
+    return owner, doc
+
+
+def _cursor_after(doc):
+    return KeysetPagination10.encode_cursor(doc.created_at, doc.id)
+
+
+def _document_create(doc):
+    payload = {
+        "title": "New",
+        "original_name": "new.pdf",
+        "file_path": "uploads/new.pdf",
+        "file_size": 1024,
+        "mime_type": "application/pdf",
+        "checksum": "a" * 64,
+    }
+    return "post", reverse("document-create"), payload
+
+
+# endpoint -> (request builder, indexes its main queries must use). Index
+# choice is only pinned on PostgreSQL, the production engine; elsewhere the
+# suite only rejects full scans of the hot tables.
+ENDPOINTS = {
+    "document-list": (
+        lambda doc: ("get", reverse("document-list"), None),
+        ("document_live_created_idx",),
+    ),
+    "document-list-deep": (
+        lambda doc: ("get", reverse("document-list"), {"cursor": _cursor_after(doc)}),
+        ("document_live_created_idx",),
+    ),
+    "recent-documents": (
+        lambda doc: ("get", reverse("recent-documents"), None),
+        ("document_live_created_idx",),
+    ),
+    "document-overview": (
+        lambda doc: ("get", reverse("document-overview"), None),
+        (),
+    ),
+    "event-log": (
+        lambda doc: ("get", reverse("event-log"), None),
+        ("analysisevent_owner_ts_idx",),
+    ),
+    "document-create": (_document_create, ("document_live_created_idx",)),
+    "document-delete": (
+        lambda doc: ("patch", reverse("document-delete", kwargs={"id": doc.id}), None),
+        (),
+    ),
+    "analysis-full-get": (
+        lambda doc: ("get", reverse("analysis-full", kwargs={"id": doc.id}), None),
+        ("analysisjob_doc_type_idx",),
+    ),
+    "analysis-full-post": (
+        lambda doc: ("post", reverse("analysis-full", kwargs={"id": doc.id}), None),
+        ("analysisjob_doc_type_idx",),
+    ),
+}
+
+
+######## QUERY PLAN TESTS ############
+@pytest.mark.django_db
+class TestHotQueryPlans:
+    @pytest.mark.parametrize("endpoint", sorted(ENDPOINTS))
+    def test_endpoint_queries_use_indexes(self, large_dataset, endpoint):
+        """Her endpoint'in sıcak tablolara giden sorguları index kullanmalı."""
+        owner, doc = large_dataset
+        client = APIClient()
+        client.force_authenticate(user=owner)
+        build_request, expected_indexes = ENDPOINTS[endpoint]
+        method, url, data = build_request(doc)
+
+        with patch("analysis.jobs.run_full_analysis.delay"):
+            with CaptureQueriesContext(connection) as ctx:
+                response = getattr(client, method)(url, data)
+        assert response.status_code < 400, response.data
+
+        selects = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT")
+            and any(f'"{table}"' in q["sql"] for table in HOT_TABLES)
+        ]
+        assert selects
+
+        plans = [explain(sql) for sql in selects]
+        for sql, plan in zip(selects, plans):
+            assert not full_scans(plan), f"{sql}\n\n{plan}"
+
+        if connection.vendor != "postgresql":
+            return
+        report = "\n\n".join(plans)
+        for index in expected_indexes:
+            assert index in report, f"{index} not used:\n\n{report}"
@@ -7,7 +7,9 @@ from documents.views import (
     DocumentOverviewAPIView,
     DocumentRecentListAPIView,
     EventLogListAPIView,
+    ResponseCacheStatsAPIView,
     SignedUploadURLAPIView,
+    SignedUploadURLBatchAPIView,
 )
 
 urlpatterns = [
@@ -21,9 +23,19 @@ urlpatterns = [
         name="recent-documents",
     ),
     path("event-log/", EventLogListAPIView.as_view(), name="event-log"),
+    path(
+        "cache-stats/",
+        ResponseCacheStatsAPIView.as_view(),
+        name="response-cache-stats",
+    ),
     path(
         "supabase/signed-upload/",
         SignedUploadURLAPIView.as_view(),
         name="signed-upload",
     ),
+    path(
+        "supabase/signed-upload/batch/",
+        SignedUploadURLBatchAPIView.as_view(),
+        name="signed-upload-batch",
+    ),
 ]
@@ -1,17 +1,31 @@
-import os
-import re
-import unicodedata
-
-from django.db.models import Count, Q
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from supabase import Client, create_client
 
-from analysis.models import AnalysisJob
+from analysis.models import AnalysisEvent
+from config.async_api import AsyncAPIView
+from documents.conditional import (
+    aconditional_response,
+    aowner_documents_validators,
+    conditional_response,
+    make_etag,
+    owner_documents_validators,
+)
+from documents.fieldsets import only_fields, requested_fields
 from documents.models import Document
-from documents.paginations import Pagination10
+from documents.paginations import EventKeysetPagination10, KeysetPagination10
+from documents.quota import UploadQuota
+from documents.response_cache import (
+    acache_per_user,
+    bump_user_version,
+    cache_per_user,
+    response_cache_stats,
+)
 from documents.serializers import (
     DocumentCreateSerializer,
     DocumentOverviewSerializer,
@@ -19,6 +33,22 @@ from documents.serializers import (
     EventLogItemSerializer,
     RecentDocumentItemSerializer,
 )
+from documents.stats import document_deleted, get_document_stats
+from documents.storage import (
+    UPLOAD_HEADERS,
+    StorageConfigurationError,
+    aget_bucket,
+    aprepare_upload,
+    aprepare_uploads,
+    blob_path,
+    get_bucket,
+    prepare_upload,
+    prepare_uploads,
+    validate_upload,
+)
+
+# Read by the keyset paginator whatever fields the client selected.
+LIST_KEY_COLUMNS = ("id", "created_at")
 
 
 class DocumentCreateAPIView(APIView):
@@ -29,27 +59,99 @@ class DocumentCreateAPIView(APIView):
             data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
-        doc = serializer.save()
-        return Response(DocumentSerializer(doc).data, status=status.HTTP_201_CREATED)
+
+        quota = UploadQuota(request.user)
+        if not quota.acquire():
+            message = (
+                f"Daily upload limit reached ({quota.limit}). "
+                "Please try again tomorrow."
+            )
+            return Response(
+                {"error": [message]},
+                status=status.HTTP_400_BAD_REQUEST,
+                headers=quota.headers(),
+            )
+
+        try:
+            doc = serializer.save()
+        except Exception:
+            quota.release()
+            raise
+        return Response(
+            DocumentSerializer(doc).data,
+            status=status.HTTP_201_CREATED,
+            headers=quota.headers(),
+        )
 
 
 class DocumentListAPIView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = Pagination10
+    pagination_class = KeysetPagination10
 
+    @cache_per_user("document-list")
     def get(self, request):
-        qs = Document.objects.filter(owner=request.user, is_deleted=False).order_by(
-            "-id"
+        etag, last_modified = owner_documents_validators(request, "document-list")
+        return conditional_response(
+            request, etag, last_modified, lambda: self._list(request)
+        )
+
+    def _list(self, request):
+        fields = requested_fields(
+            request,
+            DocumentSerializer.Meta.fields,
+            DocumentSerializer.Meta.default_fields,
         )
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(
+            _document_list_queryset(request, fields), request, view=self
+        )
+
+        serializer = DocumentSerializer(page, many=True, fields=fields)
+        paginated_response = paginator.get_paginated_response(serializer.data)
+
+        return Response(
+            {"status": 200, **paginated_response.data}, status=status.HTTP_200_OK
+        )
+
+
+def _document_list_queryset(request, fields):
+    qs = only_fields(
+        Document.objects.filter(owner=request.user, is_deleted=False),
+        DocumentSerializer,
+        fields,
+        LIST_KEY_COLUMNS,
+    )
 
-        name_filter = request.query_params.get("name", None)
-        if name_filter:
-            qs = qs.filter(original_name__icontains=name_filter)
+    name_filter = request.query_params.get("name", None)
+    if name_filter:
+        qs = qs.filter(original_name__icontains=name_filter)
+    return qs
 
+
+class AsyncDocumentListView(AsyncAPIView, DocumentListAPIView):
+    """``DocumentListAPIView`` for the ASGI deployment."""
+
+    @acache_per_user("document-list")
+    async def get(self, request):
+        etag, last_modified = await aowner_documents_validators(
+            request, "document-list"
+        )
+        return await aconditional_response(
+            request, etag, last_modified, lambda: self._list(request)
+        )
+
+    async def _list(self, request):
+        fields = requested_fields(
+            request,
+            DocumentSerializer.Meta.fields,
+            DocumentSerializer.Meta.default_fields,
+        )
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(qs, request, view=self)
+        page = await paginator.apaginate_queryset(
+            _document_list_queryset(request, fields), request, view=self
+        )
 
-        serializer = DocumentSerializer(page, many=True)
+        serializer = DocumentSerializer(page, many=True, fields=fields)
         paginated_response = paginator.get_paginated_response(serializer.data)
 
         return Response(
@@ -70,7 +172,11 @@ class DocumentDeleteAPIView(APIView):
                 {"detail": "Document not found."}, status=status.HTTP_404_NOT_FOUND
             )
         doc.is_deleted = True
-        doc.save(update_fields=["is_deleted"])
+        with transaction.atomic():
+            doc.save(update_fields=["is_deleted", "updated_at"])
+            document_deleted(doc)
+            bump_user_version(doc.owner_id)
+        UploadQuota(request.user).refund(doc.created_at)
 
         return Response(
             {"message": "Document deleted.", "status": 200}, status=status.HTTP_200_OK
@@ -81,132 +187,248 @@ class DocumentOverviewAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        qs = Document.objects.filter(owner=request.user, is_deleted=False)
-
-        ready_statuses = ["READY", "PREVIEW_READY"]
-        processing_statuses = ["PROCESSING"]
-        error_statuses = ["FAILED"]
-
-        agg = qs.aggregate(
-            total_documents=Count("id"),
-            processing=Count("id", filter=Q(status__in=processing_statuses)),
-            ready=Count("id", filter=Q(status__in=ready_statuses)),
-            errors=Count("id", filter=Q(status__in=error_statuses)),
+        stats = get_document_stats(request.user.pk)
+        counters = [getattr(stats, f) for f in stats.COUNTER_FIELDS]
+        etag = make_etag("overview", request.user.pk, *counters, stats.updated_at)
+        return conditional_response(
+            request, etag, stats.updated_at, lambda: self._overview(stats)
         )
 
-        serializer = DocumentOverviewSerializer(agg)
+    def _overview(self, stats):
+        serializer = DocumentOverviewSerializer(stats)
 
         return Response(
             {"status": 200, "results": serializer.data}, status=status.HTTP_200_OK
         )
 
 
+def _upload_target(bucket, path, upload_required, signed_url, token):
+    return {
+        "bucket": bucket,
+        "path": path,
+        "upload_required": upload_required,
+        "token": token,
+        "signed_url": signed_url,
+        "method": "PUT",
+        "headers": UPLOAD_HEADERS,
+    }
+
+
 class SignedUploadURLAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        file_name = request.data.get("file_name")
-        content_type = request.data.get("content_type")
-        file_size = request.data.get("file_size")
+        error = _single_upload_error(request.data)
+        if error:
+            return error
 
-        if not file_name or not content_type:
-            return Response(
-                {"detail": "file_name and content_type are required."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        storage_path = blob_path(request.user.pk, request.data["checksum"])
 
-        if content_type != "application/pdf":
-            return Response(
-                {"detail": "Only application/pdf is allowed."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        try:
+            bucket, bucket_api = get_bucket()
+        except StorageConfigurationError as e:
+            return _server_error(e)
 
-        if file_size and int(file_size) > 50 * 1024 * 1024:
-            return Response(
-                {"detail": "File size exceeds 50MB limit."},
-                status=status.HTTP_400_BAD_REQUEST,
+        try:
+            return _single_upload_response(
+                bucket,
+                storage_path,
+                prepare_upload(bucket_api, storage_path),
+                UploadQuota(request.user).check().headers(),
             )
+        except Exception as e:
+            return _server_error(e)
 
-        def normalize_filename(name):
-            name = (
-                unicodedata.normalize("NFKD", name)
-                .encode("ascii", "ignore")
-                .decode("ascii")
-            )
-            name = name.replace(" ", "_")
-            name = re.sub(r"[^a-zA-Z0-9._-]", "", name)
-            return name
 
-        safe_name = normalize_filename(file_name)
+class SignedUploadURLBatchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        storage_path = f"uploads/{safe_name}"
+    def post(self, request):
+        files = request.data.get("files")
+        error = _batch_upload_error(files)
+        if error:
+            return error
 
-        url = os.getenv("SUPABASE_URL", "")
-        key = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
-        bucket = os.getenv("SUPABASE_BUCKET", "")
+        try:
+            bucket, bucket_api = get_bucket()
+        except StorageConfigurationError as e:
+            return _server_error(e)
+
+        paths = [blob_path(request.user.pk, f["checksum"]) for f in files]
+        prepared = prepare_uploads(bucket_api, paths)
+        return _batch_upload_response(
+            bucket,
+            files,
+            paths,
+            prepared,
+            UploadQuota(request.user).check().headers(),
+        )
 
-        if not url or not key or not bucket:
-            return Response(
-                {"detail": "Server configuration error: Missing Supabase credentials."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+
+class AsyncSignedUploadURLView(AsyncAPIView, SignedUploadURLAPIView):
+    """``SignedUploadURLAPIView`` on the async storage client."""
+
+    async def post(self, request):
+        error = _single_upload_error(request.data)
+        if error:
+            return error
+
+        storage_path = blob_path(request.user.pk, request.data["checksum"])
+
+        try:
+            bucket, bucket_api = aget_bucket()
+        except StorageConfigurationError as e:
+            return _server_error(e)
+
+        try:
+            return _single_upload_response(
+                bucket,
+                storage_path,
+                await aprepare_upload(bucket_api, storage_path),
+                await _aquota_headers(request.user),
             )
+        except Exception as e:
+            return _server_error(e)
+
+
+class AsyncSignedUploadURLBatchView(AsyncAPIView, SignedUploadURLBatchAPIView):
+    """``SignedUploadURLBatchAPIView`` on the async storage client."""
 
-        supabase: Client = create_client(url, key)
+    async def post(self, request):
+        files = request.data.get("files")
+        error = _batch_upload_error(files)
+        if error:
+            return error
 
         try:
-            try:
-                supabase.storage.from_(bucket).remove([storage_path])
-            except Exception:
-                pass
-
-            res = supabase.storage.from_(bucket).create_signed_upload_url(storage_path)
-
-            signed_url = None
-            token = None
-
-            if isinstance(res, dict):
-                signed_url = res.get("signed_url") or res.get("signedURL")
-                token = res.get("token")
-            else:
-                signed_url = getattr(res, "signed_url", None) or getattr(
-                    res, "signedURL", None
-                )
-                token = getattr(res, "token", None)
-
-            if not signed_url:
-                return Response(
-                    {"detail": "Failed to generate signed URL."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+            bucket, bucket_api = aget_bucket()
+        except StorageConfigurationError as e:
+            return _server_error(e)
+
+        paths = [blob_path(request.user.pk, f["checksum"]) for f in files]
+        prepared = await aprepare_uploads(bucket_api, paths)
+        return _batch_upload_response(
+            bucket, files, paths, prepared, await _aquota_headers(request.user)
+        )
 
-            return Response(
+
+@sync_to_async
+def _aquota_headers(user):
+    return UploadQuota(user).check().headers()
+
+
+def _server_error(error):
+    return Response(
+        {"detail": str(error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+
+
+def _single_upload_error(data):
+    error = validate_upload(
+        data.get("file_name"),
+        data.get("content_type"),
+        data.get("file_size"),
+        data.get("checksum"),
+    )
+    if error:
+        return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def _single_upload_response(bucket, storage_path, prepared, headers):
+    upload_required, signed_url, token = prepared
+    if upload_required and not signed_url:
+        return _server_error("Failed to generate signed URL.")
+
+    return Response(
+        {
+            "status": 200,
+            "results": _upload_target(
+                bucket, storage_path, upload_required, signed_url, token
+            ),
+        },
+        status=status.HTTP_200_OK,
+        headers=headers,
+    )
+
+
+def _batch_upload_error(files):
+    if not isinstance(files, list) or not files:
+        return Response(
+            {"detail": "files must be a non-empty list."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(files) > settings.SIGNED_UPLOAD_BATCH_MAX:
+        return Response(
+            {
+                "detail": "At most "
+                f"{settings.SIGNED_UPLOAD_BATCH_MAX} files per request."
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    errors = {}
+    for index, item in enumerate(files):
+        if not isinstance(item, dict):
+            item = {}
+        error = validate_upload(
+            item.get("file_name"),
+            item.get("content_type"),
+            item.get("file_size"),
+            item.get("checksum"),
+        )
+        if error:
+            errors[index] = error
+    if errors:
+        return Response({"detail": errors}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def _batch_upload_response(bucket, files, paths, prepared, headers):
+    results = []
+    for item, path in zip(files, paths):
+        outcome = prepared[path]
+        if isinstance(outcome, Exception):
+            results.append(
                 {
-                    "status": 200,
-                    "results": {
-                        "bucket": bucket,
-                        "path": storage_path,
-                        "token": token,
-                        "signed_url": signed_url,
-                        "method": "PUT",
-                        "headers": {"Content-Type": "application/pdf"},
-                    },
-                },
-                status=status.HTTP_200_OK,
+                    "file_name": item["file_name"],
+                    "path": path,
+                    "detail": str(outcome),
+                }
             )
+            continue
+        results.append(
+            {
+                "file_name": item["file_name"],
+                **_upload_target(bucket, path, *outcome),
+            }
+        )
 
-        except Exception as e:
-            return Response(
-                {"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+    return Response(
+        {"status": 200, "results": results},
+        status=status.HTTP_200_OK,
+        headers=headers,
+    )
 
 
 class DocumentRecentListAPIView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = Pagination10
+    pagination_class = KeysetPagination10
 
+    @cache_per_user("recent-documents")
     def get(self, request):
-        qs = Document.objects.filter(owner=request.user, is_deleted=False).order_by(
-            "-created_at"
+        etag, last_modified = owner_documents_validators(request, "recent-documents")
+        return conditional_response(
+            request, etag, last_modified, lambda: self._list(request)
+        )
+
+    def _list(self, request):
+        fields = requested_fields(request, RecentDocumentItemSerializer.Meta.fields)
+        qs = only_fields(
+            Document.objects.filter(owner=request.user, is_deleted=False),
+            RecentDocumentItemSerializer,
+            fields,
+            LIST_KEY_COLUMNS,
         )
 
         document_name_filter = request.query_params.get("document_name", None)
@@ -219,7 +441,7 @@ class DocumentRecentListAPIView(APIView):
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(qs, request, view=self)
 
-        serializer = RecentDocumentItemSerializer(page, many=True)
+        serializer = RecentDocumentItemSerializer(page, many=True, fields=fields)
 
         paginated_response = paginator.get_paginated_response(serializer.data)
 
@@ -230,32 +452,31 @@ class DocumentRecentListAPIView(APIView):
 
 class EventLogListAPIView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = Pagination10
+    pagination_class = EventKeysetPagination10
 
+    @cache_per_user("event-log")
     def get(self, request):
-        qs = (
-            AnalysisJob.objects.filter(document__owner=request.user)
-            .select_related("document")
-            .order_by("-created_at")
-        )
+        qs = AnalysisEvent.objects.filter(owner=request.user)
 
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(qs, request, view=self)
 
-        results = [
-            {
-                "ts": j.created_at,
-                "event": j.status,
-                "detail": f"{j.job_type} job {j.status}",
-                "document_id": j.document_id,
-            }
-            for j in page
-        ]
-
-        serializer = EventLogItemSerializer(results, many=True)
+        serializer = EventLogItemSerializer(page, many=True)
 
         paginated_response = paginator.get_paginated_response(serializer.data)
 
         return Response(
             {"status": 200, **paginated_response.data}, status=status.HTTP_200_OK
         )
+
+
+class ResponseCacheStatsAPIView(APIView):
+    """Hit ratio of the per-user response cache, per endpoint (staff only)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {"status": 200, "results": response_cache_stats()},
+            status=status.HTTP_200_OK,
+        )